@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections import deque
+
+import src.shared_state as shared_state
+from src.debug_utils import log_debug
+
+# Risk alerts are written to the `alert_outbox` table in the same transaction as their
+# event (see shared_state._append), so an alert is never lost even if no dashboard is open
+# or the process dies right after. A dispatcher thread fans each alert out to every
+# registered subscriber in batches and records per-subscriber delivery; a subscriber that
+# raises is retried with backoff, so delivery is at-least-once. A subscriber with nowhere to
+# deliver yet raises SubscriberUnavailable instead: its alerts stay due without backoff.
+
+MAX_BACKOFF_SECONDS = 60
+IDLE_CHECK_SECONDS = 1.0 # alerts written by another process can't wake us; check this often
+LATENCY_WINDOW = 500 # latency samples kept per subscriber for the metrics
+
+_subscribers = {} # name -> (handler, batch_size)
+_latencies = {} # name -> deque of alert-to-delivery seconds
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_conn = None
+_thread = None
+
+
+class SubscriberUnavailable(Exception):
+    """Raised by a handler that has nowhere to deliver right now; not counted as a failed attempt."""
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        shared_state._get_conn() # creates alert_outbox
+        conn = sqlite3.connect(shared_state.STATE_DB, check_same_thread=False, isolation_level=None)
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS alert_deliveries (
+                alert_id INTEGER NOT NULL,
+                subscriber TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                delivered_at REAL,
+                latency REAL,
+                last_error TEXT,
+                PRIMARY KEY (alert_id, subscriber)
+            );
+            """
+        )
+        _conn = conn
+    return _conn
+
+
+def register_subscriber(name, handler, batch_size=None):
+    """
+    Deliver alerts to `handler(alerts)`, called with a list of
+    {id, session_id, created_at, payload} dicts. Raising marks the batch for retry.
+    Undelivered alerts from before registration (up to ALERT_MAX_AGE_SECONDS) are delivered too.
+    """
+    from config import ALERT_BATCH_SIZE
+    with _lock:
+        _subscribers[name] = (handler, batch_size or ALERT_BATCH_SIZE)
+        _latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW))
+    start_alert_bus()
+    _wakeup.set()
+
+
+def unregister_subscriber(name):
+    with _lock:
+        _subscribers.pop(name, None)
+
+
+def resume_subscriber(name):
+    """The subscriber can take alerts again: retry its undelivered ones now, skipping any backoff."""
+    _get_conn().execute(
+        "UPDATE alert_deliveries SET next_attempt_at = 0 WHERE subscriber = ? AND delivered_at IS NULL", (name,)
+    )
+    _wakeup.set()
+
+
+def _pending(conn, name, batch_size, now):
+    from config import ALERT_MAX_AGE_SECONDS
+    rows = conn.execute(
+        "SELECT o.id, o.session_id, o.created_at, o.payload, COALESCE(d.attempts, 0) FROM alert_outbox o "
+        "LEFT JOIN alert_deliveries d ON d.alert_id = o.id AND d.subscriber = ? "
+        "WHERE d.delivered_at IS NULL AND COALESCE(d.next_attempt_at, 0) <= ? AND o.created_at >= ? "
+        "ORDER BY o.id LIMIT ?",
+        (name, now, now - ALERT_MAX_AGE_SECONDS, batch_size)
+    ).fetchall()
+    return [
+        {"id": id_, "session_id": session_id, "created_at": created_at, "payload": json.loads(payload), "attempts": attempts}
+        for id_, session_id, created_at, payload, attempts in rows
+    ]
+
+
+def _deliver(conn, name, handler, batch):
+    """Hand one batch to a subscriber and record the outcome."""
+    try:
+        handler(batch)
+    except SubscriberUnavailable:
+        return False
+    except Exception as e:
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO alert_deliveries (alert_id, subscriber, attempts, next_attempt_at, last_error) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(alert_id, subscriber) DO UPDATE SET attempts = excluded.attempts, "
+            "next_attempt_at = excluded.next_attempt_at, last_error = excluded.last_error",
+            [(a["id"], name, a["attempts"] + 1, now + min(2 ** a["attempts"], MAX_BACKOFF_SECONDS), str(e)) for a in batch]
+        )
+        log_debug(f"Alert subscriber '{name}' failed ({len(batch)} alerts): {e}")
+        return False
+
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO alert_deliveries (alert_id, subscriber, attempts, delivered_at, latency) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(alert_id, subscriber) DO UPDATE SET attempts = excluded.attempts, "
+        "delivered_at = excluded.delivered_at, latency = excluded.latency, last_error = NULL",
+        [(a["id"], name, a["attempts"] + 1, now, now - a["created_at"]) for a in batch]
+    )
+    with _lock:
+        _latencies[name].extend(now - a["created_at"] for a in batch)
+    return True
+
+
+def dispatch_pending():
+    """Deliver everything currently due to every subscriber. Returns the number of alerts delivered."""
+    conn = _get_conn()
+    delivered = 0
+    with _lock:
+        subscribers = list(_subscribers.items())
+    for name, (handler, batch_size) in subscribers:
+        while True:
+            batch = _pending(conn, name, batch_size, time.time())
+            if not batch or not _deliver(conn, name, handler, batch):
+                break
+            delivered += len(batch)
+            if len(batch) < batch_size:
+                break
+    return delivered
+
+
+def _run():
+    from config import ALERT_BATCH_WINDOW_SECONDS
+    while True:
+        woken = _wakeup.wait(timeout=IDLE_CHECK_SECONDS)
+        if woken:
+            # Let a burst of alerts accumulate so it goes out as one batch
+            time.sleep(ALERT_BATCH_WINDOW_SECONDS)
+        _wakeup.clear()
+        try:
+            dispatch_pending()
+        except Exception as e:
+            log_debug(f"Alert dispatch failed: {e}")
+
+
+def _on_state_change(session_id, version):
+    # Cheap: only wakes the dispatcher, which checks the outbox
+    _wakeup.set()
+
+
+def start_alert_bus():
+    """Start the dispatcher thread once per process."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            shared_state.subscribe(_on_state_change)
+            _thread = threading.Thread(target=_run, name="alert-bus", daemon=True)
+            _thread.start()
+
+
+def get_alert_metrics():
+    """
+    Alert-to-delivery latency per subscriber over recent deliveries (seconds),
+    plus how many alerts are still waiting, and how many expired undelivered
+    (older than ALERT_MAX_AGE_SECONDS, so no longer retried).
+    """
+    from config import ALERT_MAX_AGE_SECONDS
+    conn = _get_conn()
+    cutoff = time.time() - ALERT_MAX_AGE_SECONDS
+    metrics = {}
+    with _lock:
+        names = list(_subscribers)
+        samples = {name: sorted(_latencies.get(name, ())) for name in names}
+    for name in names:
+        values = samples[name]
+        pending, expired = conn.execute(
+            "SELECT COALESCE(SUM(o.created_at >= ?), 0), COALESCE(SUM(o.created_at < ?), 0) "
+            "FROM alert_outbox o LEFT JOIN alert_deliveries d "
+            "ON d.alert_id = o.id AND d.subscriber = ? WHERE d.delivered_at IS NULL",
+            (cutoff, cutoff, name)
+        ).fetchone()
+        metrics[name] = {
+            "delivered": len(values),
+            "pending": pending,
+            "expired": expired,
+            "p50": values[len(values) // 2] if values else None,
+            "p95": values[min(int(len(values) * 0.95), len(values) - 1)] if values else None,
+            "max": values[-1] if values else None,
+        }
+    return metrics
+
+
+# --- Built-in subscribers ---
+
+def log_sink(alerts):
+    """Append alerts as JSON lines (an audit trail that doesn't depend on any UI)."""
+    from config import ALERT_LOG_PATH
+    os.makedirs(os.path.dirname(ALERT_LOG_PATH) or ".", exist_ok=True)
+    with open(ALERT_LOG_PATH, "a", encoding="utf-8") as f:
+        for alert in alerts:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+def webhook_sink(alerts):
+    """POST a batch to the configured webhook (a local stand-in for paging/SMS integrations)."""
+    from config import ALERT_WEBHOOK_URL
+    request = urllib.request.Request(
+        ALERT_WEBHOOK_URL,
+        data=json.dumps({"alerts": alerts}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        if response.status >= 300:
+            raise RuntimeError(f"Webhook returned {response.status}")
+
+
+def register_default_subscribers():
+    """Log sink always; webhook when ALERT_WEBHOOK_URL is set. The dashboard registers itself."""
+    from config import ALERT_WEBHOOK_URL
+    register_subscriber("log", log_sink)
+    if ALERT_WEBHOOK_URL:
+        register_subscriber("webhook", webhook_sink)
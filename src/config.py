@@ -5,6 +5,31 @@ LLM_PROVIDER = "groq"
 GROQ_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
 GROQ_MODEL2 = "llama-3.1-8b-instant"
 
+# Conversation checkpoints (LangGraph SQLite saver, keyed by session/thread id)
+CHECKPOINT_DB_PATH = "data/checkpoints.sqlite"
+
+# Last `gradio_app.py --profile-startup` result, the baseline for the next run's deltas
+STARTUP_PROFILE_PATH = "data/startup_profile.json"
+
+# Population benchmarks (precomputed from the bundled PHQ-9 dataset)
+POPULATION_DATASET_PATH = "PHQ-9_Dataset_5th Edition.csv"
+POPULATION_CUBE_PATH = "data/population_cube.npz"
+
+# Symptoms, PHQ-9 items, severity bands, stressors and interventions for advice (see utils/knowledge_graph.py)
+KG_PATH = "data/knowledge_graph.json"
+KG_MAX_INTERVENTIONS = 5
+
+# Bilingual FAQ answered before the LLM (see src/utils/faq.py). Cosine thresholds are for the
+# RAG_EMBEDDING_MODEL; lexical ones are BM25 confidence over the FAQ questions and keywords.
+FAQ_PATH = "data/faq.json"
+FAQ_EMBEDDINGS_PATH = "data/faq_embeddings.npz"
+FAQ_MAX_WORDS = 20 # longer messages are never treated as stock questions
+FAQ_ANSWER_LEXICAL = 0.85
+FAQ_ANSWER_MIN_TERMS = 2 # keyword matches answer directly only with this many query terms matched
+FAQ_ANSWER_SIMILARITY = 0.92
+FAQ_CONTEXT_LEXICAL = 0.5
+FAQ_CONTEXT_SIMILARITY = 0.85
+
 # Emotion Pipeline Configuration
 EMOTION_MURIL_PATH = "/content/muril_cssrs_finetuned" # Specific fine-tuned model path
 EMOTION_XGBOOST_PATH = "/content/xgboost_emotion_models.pkl"
@@ -30,3 +55,63 @@ CSSRS_LABELS = {
     3: 'Behavior',
     4: 'Attempt'
 }
+
+# Conversation-level risk (exponentially weighted C-SSRS probabilities across turns)
+RISK_EWMA_ALPHA = 0.4 # weight of the newest message
+CRISIS_SUSTAINED_THRESHOLD = 0.6 # weighted probability of Ideation or worse
+CRISIS_ACUTE_THRESHOLD = 0.5 # weighted probability of Behavior or worse
+CRISIS_PEAK_LEVEL = 3 # any single message classified Behavior or worse
+
+# Alert delivery (durable outbox in the dashboard state database, see src/alert_bus.py)
+ALERT_WEBHOOK_URL = "" # e.g. "http://localhost:9000/alerts"; empty disables the webhook subscriber
+ALERT_LOG_PATH = "data/alerts.jsonl"
+ALERT_BATCH_SIZE = 20
+ALERT_BATCH_WINDOW_SECONDS = 0.05 # wait this long after a wakeup so bursts go out as one batch
+ALERT_MAX_AGE_SECONDS = 24 * 3600 # undelivered alerts older than this are no longer retried
+
+# Session-priority scheduling (src/utils/scheduler.py): crisis/elevated sessions jump the
+# queue and are never shed; normal requests are rejected once this many are waiting
+LLM_MAX_CONCURRENT = 4
+LLM_MAX_QUEUE = 32
+ANALYSIS_WORKERS = 2
+ANALYSIS_MAX_QUEUE = 64
+SESSION_PRIORITY_IDLE_SECONDS = 2 * 3600 # a raised priority is dropped after this long without a turn
+
+# Guideline retrieval (Qdrant local store + FastEmbed)
+RAG_COLLECTION = "phq9_docs"
+RAG_TOP_K = 2
+RAG_EMBEDDING_MODEL = "BAAI/bge-small-en" # QdrantClient's FastEmbed default, used by client.add()
+# Immutable, memory-mapped export of the collection (see src/utils/index_snapshot.py).
+# Workers search it in-process, so several app processes can serve guidelines at once.
+RAG_INDEX_DIR = "data/rag_index"
+RAG_SNAPSHOT_CHECK_SECONDS = 5.0 # how often a worker looks for a newer snapshot
+RAG_LEXICAL_CONFIDENCE = 0.6 # BM25 confidence at which lexical hits are returned without embedding
+RAG_HYBRID_CANDIDATES = 10 # results taken from each of BM25 and dense search before fusion
+RAG_CACHE_SIZE = 256 # cached guideline searches (LRU)
+RAG_CACHE_TTL_SECONDS = 3600
+RAG_CACHE_SIMILARITY = 0.95 # cosine above which a cached query's results are reused
+RAG_MANIFEST_PATH = "data/rag_index/manifest.json" # content hashes of ingested PDFs
+RAG_INGEST_BATCH_SIZE = 64 # chunks per upsert
+RAG_INGEST_WORKERS = 4 # processes extracting PDF text
+# "structured": headings/paragraphs/tables packed up to RAG_CHUNK_TOKENS, repeated boilerplate dropped;
+# "fixed": RAG_CHUNK_SIZE-character windows with RAG_CHUNK_OVERLAP (the previous behaviour)
+RAG_CHUNKER = "structured"
+RAG_CHUNK_TOKENS = 200
+RAG_CHUNK_SIZE = 1000
+RAG_CHUNK_OVERLAP = 100
+# Vector compression for the collection and the snapshot: "int8" (4x smaller), "binary" (32x) or None.
+# Quantized vectors are scanned first and the best limit x oversampling candidates rescored at full precision.
+RAG_QUANTIZATION = "int8"
+RAG_QUANTIZATION_OVERSAMPLING = 4.0
+RAG_HNSW_M = 16
+RAG_HNSW_EF_CONSTRUCT = 100
+RAG_VECTORS_ON_DISK = True # full-precision vectors stay on disk; only the quantized ones are kept in RAM
+
+# Per-turn tracing (src/utils/tracing.py): share of turns traced (0 turns it off),
+# spans go to a rotating JSONL log and feed the Performance page's latency percentiles
+TRACE_SAMPLE_RATE = 1.0
+TRACE_LOG_PATH = "data/traces.jsonl"
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+TRACE_WINDOW = 500 # recent spans per name kept for the percentiles
+TRACE_RECENT_TURNS = 20
@@ -1,8 +1,16 @@
 
+import asyncio
+import threading
+import time
 import gradio as gr
 import plotly.graph_objects as go
-import pandas as pd
 import math
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from gradio.components.plot import PlotData
+from utils.population_stats import get_population_cube, AGE_BANDS, GENDERS, ALL
+from utils.risk import get_risk_level, RISK_LEVELS, RISK_COLORS, is_crisis
 
 # --- Mock Data ---
 CURRENT_PATIENT = {
@@ -33,30 +41,31 @@ CURRENT_PATIENT = {
     }
 }
 
-POPULATION_DATA = [
-    {"ageGroup": "18-22", "avgScore": 12.3, "count": 145, "q1": 8, "q3": 16},
-    {"ageGroup": "23-25", "avgScore": 14.8, "count": 98, "q1": 10, "q3": 19},
-    {"ageGroup": "26-30", "avgScore": 13.1, "count": 67, "q1": 9, "q3": 17},
-    {"ageGroup": "31-35", "avgScore": 11.5, "count": 43, "q1": 7, "q3": 15},
-]
-
-GENDER_COMPARISON = [
-    {"gender": "Female", "avgScore": 14.2, "count": 198},
-    {"gender": "Male", "avgScore": 12.1, "count": 143},
-    {"gender": "Other", "avgScore": 15.7, "count": 12}
-]
+# --- Population Benchmarks ---
+# Served from the precomputed PHQ-9 dataset cube (see src/utils/population_stats.py)
+
+def get_population_data():
+    """PHQ-9 total by age band: [{ageGroup, avgScore, count, q1, q3}]."""
+    cube = get_population_cube()
+    rows = []
+    for label, _, _ in AGE_BANDS:
+        stats = cube.stats("Total", label, ALL)
+        if stats["count"]:
+            rows.append({"ageGroup": label, "avgScore": round(stats["mean"], 1), "count": stats["count"], "q1": stats["q1"], "q3": stats["q3"]})
+    return rows
+
+def get_gender_comparison():
+    """PHQ-9 total by gender: [{gender, avgScore, count}]."""
+    cube = get_population_cube()
+    rows = []
+    for gender in GENDERS:
+        stats = cube.stats("Total", ALL, gender)
+        if stats["count"]:
+            rows.append({"gender": gender, "avgScore": round(stats["mean"], 1), "count": stats["count"]})
+    return rows
 
 # --- Logic & Analysis ---
 
-def get_risk_level(score, suicidal_score):
-    if suicidal_score >= 2 or score >= 20:
-        return {"level": "High", "color": "#ef4444", "action": "Immediate clinical attention required"}
-    if score >= 15:
-        return {"level": "Moderate-High", "color": "#f59e0b", "action": "Clinical follow-up recommended within 1 week"}
-    if score >= 10:
-        return {"level": "Moderate", "color": "#eab308", "action": "Monitor and schedule follow-up"}
-    return {"level": "Mild", "color": "#22c55e", "action": "Supportive intervention"}
-
 def detect_patterns(patient):
     patterns = []
     symptoms = patient["symptoms"]
@@ -113,6 +122,50 @@ def get_discordance(patient):
     }
 
 # --- Charts ---
+# Each chart is split into a base figure (built once per population cube version) and a
+# per-patient overlay. The serialized result is cached on the chart's inputs,
+# so an unchanged chart costs a dict lookup instead of a rebuild + to_json().
+
+FIGURE_CACHE_SIZE = 256
+_figure_cache = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+def cached_figure(builder, patient, key):
+    """Return builder(patient) as serialized plot data, building it only the first time `key` is seen."""
+    cache_key = (builder.__name__, key, get_population_cube().version)
+    with _figure_cache_lock:
+        plot = _figure_cache.get(cache_key)
+        if plot is not None:
+            _figure_cache.move_to_end(cache_key)
+            return plot
+    plot = PlotData(type="plotly", plot=builder(patient).to_json())
+    with _figure_cache_lock:
+        _figure_cache[cache_key] = plot
+        if len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return plot
+
+def population_symptom_avg(name, age=None, gender=None):
+    """Mean item score in the patient's age/gender cohort."""
+    cube = get_population_cube()
+    age_band, gender = cube.cohort(age, gender, name)
+    return cube.stats(name, age_band, gender)["mean"]
+
+@lru_cache(maxsize=64)
+def _symptom_base(names, age, gender, cube_version):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=[name.replace("/", "/\n") for name in names],
+        y=[population_symptom_avg(name, age, gender) for name in names],
+        name="Population Avg",
+        marker_color='#94a3b8'
+    ))
+    fig.update_layout(
+        title="Symptom Profile Analysis",
+        yaxis_range=[0, 3],
+        barmode='group'
+    )
+    return fig
 
 def create_symptom_chart(patient):
     if not patient or not patient.get("symptoms"):
@@ -126,45 +179,54 @@ def create_symptom_chart(patient):
         )
         return fig
 
-    data = []
-    for name, value in patient["symptoms"].items():
-        data.append({
-            "Symptom": name.replace("/", "/\n"),
-            "Score": value,
-            "Type": "Patient"
-        })
-        # Mock population avg
-        data.append({
-            "Symptom": name.replace("/", "/\n"),
-            "Score": (hash(name) % 20) / 10 + 0.5, # Deterministic mock
-            "Type": "Population Avg"
-        })
-    
-    df = pd.DataFrame(data)
-    
-    fig = go.Figure()
-    
-    patient_data = df[df["Type"] == "Patient"]
-    pop_data = df[df["Type"] == "Population Avg"]
-    
-    fig.add_trace(go.Bar(
-        x=patient_data["Symptom"],
-        y=patient_data["Score"],
+    symptoms = patient["symptoms"]
+    fig = go.Figure(_symptom_base(tuple(symptoms), patient.get("age"), patient.get("gender"), get_population_cube().version))
+    patient_trace = go.Bar(
+        x=[name.replace("/", "/\n") for name in symptoms],
+        y=list(symptoms.values()),
         name="Patient Score",
         marker_color='#3b82f6'
-    ))
+    )
+    # Patient bars first, as in the legend
+    fig.add_trace(patient_trace)
+    fig.data = fig.data[-1:] + fig.data[:-1]
+    return fig
+
+# Symptom domain -> PHQ-9 items averaged into it
+RADAR_DOMAINS = {
+    "Mood": ["Feeling Down", "Interest/Pleasure"],
+    "Sleep": ["Sleep Issues"],
+    "Energy": ["Fatigue"],
+    "Cognitive": ["Concentration", "Psychomotor"],
+    "Self-Perception": ["Self-Worth"],
+    "Somatic": ["Appetite"]
+}
+
+@lru_cache(maxsize=64)
+def _radar_base(age, gender, cube_version):
+    cats = list(RADAR_DOMAINS)
+    pop_vals = [
+        sum(population_symptom_avg(item, age, gender) for item in items) / len(items)
+        for items in RADAR_DOMAINS.values()
+    ]
     
-    fig.add_trace(go.Bar(
-        x=pop_data["Symptom"],
-        y=pop_data["Score"],
-        name="Population Avg",
-        marker_color='#94a3b8'
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=pop_vals + pop_vals[:1],
+        theta=cats + cats[:1],
+        fill='toself',
+        name='Population Avg',
+        line_color='#94a3b8',
+        opacity=0.5
     ))
     
     fig.update_layout(
-        title="Symptom Profile Analysis",
-        yaxis_range=[0, 3],
-        barmode='group'
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 3]
+            )),
+        title="Symptom Domain Comparison"
     )
     return fig
 
@@ -174,49 +236,48 @@ def create_radar_chart(patient):
          
     symptoms = patient["symptoms"]
     categories = [
-        {"category": "Mood", "patient": (symptoms["Feeling Down"] + symptoms["Interest/Pleasure"]) / 2, "pop": 1.6},
-        {"category": "Sleep", "patient": symptoms["Sleep Issues"], "pop": 1.8},
-        {"category": "Energy", "patient": symptoms["Fatigue"], "pop": 1.9},
-        {"category": "Cognitive", "patient": (symptoms["Concentration"] + symptoms["Psychomotor"]) / 2, "pop": 1.4},
-        {"category": "Self-Perception", "patient": symptoms["Self-Worth"], "pop": 1.5},
-        {"category": "Somatic", "patient": symptoms["Appetite"], "pop": 1.3}
+        {"category": "Mood", "patient": (symptoms["Feeling Down"] + symptoms["Interest/Pleasure"]) / 2},
+        {"category": "Sleep", "patient": symptoms["Sleep Issues"]},
+        {"category": "Energy", "patient": symptoms["Fatigue"]},
+        {"category": "Cognitive", "patient": (symptoms["Concentration"] + symptoms["Psychomotor"]) / 2},
+        {"category": "Self-Perception", "patient": symptoms["Self-Worth"]},
+        {"category": "Somatic", "patient": symptoms["Appetite"]}
     ]
     
     cats = [c["category"] for c in categories]
     pat_vals = [c["patient"] for c in categories]
-    pop_vals = [c["pop"] for c in categories]
     
     # Close the loop
     cats.append(cats[0])
     pat_vals.append(pat_vals[0])
-    pop_vals.append(pop_vals[0])
-    
-    fig = go.Figure()
     
-    fig.add_trace(go.Scatterpolar(
+    fig = go.Figure(_radar_base(patient.get("age"), patient.get("gender"), get_population_cube().version))
+    patient_trace = go.Scatterpolar(
         r=pat_vals,
         theta=cats,
         fill='toself',
         name='Patient',
         line_color='#3b82f6'
-    ))
+    )
+    fig.add_trace(patient_trace)
+    fig.data = fig.data[-1:] + fig.data[:-1]
+    return fig
+
+@lru_cache(maxsize=1)
+def _population_base(cube_version):
+    population_data = get_population_data()
+    fig = go.Figure()
     
-    fig.add_trace(go.Scatterpolar(
-        r=pop_vals,
-        theta=cats,
-        fill='toself',
-        name='Population Avg',
-        line_color='#94a3b8',
-        opacity=0.5
+    fig.add_trace(go.Bar(
+        x=[row["ageGroup"] for row in population_data],
+        y=[row["avgScore"] for row in population_data],
+        name="Population Avg",
+        marker_color='#10b981'
     ))
     
     fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 3]
-            )),
-        title="Symptom Domain Comparison"
+        title="Age Group Benchmarking",
+        yaxis_range=[0, 25]
     )
     return fig
 
@@ -224,23 +285,15 @@ def create_population_chart(patient):
     if not patient or "totalScore" not in patient:
          return go.Figure().update_layout(title="Population Benchmark (Waiting for data...)")
 
-    df = pd.DataFrame(POPULATION_DATA)
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=df["ageGroup"],
-        y=df["avgScore"],
-        name="Population Avg",
-        marker_color='#10b981'
-    ))
+    cube_version = get_population_cube().version
+    fig = go.Figure(_population_base(cube_version))
     
     # Add patient line
     fig.add_shape(
         type="line",
         x0=-0.5,
         y0=patient["totalScore"],
-        x1=3.5,
+        x1=len(fig.data[0].x) - 0.5,
         y1=patient["totalScore"],
         line=dict(
             color="#ef4444",
@@ -248,25 +301,16 @@ def create_population_chart(patient):
             dash="dashdot",
         ),
     )
-    
-    fig.update_layout(
-        title="Age Group Benchmarking",
-        yaxis_range=[0, 25]
-    )
     return fig
 
-def create_gender_chart(patient):
-    if not patient or "gender" not in patient:
-        return go.Figure().update_layout(title="Gender Comparison (Waiting for data...)")
-        
-    df = pd.DataFrame(GENDER_COMPARISON)
-    colors = ['#ef4444' if g == patient['gender'] else '#8b5cf6' for g in df['gender']]
-    
+@lru_cache(maxsize=1)
+def _gender_base(cube_version):
+    gender_comparison = get_gender_comparison()
     fig = go.Figure(go.Bar(
-        x=df["avgScore"],
-        y=df["gender"],
+        x=[row["avgScore"] for row in gender_comparison],
+        y=[row["gender"] for row in gender_comparison],
         orientation='h',
-        marker_color=colors
+        marker_color='#8b5cf6'
     ))
     
     fig.update_layout(
@@ -275,7 +319,31 @@ def create_gender_chart(patient):
     )
     return fig
 
-from src.shared_state import get_dashboard_state
+def create_gender_chart(patient):
+    if not patient or "gender" not in patient:
+        return go.Figure().update_layout(title="Gender Comparison (Waiting for data...)")
+        
+    fig = go.Figure(_gender_base(get_population_cube().version))
+    # Highlight the patient's group
+    colors = ['#ef4444' if g == patient['gender'] else '#8b5cf6' for g in fig.data[0].y]
+    fig.update_traces(marker_color=colors)
+    return fig
+
+from src.shared_state import get_dashboard_state, get_version, subscribe, query_sessions, get_overview_stats, get_turn_series
+from utils.timeseries import lttb
+
+# Streaming views wait on shared-state notifications, which only reach writers in this
+# process. When the chat app runs in another process they fall back to re-checking the
+# state version this often, so an idle view does almost no work.
+CROSS_PROCESS_CHECK_SECONDS = 15.0
+
+async def _wait_for_change(changed):
+    """Until a state notification sets `changed`, or CROSS_PROCESS_CHECK_SECONDS pass."""
+    try:
+        await asyncio.wait_for(changed.wait(), timeout=CROSS_PROCESS_CHECK_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    changed.clear()
 
 def create_live_emotion_chart(state):
     """Create chart from live state."""
@@ -294,6 +362,63 @@ def create_live_emotion_chart(state):
     fig.update_layout(title="Live User Emotions (Top 3)", yaxis_title="Count")
     return fig
 
+# Each timeline line is downsampled to at most this many points, so long sessions render in constant time
+TIMELINE_MAX_POINTS = 200
+TIMELINE_EMOTIONS = 4
+
+def create_timeline_chart(state):
+    """Per-turn probabilities of the session's dominant emotions, with the C-SSRS risk index on a second axis."""
+    series = get_turn_series(state["session_id"]) if state and state.get("turn_count") else None
+    if series is None or series.size == 0:
+        return go.Figure().update_layout(title="Session Timeline (Waiting for data...)")
+
+    turns = np.arange(1, series.size + 1)
+    fig = go.Figure()
+    emotions = series.emotions
+    for label in series.top_emotions(TIMELINE_EMOTIONS):
+        y = emotions[:, series.emotion_labels.index(label)]
+        idx = lttb(turns, y, TIMELINE_MAX_POINTS)
+        fig.add_trace(go.Scatter(x=turns[idx], y=y[idx], mode="lines", name=label.capitalize()))
+
+    risk = series.risk_index()
+    idx = lttb(turns, risk, TIMELINE_MAX_POINTS)
+    fig.add_trace(go.Scatter(
+        x=turns[idx], y=risk[idx], mode="lines", name="C-SSRS Risk",
+        line=dict(color="#ef4444", width=3, dash="dot"), yaxis="y2"
+    ))
+    fig.update_layout(
+        title=f"Session Timeline ({series.size} turns)",
+        xaxis_title="Turn",
+        yaxis=dict(title="Emotion Probability", range=[0, 1]),
+        yaxis2=dict(
+            title="Risk Level", overlaying="y", side="right", range=[0, len(series.cssrs_labels) - 1],
+            tickvals=list(range(len(series.cssrs_labels))), ticktext=series.cssrs_labels
+        ),
+        legend=dict(orientation="h", y=-0.2)
+    )
+    return fig
+
+def _timeline_key(state):
+    return (state.get("session_id"), state.get("turn_count", 0)) if state else None
+
+def build_conversation_risk(state):
+    """Conversation-level risk: weighted C-SSRS profile across all turns, not just the last message."""
+    profile = state.get("risk_profile") if state else None
+    if not profile:
+        return "### Conversation Risk\nWaiting for data..."
+    from config import CSSRS_LABELS
+    color = "#ef4444" if is_crisis(profile) else "#f59e0b" if profile["sustained"] >= 0.3 else "#22c55e"
+    return (
+        f"### Conversation Risk\n"
+        f"<span style='color:{color}'>**Weighted level:** {profile['score']:.2f} / {len(CSSRS_LABELS) - 1}</span><br>"
+        f"**Ideation or worse:** {profile['sustained']:.0%} | **Behavior or worse:** {profile['acute']:.0%}<br>"
+        f"**Peak:** {CSSRS_LABELS.get(profile['peak_level'], 'Unknown')} | **Turns:** {profile['turns']}"
+    )
+
+def _conversation_risk_key(state):
+    profile = state.get("risk_profile") if state else None
+    return (profile["turns"], round(profile["score"], 2), profile["peak_level"]) if profile else None
+
 def check_live_alerts(state):
     """Get live alerts text."""
     if not state: return ""
@@ -305,78 +430,221 @@ def check_live_alerts(state):
         html += f"<div style='background-color:#fee2e2; border-left: 4px solid #ef4444; padding: 10px; margin-bottom: 5px; color: #b91c1c;'><b>{alert['message']}</b></div>"
     return html
 
-def update_dashboard():
-    """Poll shared state and update live components."""
-    state = get_dashboard_state()
-    
-    # 1. Charts
-    live_emo_chart = create_live_emotion_chart(state)
-    live_risk = check_live_alerts(state)
-    
-    # 2. Patient Info Header (Update in case login happened after dashboard load)
-    header_md = ""
+SAFE_KEYS = [
+    "Interest/Pleasure", "Feeling Down", "Sleep Issues", "Fatigue",
+    "Appetite", "Self-Worth", "Concentration", "Psychomotor", "Suicidal Ideation"
+]
+
+def build_header(state):
+    """Patient Info Header (Update in case login happened after dashboard load)."""
     patient = state.get("patient") if state else None
     if patient:
-        header_md = f"# PHQ-9 Clinical Dashboard\n**Patient ID:** {patient.get('id', 'N/A')} | **Name:** {patient.get('name', 'N/A')} | **Age:** {int(patient.get('age', 0))} | **Gender:** {patient.get('gender', 'N/A')}"
-    else:
-        header_md = f"# PHQ-9 Clinical Dashboard\n**Patient ID:** Waiting... | **Status:** No active session"
+        return f"# PHQ-9 Clinical Dashboard\n**Patient ID:** {patient.get('id', 'N/A')} | **Name:** {patient.get('name', 'N/A')} | **Age:** {int(patient.get('age', 0))} | **Gender:** {patient.get('gender', 'N/A')}"
+    return f"# PHQ-9 Clinical Dashboard\n**Patient ID:** Waiting... | **Status:** No active session"
 
-    # 3. Score Header
-    # Calculate score from real symptoms if available
+def build_score(state):
+    """Score header calculated from real symptoms if available."""
     symptoms = state.get("symptoms", {}) if state else {}
     if symptoms:
         total_score = sum(symptoms.values())
         risk = get_risk_level(total_score, symptoms.get("Suicidal Ideation", 0))
-        score_md = f"# {int(total_score)}\n**PHQ-9 Total Score**\n\n<span style='background-color:{risk['color']}; color:white; padding: 4px 8px; border-radius: 4px;'>{risk['level']} Risk</span>"
-    else:
-        score_md = "# --\n**PHQ-9 Total Score**"
+        return f"# {int(total_score)}\n**PHQ-9 Total Score**\n\n<span style='background-color:{risk['color']}; color:white; padding: 4px 8px; border-radius: 4px;'>{risk['level']} Risk</span>"
+    return "# --\n**PHQ-9 Total Score**"
 
-    # 5. Other Charts
-    # Ensure patient object has 'totalScore' or calculate it
-    if symptoms:
-        # Default missing keys to 0 for radar chart safety
-        SAFE_KEYS = [
-            "Interest/Pleasure", "Feeling Down", "Sleep Issues", "Fatigue",
-            "Appetite", "Self-Worth", "Concentration", "Psychomotor", "Suicidal Ideation"
-        ]
-        safe_symptoms = {k: symptoms.get(k, 0) for k in SAFE_KEYS}
-        
-        patient_for_charts = {
-            "symptoms": safe_symptoms, 
-            "totalScore": sum(symptoms.values()), 
-            "gender": patient.get("gender") if patient else "Female"
-        }
-    else:
-        patient_for_charts = None
-        
-    symptom_fig = create_symptom_chart(patient_for_charts)
-    radar_fig = create_radar_chart(patient_for_charts)
-    pop_fig = create_population_chart(patient_for_charts)
-    gender_fig = create_gender_chart(patient_for_charts)
-    
-    # 6. External Stressors
+def get_patient_for_charts(state):
+    """Ensure patient object has 'totalScore', defaulting missing keys to 0 for radar chart safety."""
+    symptoms = state.get("symptoms", {}) if state else {}
+    if not symptoms:
+        return None
+    patient = state.get("patient")
+    return {
+        "symptoms": {k: symptoms.get(k, 0) for k in SAFE_KEYS},
+        "totalScore": sum(symptoms.values()),
+        "gender": patient.get("gender") if patient else "Female",
+        "age": patient.get("age") if patient else None
+    }
+
+def build_external_factors(state):
     ext_factors = state.get("external_factors", {}) if state else {}
-    if ext_factors:
-        ext_md = "### External Stressor Profile\n"
-        for factor, value in ext_factors.items():
-            level = ["Good", "Average", "Bad", "Worst"][value] if value < 4 else "Unknown"
-            color = "green" if value == 0 else "orange" if value == 1 else "red"
-            ext_md += f"<span style='color:{color}'>**{factor}**: {level} (Level {value})</span><br>"
-    else:
-        ext_md = "### External Stressor Profile\nWaiting for data..."
-
-    # 7. Action Items
-    if symptoms:
-        # Re-calc risk for action items
-        total_score = sum(symptoms.values())
-        risk_obj = get_risk_level(total_score, symptoms.get("Suicidal Ideation", 0))
-        act_md = f"### Clinical Action Items\n- **{risk_obj['level']} Risk Plan**: {risk_obj['action']}\n- Review suicidal ideation response in detail.\n- Schedule follow-up."
-    else:
-        act_md = "### Clinical Action Items\nWaiting for clinical data..."
-    
-    return live_emo_chart, live_risk, header_md, score_md, symptom_fig, radar_fig, pop_fig, gender_fig, ext_md, act_md
+    if not ext_factors:
+        return "### External Stressor Profile\nWaiting for data..."
+    ext_md = "### External Stressor Profile\n"
+    for factor, value in ext_factors.items():
+        level = ["Good", "Average", "Bad", "Worst"][value] if value < 4 else "Unknown"
+        color = "green" if value == 0 else "orange" if value == 1 else "red"
+        ext_md += f"<span style='color:{color}'>**{factor}**: {level} (Level {value})</span><br>"
+    return ext_md
+
+def build_action_items(state):
+    symptoms = state.get("symptoms", {}) if state else {}
+    if not symptoms:
+        return "### Clinical Action Items\nWaiting for clinical data..."
+    total_score = sum(symptoms.values())
+    risk_obj = get_risk_level(total_score, symptoms.get("Suicidal Ideation", 0))
+    return f"### Clinical Action Items\n- **{risk_obj['level']} Risk Plan**: {risk_obj['action']}\n- Review suicidal ideation response in detail.\n- Schedule follow-up."
+
+def build_percentiles(state):
+    """Percentile ranks of the patient's total, items and stressors within their age/gender cohort."""
+    symptoms = state.get("symptoms", {}) if state else {}
+    factors = state.get("external_factors", {}) if state else {}
+    if not symptoms and not factors:
+        return "### Population Percentiles\nWaiting for data..."
+    patient = state.get("patient") or {}
+    values = dict(symptoms)
+    if len(symptoms) == len(SAFE_KEYS):
+        values["Total"] = sum(symptoms.values())
+    values.update(factors)
+    ranks = get_population_cube().patient_percentiles(values, patient.get("age"), patient.get("gender"))
+
+    md = "### Population Percentiles\n"
+    for measure in ["Total"] + SAFE_KEYS + list(factors):
+        rank = ranks.get(measure)
+        if not rank or rank["percentile"] is None:
+            continue
+        cohort = f"{rank['gender']}, age {rank['age_band']}"
+        md += f"- **{measure}**: {values[measure]} → percentile {rank['percentile']:.0f} ({cohort})\n"
+    return md
+
+def _percentiles_key(state):
+    patient = (state.get("patient") or {}) if state else {}
+    return (_symptoms_key(state), tuple(sorted((state or {}).get("external_factors", {}).items())),
+            patient.get("age"), patient.get("gender"), get_population_cube().version)
+
+def _top_emotions_key(state):
+    emotions = state.get("top_emotions", {}) if state else {}
+    return tuple(sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:3])
+
+def _alerts_key(state):
+    risk = state.get("suicide_risk", {}) if state else {}
+    return risk.get("alert_count", len(risk.get("alerts", [])))
+
+def _patient_key(state):
+    patient = state.get("patient") if state else None
+    return tuple(sorted(patient.items())) if patient else None
+
+def _symptoms_key(state):
+    symptoms = state.get("symptoms", {}) if state else {}
+    return tuple(sorted(symptoms.items()))
+
+def _charts_key(state):
+    charts_patient = get_patient_for_charts(state)
+    if charts_patient is None:
+        return None
+    return (tuple(charts_patient["symptoms"].values()), charts_patient["totalScore"], charts_patient["gender"], charts_patient["age"])
+
+def _chart(builder, key_fn):
+    """Renderer for a chart component, served from the figure cache."""
+    def render(state):
+        patient = get_patient_for_charts(state)
+        return cached_figure(builder, patient, key_fn(patient) if patient else None)
+    return render
+
+# One entry per dashboard output, in output order: (inputs it depends on, how to render it).
+# Streaming compares the inputs between versions and only re-renders components whose inputs changed.
+DASHBOARD_COMPONENTS = [
+    ("live_emotions", _top_emotions_key, lambda s: cached_figure(create_live_emotion_chart, s, _top_emotions_key(s))),
+    ("live_alerts", _alerts_key, check_live_alerts),
+    ("conversation_risk", _conversation_risk_key, build_conversation_risk),
+    ("timeline", _timeline_key, lambda s: cached_figure(create_timeline_chart, s, _timeline_key(s))),
+    ("header", _patient_key, build_header),
+    ("score", _symptoms_key, build_score),
+    ("symptom_chart", _charts_key, _chart(create_symptom_chart, lambda p: (tuple(p["symptoms"].values()), p["age"], p["gender"]))),
+    ("radar_chart", _charts_key, _chart(create_radar_chart, lambda p: (tuple(p["symptoms"].values()), p["age"], p["gender"]))),
+    ("population_chart", _charts_key, _chart(create_population_chart, lambda p: p["totalScore"])),
+    ("gender_chart", _charts_key, _chart(create_gender_chart, lambda p: p["gender"])),
+    ("external_factors", lambda s: tuple(sorted((s or {}).get("external_factors", {}).items())), build_external_factors),
+    ("action_items", _symptoms_key, build_action_items),
+    ("percentiles", _percentiles_key, build_percentiles),
+]
+
+def update_dashboard(state=None):
+    """Render every live component from the shared state (latest session if not given)."""
+    if state is None:
+        state = get_dashboard_state()
+    return tuple(render(state) for _, _, render in DASHBOARD_COMPONENTS)
+
+def render_changed_components(state, previous_inputs):
+    """
+    Render only the components whose inputs differ from `previous_inputs`
+    (updated in place); unchanged components get a no-op gr.update().
+    """
+    outputs = []
+    for name, inputs_fn, render in DASHBOARD_COMPONENTS:
+        inputs = inputs_fn(state)
+        if name in previous_inputs and previous_inputs[name] == inputs:
+            outputs.append(gr.update())
+        else:
+            previous_inputs[name] = inputs
+            outputs.append(render(state))
+    return tuple(outputs)
+
+# Alert bus subscriber "dashboard": an alert counts as delivered once it is handed to
+# at least one open dashboard tab. With no tab open the alerts stay pending, and a tab that
+# opens resumes delivery, so the alert pops up as soon as a clinician opens the dashboard.
+_alert_streams = set() # callbacks, one per open tab
+_alert_streams_lock = threading.Lock()
+
+def dashboard_alert_sink(alerts):
+    with _alert_streams_lock:
+        streams = list(_alert_streams)
+    if not streams:
+        from src.alert_bus import SubscriberUnavailable
+        raise SubscriberUnavailable("No dashboard open")
+    for push in streams:
+        push(alerts)
+
+def _alert_toast(alert):
+    payload = alert["payload"]
+    patient = payload.get("patient") or {}
+    who = patient.get("name") or alert["session_id"]
+    label = f" ({payload['label']})" if payload.get("label") else ""
+    return f"Risk alert for {who}{label}: {payload.get('message', 'Suicidal language detected')}"
+
+async def stream_dashboard(request: gr.Request = None):
+    """
+    Push updates to one open dashboard tab.
+    Waits on shared-state change notifications instead of polling, so an idle dashboard
+    does no work; a change is rendered as soon as it is committed.
+    Follows the session given as `?session=<id>` (from the overview), else the latest one.
+    """
+    session_id = request.query_params.get("session") if request else None
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    unsubscribe = subscribe(lambda _session, _version: loop.call_soon_threadsafe(changed.set))
+    new_alerts = []
+
+    def push_alerts(alerts):
+        loop.call_soon_threadsafe(lambda: (new_alerts.extend(alerts), changed.set()))
+
+    with _alert_streams_lock:
+        _alert_streams.add(push_alerts)
+    from src.alert_bus import resume_subscriber
+    resume_subscriber("dashboard")
+    previous_inputs = {}
+    last_version = None
+    try:
+        while True:
+            version = get_version(session_id)
+            if new_alerts:
+                for alert in new_alerts:
+                    gr.Warning(_alert_toast(alert))
+                new_alerts.clear()
+                if version == last_version:
+                    # Flush the toasts; nothing else changed
+                    yield tuple(gr.update() for _ in DASHBOARD_COMPONENTS)
+            if version != last_version:
+                last_version = version
+                yield render_changed_components(get_dashboard_state(session_id), previous_inputs)
+            await _wait_for_change(changed)
+    finally:
+        with _alert_streams_lock:
+            _alert_streams.discard(push_alerts)
+        unsubscribe()
 
 def create_dashboard():
+    from src.alert_bus import register_subscriber
+    register_subscriber("dashboard", dashboard_alert_sink)
+
     with gr.Blocks(theme=gr.themes.Soft(), title="Clinical Dashboard") as demo:
         # Header
         with gr.Row():
@@ -391,6 +659,8 @@ def create_dashboard():
             with gr.Row():
                 live_emo_plot = gr.Plot(label="Live Emotions")
                 live_alerts = gr.Markdown(label="Live Alerts")
+                risk_md = gr.Markdown("### Conversation Risk\nWaiting for data...")
+            timeline_plot = gr.Plot(label="Session Timeline")
 
         # Charts Row 1
         with gr.Row():
@@ -416,17 +686,189 @@ def create_dashboard():
             with gr.Column():
                 act_md = gr.Markdown("### Clinical Action Items\nWaiting for data...")
 
-        # Timer for polling
-        timer = gr.Timer(value=2) # Update every 2 seconds
-        
-        # Update everything
-        timer.tick(
-            update_dashboard, 
-            outputs=[live_emo_plot, live_alerts, header, score_display, symptom_plot, radar_plot, pop_plot, gender_plot, ext_md, act_md]
+            with gr.Column():
+                percentile_md = gr.Markdown("### Population Percentiles\nWaiting for data...")
+
+        # Push updates: one long-lived stream per open tab, woken by state changes.
+        # concurrency_limit=None so open tabs don't queue behind each other.
+        demo.load(
+            stream_dashboard,
+            outputs=[live_emo_plot, live_alerts, risk_md, timeline_plot, header, score_display, symptom_plot, radar_plot, pop_plot, gender_plot, ext_md, act_md, percentile_md],
+            concurrency_limit=None
         )
                             
     return demo
 
+OVERVIEW_PAGE_SIZE = 25
+OVERVIEW_COLUMNS = ["Risk", "Patient", "Name", "PHQ-9 Total", "Items", "Alerts", "Last Alert", "Last Update", "Session"]
+
+def _format_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)) if ts else "-"
+
+def build_overview_stats():
+    stats = get_overview_stats()
+    counts = " | ".join(
+        f"<span style='color:{RISK_COLORS[level]}'>**{level}**: {stats['risk_counts'].get(level, 0)}</span>"
+        for level in reversed(RISK_LEVELS)
+    )
+    from src.alert_bus import get_alert_metrics
+    delivery = " | ".join(
+        (f"{name}: p95 {m['p95']:.2f}s, {m['pending']} pending" if m["p95"] is not None else f"{name}: {m['pending']} pending")
+        + (f", {m['expired']} expired" if m["expired"] else "")
+        for name, m in get_alert_metrics().items()
+    )
+    return (
+        f"### Sessions: {stats['sessions']}\n{counts}\n\n**Alerts in the last hour:** {stats['alerts_last_hour']}"
+        + (f"\n\n**Alert delivery:** {delivery}" if delivery else "")
+        + f"\n\n{build_queue_waits()}"
+    )
+
+def build_queue_waits():
+    """p95 queue wait per priority class for LLM calls and background analysis."""
+    from utils.scheduler import get_scheduler_metrics
+    lines = []
+    for queue_name, classes in get_scheduler_metrics().items():
+        parts = [
+            f"{name} {m['p95_wait'] * 1000:.0f}ms ({m['served']} served, {m['shed']} shed)" if m["p95_wait"] is not None
+            else f"{name} - ({m['shed']} shed)"
+            for name, m in classes.items()
+        ]
+        lines.append(f"**{queue_name.upper()} queue wait p95:** " + " | ".join(parts))
+    return "<br>".join(lines)
+
+def build_overview_table(risk_filter, search, page):
+    """One page of the triage table; filtering, sorting and paging happen in SQL."""
+    page = max(int(page or 1), 1)
+    rows, total = query_sessions(
+        risk_level=None if risk_filter in (None, "All") else risk_filter,
+        search=(search or "").strip() or None,
+        page=page - 1,
+        page_size=OVERVIEW_PAGE_SIZE
+    )
+    table = [[
+        row["risk_level"],
+        row["patient_id"] or "-",
+        row["patient_name"] or "-",
+        row["total_score"],
+        f"{row['items_answered']}/9",
+        row["alert_count"],
+        _format_time(row["last_alert_at"]),
+        _format_time(row["last_updated"]),
+        f"[{row['session_id']}](/dashboard?session={row['session_id']})",
+    ] for row in rows]
+    pages = max((total + OVERVIEW_PAGE_SIZE - 1) // OVERVIEW_PAGE_SIZE, 1)
+    return table, f"Page {min(page, pages)} of {pages} ({total} sessions)"
+
+def refresh_overview(risk_filter, search, page):
+    return (build_overview_stats(), *build_overview_table(risk_filter, search, page))
+
+async def stream_overview():
+    """
+    Yield the state version whenever some session changes (the latest-updated session carries
+    the highest version). The overview re-queries on each one, with the filters current then.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    unsubscribe = subscribe(lambda _session, _version: loop.call_soon_threadsafe(changed.set))
+    last_version = None
+    try:
+        while True:
+            version = get_version()
+            if version != last_version:
+                last_version = version
+                yield version
+            await _wait_for_change(changed)
+    finally:
+        unsubscribe()
+
+def create_overview():
+    """Clinician triage view over all sessions, highest risk first."""
+    with gr.Blocks(theme=gr.themes.Soft(), title="Clinician Overview") as demo:
+        gr.Markdown("# Clinician Overview")
+        stats_md = gr.Markdown("### Sessions: --")
+        with gr.Row():
+            risk_filter = gr.Dropdown(["All"] + list(reversed(RISK_LEVELS)), value="All", label="Risk Level")
+            search = gr.Textbox(label="Search (patient ID, name or session)")
+            page = gr.Number(value=1, minimum=1, precision=0, label="Page")
+        page_info = gr.Markdown()
+        table = gr.Dataframe(
+            headers=OVERVIEW_COLUMNS,
+            datatype=["str", "str", "str", "number", "str", "number", "str", "str", "markdown"],
+            interactive=False,
+            wrap=True
+        )
+        version = gr.Number(visible=False)
+
+        inputs = [risk_filter, search, page]
+        outputs = [stats_md, table, page_info]
+        for control in (risk_filter, page):
+            control.change(refresh_overview, inputs=inputs, outputs=outputs)
+        search.submit(refresh_overview, inputs=inputs, outputs=outputs)
+        # The first version yielded renders the table; later ones refresh it when a session changes
+        version.change(refresh_overview, inputs=inputs, outputs=outputs, show_progress="hidden")
+        demo.load(stream_overview, outputs=[version], concurrency_limit=None)
+    return demo
+
+PERFORMANCE_REFRESH_SECONDS = 5.0
+PERFORMANCE_COLUMNS = ["Span", "Count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"]
+RECENT_TURN_COLUMNS = ["Time", "Session", "Turn", "Total (ms)", "Slowest node"]
+
+def _span_order(name):
+    # Whole turns first, then graph steps, then everything they call
+    return (0 if name == "turn" else 1 if name.startswith("node:") or name == "route_entry" else 2, name)
+
+def build_performance_tables():
+    """Per-span latency percentiles and the latest traced turns (see src/utils/tracing.py)."""
+    from utils.tracing import get_trace_stats
+    stats = get_trace_stats()
+    spans = [[
+        name, m["count"], round(m["p50"] * 1000, 1), round(m["p95"] * 1000, 1),
+        round(m["p99"] * 1000, 1), round(m["max"] * 1000, 1)
+    ] for name, m in sorted(stats["spans"].items(), key=lambda kv: _span_order(kv[0]))]
+    turns = [[
+        time.strftime("%H:%M:%S", time.localtime(t["ts"])), t["session"], t["turn"], round(t["ms"]), t["slowest"]
+    ] for t in stats["recent_turns"]]
+    rate = stats["sample_rate"]
+    header = (
+        f"**Sampling:** {rate:.0%} of turns" if rate > 0
+        else "**Sampling is off** (TRACE_SAMPLE_RATE = 0); showing spans already in the trace log."
+    )
+    return header, spans, turns
+
+def build_cache_stats():
+    """Guideline search paths and cache hit rate, FAQ outcomes and queue waits, for this process."""
+    from utils.retriever import get_retriever
+    from utils import faq
+    retrieval = get_retriever().metrics()
+    cache = retrieval["cache"]
+    paths = ", ".join(f"{path} {count}" for path, count in retrieval["paths"].items()) or "none yet"
+    hit_rate = f"{cache['hit_rate']:.0%}" if cache["hit_rate"] is not None else "-"
+    lines = [f"**Guideline search:** {paths} | cache hit rate {hit_rate} ({cache['entries']} cached)"]
+    # Only report the FAQ if something already loaded it; loading it here would pull in the embedding model
+    if faq._index is not None:
+        lines.append("**FAQ:** " + ", ".join(f"{k} {v}" for k, v in faq._index.stats.items()))
+    return "<br>".join(lines) + "<br>" + build_queue_waits()
+
+def refresh_performance():
+    header, spans, turns = build_performance_tables()
+    return header, spans, turns, build_cache_stats()
+
+def create_performance():
+    """Where turns spend their time: latency percentiles per node, LLM call, inference and state I/O."""
+    with gr.Blocks(theme=gr.themes.Soft(), title="Performance") as demo:
+        gr.Markdown("# Performance")
+        header_md = gr.Markdown()
+        gr.Markdown("### Latency by span")
+        spans_table = gr.Dataframe(headers=PERFORMANCE_COLUMNS, interactive=False)
+        gr.Markdown("### Recent turns")
+        turns_table = gr.Dataframe(headers=RECENT_TURN_COLUMNS, interactive=False)
+        cache_md = gr.Markdown()
+
+        outputs = [header_md, spans_table, turns_table, cache_md]
+        demo.load(refresh_performance, outputs=outputs)
+        gr.Timer(PERFORMANCE_REFRESH_SECONDS).tick(refresh_performance, outputs=outputs, show_progress="hidden")
+    return demo
+
 if __name__ == "__main__":
     demo = create_dashboard()
     demo.launch(server_name="0.0.0.0", server_port=7861)
@@ -1,16 +1,26 @@
-import gradio as gr
 import sys
 import os
-from langchain_core.messages import HumanMessage, AIMessage
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    # Profile a fresh boot in a child process before importing anything heavy here
+    from utils.startup_profile import profile_startup
+    sys.exit(profile_startup(os.path.abspath(__file__)))
+
+import uuid
+import gradio as gr
+from langchain_core.messages import HumanMessage, AIMessage
+
 from src.graph import create_graph
-from src.dashboard_app import create_dashboard
+from src.dashboard_app import create_dashboard, create_overview, create_performance
+from utils.checkpoint import session_config, has_session
+from utils.startup_profile import phase
 
 # Initialize graph
-graph = create_graph()
+with phase("graph + checkpointer"):
+    graph = create_graph()
 
 
 def init_state():
@@ -24,37 +34,62 @@ def init_state():
         "financial_distress": "",
         "study_pressure": "",
         "permission_granted": False,
-        "language": "English"
+        "language": "English",
+        "session_id": "",
+        "risk_profile": {},
+        "last_risk": {}
     }
 
-def chat_logic(message, history, state):
+def new_session(initial_state=None):
+    """
+    Create a session handle for gr.State.
+    The conversation itself lives in the graph checkpointer under `session_id`;
+    `initial_state` is only sent to the graph on the first turn.
+    """
+    initial_state = initial_state or init_state()
+    if not initial_state.get("session_id"):
+        initial_state["session_id"] = f"S-{uuid.uuid4().hex}"
+    return {"session_id": initial_state["session_id"], "initial_state": initial_state}
+
+def chat_logic(message, history, session):
     """
     Core chat logic to be used by Gradio and tests.
     
     Args:
         message (str): The user's message.
         history (list): Chat history (unused by graph, but provided by Gradio).
-        state (dict): The current conversation state.
+        session (dict): Session handle from new_session().
         
     Returns:
-        tuple: (response_message, updated_state)
+        tuple: (response_message, updated_session)
     """
-    if state is None:
-        state = init_state()
+    if session is None:
+        session = new_session()
+    session_id = session["session_id"]
         
-    # Append user message to state
-    state["messages"].append(HumanMessage(content=message))
+    # Only the new message is sent; the checkpointer restores the rest of the state
+    turn_input = {"messages": [HumanMessage(content=message)]}
+    if not has_session(session_id, graph.checkpointer):
+        initial_state = session.get("initial_state") or new_session()["initial_state"]
+        initial_state["session_id"] = session_id
+        turn_input = {**initial_state, "messages": initial_state["messages"] + turn_input["messages"]}
     
     # Run the graph
     # The graph is designed to run until it hits a node that goes to END.
-    # We invoke it with the current state.
-    # Run the graph
-    # The graph is designed to run until it hits a node that goes to END.
-    # We invoke it with the current state.
-    result = graph.invoke(state)
-    
-    # Update state with result
-    state = result
+    # Checkpoint once at the end of the turn rather than after every node.
+    # LLM calls made during the turn are scheduled by this session's priority.
+    # Sampled turns are traced end to end (utils/tracing.py).
+    from utils.scheduler import (
+        session_context, get_session_priority, clear_session_priority, get_analysis_queue, SchedulerOverloaded
+    )
+    from utils import tracing
+    try:
+        with session_context(session_id), tracing.turn(session_id):
+            state = graph.invoke(turn_input, session_config(session_id), durability="exit")
+    except SchedulerOverloaded:
+        # Load shedding (never applied to high-risk sessions)
+        return "I'm receiving a lot of messages right now. Please send that again in a moment.", {"session_id": session_id}
+    session = {"session_id": session_id}
     
     # Get the last AI message
     response = ""
@@ -65,42 +100,64 @@ def chat_logic(message, history, state):
         response = state["messages"][-1].content
 
     # --- Background Analysis for Dashboard ---
-    import threading
-    from src.shared_state import update_emotion, update_suicide_risk
-    from src.utils.pipelines import detect_emotion, detect_suicidal_language
+    from src.shared_state import update_emotion, update_suicide_risk, record_turn_analysis
+    from utils.pipelines import analyze_emotions
+
+    # The graph's risk monitor already scored this message; reuse it instead of running the model again
+    last_risk = state.get("last_risk") or {}
+    risk_profile = state.get("risk_profile") or {}
     
-    def run_analysis(msg):
+    def run_analysis(session_id, msg):
         try:
             # Ensure msg is a string
             if isinstance(msg, list):
                 msg = " ".join(str(x) for x in msg)
             
             # Detect Emotion
-            emo = detect_emotion(msg)
-            update_emotion(emo)
+            emotions = analyze_emotions(msg)
+            top = emotions.get("top_emotions") or ["neutral"]
+            update_emotion(session_id, top[0])
             
-            # Detect Suicide Risk
-            is_risk = detect_suicidal_language(msg)
-            if is_risk:
-                 update_suicide_risk({"alert": True, "text": msg})
+            # Suicide risk: alert on a high-risk message, or when the conversation as a whole escalated this turn
+            record_turn_analysis(session_id, emotions.get("all_scores", {}), last_risk.get("probabilities", {}), risk_profile)
+            if last_risk.get("alert") or last_risk.get("escalated"):
+                 update_suicide_risk(session_id, {
+                     "alert": True, "text": msg, "label": last_risk.get("label"),
+                     "conversation_score": round(risk_profile.get("score", 0.0), 3)
+                 })
         except Exception as e:
             print(f"Background analysis failed: {e}")
 
-    # Fire and forget thread (if pipelines are NOT disabled)
+    # Queue for the analysis workers, high-risk sessions first (if pipelines are NOT disabled)
     if os.environ.get("DISABLE_PIPELINES"):
         print("[System] Pipelines disabled by configuration. Background analysis skipped.")
-    else:
-        threading.Thread(target=run_analysis, args=(message,), daemon=True).start()
+    elif not get_analysis_queue().submit(run_analysis, session_id, message, priority=get_session_priority(session_id)):
+        print(f"[System] Analysis queue full; skipped dashboard analysis for {session_id}.")
+    if state.get("phase") == "end":
+        clear_session_priority(session_id)
         
-    return response, state
+    return response, session
 
-def gradio_chat(message, history, state):
+def gradio_chat(message, history, session):
     """Wrapper for Gradio chat interface."""
-    response, new_state = chat_logic(message, history, state)
-    return response, new_state
+    response, new_session_state = chat_logic(message, history, session)
+    return response, new_session_state
 
 def create_demo():
-    with gr.Blocks() as demo:
+    from src.alert_bus import register_default_subscribers
+    from utils.retriever import warm_up_in_background
+    from utils import faq
+    with phase("alert subscribers"):
+        register_default_subscribers()
+    # Embedding model and FAQ load in background threads
+    with phase("start warm-up threads"):
+        warm_up_in_background()
+        faq.warm_up_in_background()
+    # Same module name as the advice node uses, so the loaded graph is shared
+    from utils.knowledge_graph import get_knowledge_graph
+    with phase("knowledge graph"):
+        get_knowledge_graph()
+    with phase("chat UI"), gr.Blocks() as demo:
         # === Login Section ===
         with gr.Column(visible=True) as login_view:
             gr.Markdown("# Welcome to the PHQ-9 Assessment\nPlease enter your details to begin.")
@@ -117,7 +174,7 @@ def create_demo():
         with gr.Column(visible=False) as chat_view:
             gr.Markdown("# PHQ-9 Chatbot")
             
-            state = gr.State(init_state())
+            state = gr.State(None)
             
             chatbot = gr.Chatbot()
             msg = gr.Textbox(placeholder="Type your message here...")
@@ -145,12 +202,12 @@ def create_demo():
         # === Login Logic ===
         def start_session(name, age, gender, language):
             if not name.strip():
-                return gr.update(visible=True), gr.update(visible=True), gr.update(visible=False), init_state(), []           
-            # 1. Update Dashboard Shared State
-            from src.shared_state import update_patient_data, clear_state
+                return gr.update(visible=True), gr.update(visible=True), gr.update(visible=False), None, []           
+            # 1. Update Dashboard Shared State (keyed by this session; other sessions are untouched)
+            from src.shared_state import update_patient_data
             
-            # Clear previous session data
-            clear_state()
+            new_state = init_state()
+            session = new_session(new_state)
             
             import random
             patient_id = f"P-{random.randint(1000, 9999)}"
@@ -160,10 +217,9 @@ def create_demo():
                 "age": age,
                 "gender": gender
             }
-            update_patient_data(patient_data)
+            update_patient_data(session["session_id"], patient_data)
             
             # 2. Initialize Chat State with Name
-            new_state = init_state()
             new_state["patient_info"] = name # Store name for rapport
             new_state["language"] = language
             
@@ -187,7 +243,7 @@ I won't judge you — I will listen, understand, and stand by you 💙"""
             initial_history = [{"role": "assistant", "content": welcome_msg}]
             
             # 3. Switch Views
-            return gr.update(visible=False), gr.update(visible=False), gr.update(visible=True), new_state, initial_history
+            return gr.update(visible=False), gr.update(visible=False), gr.update(visible=True), session, initial_history
 
         start_btn.click(
             start_session,
@@ -196,12 +252,28 @@ I won't judge you — I will listen, understand, and stand by you 💙"""
         )
 
 
-    dashboard_blocks = create_dashboard()
-    with demo.route("Dashboard", "/dashboard"):
-        dashboard_blocks.render()
+    with phase("dashboard UI"):
+        dashboard_blocks = create_dashboard()
+        with demo.route("Dashboard", "/dashboard"):
+            dashboard_blocks.render()
+
+    with phase("overview UI"):
+        overview_blocks = create_overview()
+        with demo.route("Overview", "/overview"):
+            overview_blocks.render()
+
+    with phase("performance UI"):
+        performance_blocks = create_performance()
+        with demo.route("Performance", "/performance"):
+            performance_blocks.render()
         
     return demo
 
 if __name__ == "__main__":
     demo = create_demo()
+    from utils.startup_profile import enabled, report_phases
+    if enabled():
+        # Child of --profile-startup: stop once everything is built
+        report_phases()
+        sys.exit(0)
     demo.launch(server_name="0.0.0.0", server_port=7860)
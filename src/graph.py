@@ -7,23 +7,40 @@ from nodes.additional import additional_node
 from nodes.advice import advice_node
 from nodes.end import end_node
 from nodes.summarizer import summarize_node
+from nodes.risk_monitor import risk_monitor_node
+from nodes.crisis import crisis_node
+from utils.risk import needs_crisis_response
+from utils.checkpoint import get_checkpointer
+from utils.tracing import traced
 
-def create_graph():
+def create_graph(checkpointer=None):
+    """
+    Build the conversation graph. State is persisted per session by the SQLite
+    checkpointer, so callers invoke it with only the new message and a thread_id config.
+    """
     workflow = StateGraph(AgentState)
     
-    # Add nodes
-    workflow.add_node("rapport", rapport_node)
-    workflow.add_node("permission", permission_node)
-    workflow.add_node("questionnaire", questionnaire_node)
-    workflow.add_node("additional", additional_node)
-    workflow.add_node("advice", advice_node)
-    workflow.add_node("end_node", end_node)
-    workflow.add_node("summarize_conversation", summarize_node)
+    # Add nodes (each runs in a tracing span, see utils/tracing.py)
+    workflow.add_node("rapport", traced("node:rapport", rapport_node))
+    workflow.add_node("permission", traced("node:permission", permission_node))
+    workflow.add_node("questionnaire", traced("node:questionnaire", questionnaire_node))
+    workflow.add_node("additional", traced("node:additional", additional_node))
+    workflow.add_node("advice", traced("node:advice", advice_node))
+    workflow.add_node("end_node", traced("node:end_node", end_node))
+    workflow.add_node("summarize_conversation", traced("node:summarize_conversation", summarize_node))
+    workflow.add_node("risk_monitor", traced("node:risk_monitor", risk_monitor_node))
+    workflow.add_node("crisis", traced("node:crisis", crisis_node))
     
-    # Conditional Entry Point
+    # Every turn starts by updating the conversation-level risk profile,
+    # then routes on it (crisis path) or on the phase
+    workflow.set_entry_point("risk_monitor")
+
     def route_entry(state):
         phase = state.get("phase", "rapport")
         messages = state.get("messages", [])
+
+        if needs_crisis_response(state.get("risk_profile")):
+            return "crisis"
         
         # Check for summarization trigger (Reasonably larger threshold > 20)
         # We also avoid summarizing if we are already in 'summarize' phase (to prevent loops)
@@ -34,9 +51,11 @@ def create_graph():
              
         return phase
 
-    workflow.set_conditional_entry_point(
-        route_entry,
+    workflow.add_conditional_edges(
+        "risk_monitor",
+        traced("route_entry", route_entry),
         {
+            "crisis": "crisis",
             "rapport": "rapport",
             "permission": "permission",
             "questionnaire": "questionnaire",
@@ -69,6 +88,7 @@ def create_graph():
     # workflow.add_edge("additional", END) # REMOVED: Now conditional
     workflow.add_edge("advice", END)
     workflow.add_edge("end_node", END)
+    workflow.add_edge("crisis", END)
     
     workflow.add_conditional_edges(
         "additional",
@@ -96,4 +116,6 @@ def create_graph():
         }
     )
     
-    return workflow.compile()
+    if checkpointer is None:
+        checkpointer = get_checkpointer()
+    return workflow.compile(checkpointer=checkpointer)
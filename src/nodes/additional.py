@@ -2,6 +2,22 @@ from state import AgentState
 from utils.llm import get_llm
 from langchain_core.messages import AIMessage
 
+def record_completed_assessment(state: AgentState):
+    """Fold this patient's PHQ-9 items and stressors into the population benchmarks."""
+    try:
+        from src.shared_state import get_dashboard_state
+        from utils.population_stats import add_completed_session, PHQ9_ITEM_KEYS
+        dashboard = get_dashboard_state(state.get("session_id", "")) or {}
+        patient = dashboard.get("patient") or {}
+        responses = state.get("phq9_responses", {})
+        values = {PHQ9_ITEM_KEYS[idx]: score for idx, score in responses.items() if idx < len(PHQ9_ITEM_KEYS)}
+        if len(values) == len(PHQ9_ITEM_KEYS):
+            values["Total"] = sum(values.values())
+        values.update(dashboard.get("external_factors", {}))
+        add_completed_session(patient.get("age"), patient.get("gender"), values)
+    except Exception as e:
+        print(f"Could not update population benchmarks: {e}")
+
 def additional_node(state: AgentState):
     """
     Node for asking about financial distress and study pressure.
@@ -17,7 +33,7 @@ def additional_node(state: AgentState):
         if messages and messages[-1].type == 'human' and state.get('phase') == 'additional_financial':
              # Store answer
              # Store answer
-             from src.utils.message_utils import get_message_text
+             from utils.message_utils import get_message_text
              fin_resp = get_message_text(messages[-1])
              language = state.get("language", "English")
              
@@ -30,7 +46,7 @@ def additional_node(state: AgentState):
                  question = "Do you have any study or work-related pressure?"
                  
              from src.shared_state import update_external_factors
-             update_external_factors({"Financial Pressure": score})
+             update_external_factors(state.get("session_id", ""), {"Financial Pressure": score})
              
              return {"financial_distress": fin_resp, "phase": "additional_study", "messages": [AIMessage(content=question)]}
         
@@ -43,7 +59,7 @@ def additional_node(state: AgentState):
          if messages and messages[-1].type == 'human' and state.get('phase') == 'additional_study':
              # Store answer
              # Store answer
-             from src.utils.message_utils import get_message_text
+             from utils.message_utils import get_message_text
              study_resp = get_message_text(messages[-1])
              language = state.get("language", "English")
              
@@ -54,7 +70,8 @@ def additional_node(state: AgentState):
                  score = 2 if "yes" in study_resp.lower() else 0
                  
              from src.shared_state import update_external_factors
-             update_external_factors({"Study Pressure": score})
+             update_external_factors(state.get("session_id", ""), {"Study Pressure": score})
+             record_completed_assessment(state)
              
              return {"study_pressure": study_resp, "phase": "advice"}
          
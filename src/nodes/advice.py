@@ -11,15 +11,18 @@ def advice_node(state: AgentState):
     responses = state.get('phq9_responses', {})
     score = sum(responses.values())
     
-    # Query KG
-    kg_context = query_kg("depression advice")
+    # Query KG with this patient's item scores and the stressors they reported (level 2 = yes)
+    from src.shared_state import get_dashboard_state
+    external_factors = (get_dashboard_state(state.get("session_id", "")) or {}).get("external_factors", {})
+    stressors = [factor for factor, level in external_factors.items() if level >= 2]
+    kg_context = query_kg(responses, stressors)
     
     # Check for exit intent in the last user message
     messages = state['messages']
     last_message = messages[-1] if messages else None
     
     if last_message and last_message.type == 'human':
-        from src.utils.message_utils import get_message_text
+        from utils.message_utils import get_message_text
         text = get_message_text(last_message).lower()
         language = state.get("language", "English")
         
@@ -32,6 +35,14 @@ def advice_node(state: AgentState):
         if any(word in text for word in keywords):
              return {"phase": "end", "messages": [AIMessage(content=farewell_msg)]}
 
+        # Stock questions get a vetted answer without an LLM call; near misses become prompt context
+        from utils.faq import consult_faq
+        faq_answer, faq_context = consult_faq(get_message_text(last_message), language)
+        if faq_answer:
+            return {"messages": [AIMessage(content=faq_answer)], "phase": "advice"}
+        if faq_context:
+            kg_context += f"\n{faq_context}"
+
     language = state.get("language", "English")
     if language == "Malayalam":
         system_prompt = f"""
@@ -0,0 +1,22 @@
+from langchain_core.messages import AIMessage
+from state import AgentState
+
+def crisis_node(state: AgentState):
+    """
+    Node for when the conversation-level risk escalates.
+    Responds with safety resources; the phase is left unchanged so the session can continue afterwards.
+    """
+    language = state.get("language", "English")
+    if language == "Malayalam":
+        msg = ("നിങ്ങൾ ഇപ്പോൾ വളരെ ബുദ്ധിമുട്ടുള്ള അവസ്ഥയിലൂടെയാണ് കടന്നുപോകുന്നതെന്ന് എനിക്ക് മനസ്സിലാകുന്നു. നിങ്ങൾ ഒറ്റയ്ക്കല്ല. "
+               "ദയവായി ഇപ്പോൾ തന്നെ Tele-MANAS (14416 / 1-800-891-4416) എന്ന നമ്പറിൽ വിളിക്കുക, അല്ലെങ്കിൽ നിങ്ങൾ വിശ്വസിക്കുന്ന ഒരാളോട് സംസാരിക്കുക. "
+               "അടിയന്തര സാഹചര്യമാണെങ്കിൽ 112 ൽ വിളിക്കുക. ഞങ്ങളുടെ ക്ലിനിക്കൽ ടീമിനെ അറിയിച്ചിട്ടുണ്ട്.")
+    else:
+        msg = ("I can hear that you're going through something really difficult right now, and you don't have to face it alone. "
+               "Please reach out to Tele-MANAS (14416 or 1-800-891-4416) now, or talk to someone you trust. "
+               "If you are in immediate danger, call 112. Our clinical team has been notified.")
+
+    profile = dict(state.get("risk_profile") or {})
+    profile["notified_level"] = max(profile.get("peak_level", 0), 1)
+    last_risk = {**(state.get("last_risk") or {}), "escalated": True}
+    return {"messages": [AIMessage(content=msg)], "risk_profile": profile, "last_risk": last_risk}
@@ -18,7 +18,7 @@ def permission_node(state: AgentState):
     
     last_message = messages[-1] if messages else None
     if last_message and last_message.type == 'human':
-        from src.utils.message_utils import get_message_text
+        from utils.message_utils import get_message_text
         content = get_message_text(last_message).lower()
         language = state.get("language", "English")
         
@@ -48,7 +48,7 @@ def questionnaire_node(state: AgentState):
     
     # If we have a user response (i.e., not the first time entering), process it
     if messages and messages[-1].type == 'human':
-        from src.utils.message_utils import get_message_text
+        from utils.message_utils import get_message_text
         last_response = get_message_text(messages[-1])
         
         # 1. Check for irrelevance/ambiguity and score
@@ -143,7 +143,7 @@ def questionnaire_node(state: AgentState):
                     if idx < len(DASHBOARD_KEYS):
                         dash_symptoms[DASHBOARD_KEYS[idx]] = score
                 
-                update_symptoms(dash_symptoms)
+                update_symptoms(state.get("session_id", ""), dash_symptoms)
                 # ------------------------
             else:
                 # Invalid/Ambiguous response
@@ -1,8 +1,8 @@
 from langchain_core.messages import HumanMessage, AIMessage
 from state import AgentState
-from src.utils.llm import get_llm
-from src.utils.rag_runner import run_llm_with_rag
-from utils.pipelines import detect_emotion, detect_suicidal_language
+from utils.llm import get_llm
+from utils.rag_runner import run_llm_with_rag
+from utils.pipelines import detect_emotion
 
 def rapport_node(state: AgentState):
     """
@@ -16,12 +16,11 @@ def rapport_node(state: AgentState):
 
     last_message = messages[-1] if messages else None
     
-    # Analyze emotion and suicidal language (dummy)
+    # Analyze emotion (dummy); suicidal language is scored once per turn by risk_monitor_node
     if isinstance(last_message, HumanMessage):
-        from src.utils.message_utils import get_message_text
+        from utils.message_utils import get_message_text
         text_content = get_message_text(last_message)
         emotion = detect_emotion(text_content)
-        is_suicidal = detect_suicidal_language(text_content)
         # In a real app, we'd handle these. For now, just logging or ignoring.
     
     llm = get_llm()
@@ -57,11 +56,19 @@ def rapport_node(state: AgentState):
     # but the actual transition logic might be in the graph edge or a separate router.
     # Here we just generate the response.
     
-    response = run_llm_with_rag(llm, [{"role": "system", "content": system_prompt}] + messages)
-    
     phase = "rapport"
     if len(messages) > 2:
         phase = "permission"
     
+    # Stock questions get a vetted answer without an LLM call; near misses become prompt context
+    from utils.faq import consult_faq
+    faq_answer, faq_context = consult_faq(text_content if isinstance(last_message, HumanMessage) else "", language)
+    if faq_answer:
+        return {"messages": [AIMessage(content=faq_answer)], "phase": phase}
+    if faq_context:
+        system_prompt += f"\n{faq_context}\n"
+    
+    response = run_llm_with_rag(llm, [{"role": "system", "content": system_prompt}] + messages)
+    
     return {"messages": [response], "phase": phase}
 
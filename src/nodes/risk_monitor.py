@@ -0,0 +1,35 @@
+from langchain_core.messages import HumanMessage
+from state import AgentState
+from utils.pipelines import analyze_suicide_risk
+from utils.risk import new_risk_profile, update_risk_profile
+from utils.scheduler import priority_for_state, set_session_priority
+
+def risk_monitor_node(state: AgentState):
+    """
+    Entry node: scores the new user message once and folds its C-SSRS probabilities
+    into the session's conversation-level risk profile (O(1) per turn).
+    """
+    messages = state.get("messages", [])
+    last_message = messages[-1] if messages else None
+    if not isinstance(last_message, HumanMessage):
+        return {}
+
+    from utils.message_utils import get_message_text
+    from config import CSSRS_LABELS
+    result = analyze_suicide_risk(get_message_text(last_message))
+    probabilities = result.get("probabilities", {})
+    vector = [probabilities.get(CSSRS_LABELS[i], 0.0) for i in sorted(CSSRS_LABELS)] if probabilities else []
+
+    profile = state.get("risk_profile") or new_risk_profile(len(CSSRS_LABELS))
+    update = {
+        "risk_profile": update_risk_profile(profile, vector),
+        "last_risk": {
+            "label": result.get("label", "Supportive"),
+            "label_id": result.get("label_id", 0),
+            "alert": result.get("alert", False),
+            "probabilities": probabilities,
+        },
+    }
+    # Takes effect for the rest of this turn's LLM calls
+    set_session_priority(state.get("session_id"), priority_for_state({**state, **update}))
+    return update
@@ -1,139 +1,570 @@
+import copy
 import json
 import os
+import sqlite3
+import threading
 import time
-import fcntl
-from collections import Counter
-
-STATE_FILE = "data/dashboard_state.json"
-
-def init_shared_state():
-    """Initialize the shared state file if it doesn't exist."""
-    current_time = time.time()
-    if not os.path.exists(STATE_FILE):
-        state = {
-            "patient": None, # Will store {name, age, gender, id}
-            "symptoms": {},  # Will store {Question: Score}
-            "external_factors": {}, # {Factor: Level}
-            "top_emotions": {},
-            "suicide_risk": {
-                "label": "Supportive",
-                "score": 0,
-                "alerts": []
-            },
-            "last_updated": current_time,
-            "message_count": 0
-        }
-        _write_state(state)
+from collections import deque
+from utils.risk import get_risk_level, get_risk_rank, RISK_LEVELS, update_risk_profile
+
+STATE_DB = "data/dashboard_state.sqlite"
+
+# Take a compacted snapshot of a session's aggregate every N events,
+# so loading a session replays at most N events.
+SNAPSHOT_EVERY = 50
+
+# Only the most recent alerts are kept in the aggregate; the full history stays in the event log.
+ALERT_WINDOW = 20
+
+# Event kinds appended to the log
+PATIENT_SET = "patient_set"
+SYMPTOM_SCORED = "symptom_scored"
+FACTOR_SET = "factor_set"
+EMOTION_OBSERVED = "emotion_observed"
+ALERT_RAISED = "alert_raised"
+TURN_ANALYZED = "turn_analyzed"
+
+# Writes are small events appended to a log; the aggregate (counters, latest values)
+# lives in memory and is folded forward one event at a time. Everything runs under
+# a single lock, so concurrent sessions never lose updates.
+_sessions = {}
+_owned = set() # sessions written by this process; others are re-read from disk
+_lock = threading.RLock()
+_conn = None
+
+# Change notification: callbacks(session_id, version) run after each committed append.
+# The version of a session is the seq of its last event, so it only ever increases.
+_subscribers = []
+
+# Clinician overview aggregates, maintained incrementally on every append
+# (loaded once from disk on first use): sessions per risk level, and alert
+# timestamps from the last hour.
+ALERT_RECENT_SECONDS = 3600
+_overview = None
+
+# Per-turn emotion/C-SSRS series, kept as numpy arrays outside the JSON aggregate.
+# Each is caught up from the event log incrementally (by seq), so it also follows
+# sessions written by another process.
+_series = {}
+
+
+def _new_state(session_id):
+    return {
+        "session_id": session_id,
+        "patient": None, # Will store {name, age, gender, id}
+        "symptoms": {},  # Will store {Question: Score}
+        "external_factors": {}, # {Factor: Level}
+        "top_emotions": {},
+        "suicide_risk": {
+            "label": "Supportive",
+            "score": 0,
+            "alerts": [],
+            "alert_count": 0
+        },
+        "last_updated": time.time(),
+        "message_count": 0,
+        "turn_count": 0, # turns with a stored emotion/risk vector
+        "risk_profile": None, # conversation-level C-SSRS profile, see utils/risk.py
+        "seq": 0, # last event folded into this state
+        "events_since_snapshot": 0
+    }
+
+
+def _apply(state, kind, payload, ts, seq):
+    """Fold one event into the aggregate. O(1) per event."""
+    if kind == PATIENT_SET:
+        state["patient"] = payload
+    elif kind == SYMPTOM_SCORED:
+        state["symptoms"][payload["symptom"]] = payload["score"]
+    elif kind == FACTOR_SET:
+        state["external_factors"][payload["factor"]] = payload["level"]
+    elif kind == EMOTION_OBSERVED:
+        emotions = state["top_emotions"]
+        emotions[payload["emotion"]] = emotions.get(payload["emotion"], 0) + 1
+        state["message_count"] += 1
+    elif kind == ALERT_RAISED:
+        risk = state["suicide_risk"]
+        risk["alerts"].append({
+            "message": "Suicidal language detected",
+            "timestamp": ts,
+            "details": payload
+        })
+        del risk["alerts"][:-ALERT_WINDOW]
+        risk["alert_count"] = risk.get("alert_count", 0) + 1
+    elif kind == TURN_ANALYZED:
+        state["turn_count"] = state.get("turn_count", 0) + 1
+        if payload.get("risk_profile"):
+            # As computed by the graph's risk monitor, so replay gives the profile the chat acted on
+            state["risk_profile"] = payload["risk_profile"]
+        elif "risk_profile" not in payload and any(payload["cssrs"]):
+            # Written before turns carried the profile
+            state["risk_profile"] = update_risk_profile(state.get("risk_profile"), payload["cssrs"])
+    state["last_updated"] = ts
+    state["seq"] = seq
+    state["events_since_snapshot"] += 1
+
+
+def _get_conn():
+    """Open the backing database once per process (WAL so readers never block the writer)."""
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(STATE_DB), exist_ok=True)
+        conn = sqlite3.connect(STATE_DB, check_same_thread=False, isolation_level=None)
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT
+            );
+            CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, seq);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                session_id TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                state TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                last_updated REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS sessions_by_update ON sessions (last_updated);
+            -- Transactional outbox: an alert row is committed together with its event,
+            -- then delivered to subscribers by src/alert_bus.py
+            CREATE TABLE IF NOT EXISTS alert_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_seq INTEGER NOT NULL,
+                session_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            );
+            """
+        )
+        # Per-session summary columns for the clinician overview (added to older databases too)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        for column, decl in SESSION_SUMMARY_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} {decl}")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_by_triage ON sessions "
+            "(risk_rank DESC, last_alert_at DESC, total_score DESC)"
+        )
+        _conn = conn
+    return _conn
+
+
+SESSION_SUMMARY_COLUMNS = {
+    "patient_id": "TEXT",
+    "patient_name": "TEXT",
+    "total_score": "INTEGER NOT NULL DEFAULT 0",
+    "items_answered": "INTEGER NOT NULL DEFAULT 0",
+    "risk_level": "TEXT NOT NULL DEFAULT 'Mild'",
+    "risk_rank": "INTEGER NOT NULL DEFAULT 0",
+    "alert_count": "INTEGER NOT NULL DEFAULT 0",
+    "last_alert_at": "REAL NOT NULL DEFAULT 0",
+}
+
+
+def _summarize(state):
+    """Triage summary of a session, stored alongside its row in `sessions`."""
+    symptoms = state["symptoms"]
+    total = sum(symptoms.values())
+    risk = get_risk_level(total, symptoms.get("Suicidal Ideation", 0))
+    alerts = state["suicide_risk"]["alerts"]
+    patient = state["patient"] or {}
+    return {
+        "patient_id": patient.get("id"),
+        "patient_name": patient.get("name"),
+        "total_score": total,
+        "items_answered": len(symptoms),
+        "risk_level": risk["level"],
+        "risk_rank": get_risk_rank(risk["level"]),
+        "alert_count": state["suicide_risk"].get("alert_count", len(alerts)),
+        "last_alert_at": alerts[-1]["timestamp"] if alerts else 0,
+    }
 
-def clear_state():
-    """Clear the shared state file."""
-    if os.path.exists(STATE_FILE):
+
+def _read_events(session_id, after_seq=0):
+    return _get_conn().execute(
+        "SELECT seq, ts, kind, payload FROM events WHERE session_id = ? AND seq > ? ORDER BY seq",
+        (session_id, after_seq)
+    ).fetchall()
+
+
+def _load_session(session_id):
+    """Rebuild a session from its latest snapshot plus the events appended after it."""
+    conn = _get_conn()
+    row = conn.execute("SELECT state FROM snapshots WHERE session_id = ?", (session_id,)).fetchone()
+    state = json.loads(row[0]) if row else None
+    events = _read_events(session_id, state["seq"] if state else 0)
+    if state is None:
+        if not events:
+            known = conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if not known:
+                return None
+        state = _new_state(session_id)
+    for seq, ts, kind, payload in events:
+        _apply(state, kind, json.loads(payload), ts, seq)
+    return state
+
+
+def _get_session(session_id, create=True):
+    """Return the live in-memory state for a session. Caller must hold _lock."""
+    state = _sessions.get(session_id)
+    if state is None:
+        state = _load_session(session_id)
+        if state is None:
+            if not create:
+                return None
+            state = _new_state(session_id)
+        _sessions[session_id] = state
+    return state
+
+
+def _snapshot(session_id, state):
+    """Write a compacted snapshot of the aggregate. Caller must hold _lock."""
+    # Reset first so the stored state doesn't carry the count that triggered it
+    state["events_since_snapshot"] = 0
+    _get_conn().execute(
+        "INSERT INTO snapshots (session_id, seq, state) VALUES (?, ?, ?) "
+        "ON CONFLICT(session_id) DO UPDATE SET seq = excluded.seq, state = excluded.state",
+        (session_id, state["seq"], json.dumps(state))
+    )
+
+
+def _append(session_id, events):
+    """Append events to the log and fold them into the in-memory aggregate."""
+    if not events:
+        return
+    from utils.tracing import span
+    with span("state.append", events=len(events)):
+        _write_events(session_id, events)
+
+
+def _write_events(session_id, events):
+    global _overview
+    committed = False
+    with _lock:
+        overview = _get_overview()
+        state = _get_session(session_id)
+        _owned.add(session_id)
+        conn = _get_conn()
+        ts = time.time()
+        previous_level = overview["session_levels"].get(session_id)
         try:
-            os.remove(STATE_FILE)
-        except OSError:
-            pass
+            conn.execute("BEGIN")
+            for kind, payload in events:
+                cur = conn.execute(
+                    "INSERT INTO events (session_id, ts, kind, payload) VALUES (?, ?, ?, ?)",
+                    (session_id, ts, kind, json.dumps(payload))
+                )
+                _apply(state, kind, payload, ts, cur.lastrowid)
+                if kind == ALERT_RAISED:
+                    conn.execute(
+                        "INSERT INTO alert_outbox (event_seq, session_id, created_at, payload) VALUES (?, ?, ?, ?)",
+                        (cur.lastrowid, session_id, ts, json.dumps({"patient": state["patient"], **payload}))
+                    )
+            summary = _summarize(state)
+            columns = list(summary)
+            conn.execute(
+                f"INSERT INTO sessions (session_id, created_at, last_updated, version, {', '.join(columns)}) "
+                f"VALUES (?, ?, ?, ?, {', '.join('?' for _ in columns)}) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_updated = excluded.last_updated, version = excluded.version, "
+                + ", ".join(f"{c} = excluded.{c}" for c in columns),
+                (session_id, ts, ts, state["seq"], *summary.values())
+            )
+            if state["events_since_snapshot"] >= SNAPSHOT_EVERY:
+                _snapshot(session_id, state)
+            conn.execute("COMMIT")
+            committed = True
+            version = state["seq"]
+            _track_overview(overview, session_id, previous_level, summary["risk_level"], events, ts)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Drop whatever is half-applied; it is rebuilt from disk on next access
+            if committed:
+                _overview = None
+            else:
+                _sessions.pop(session_id, None)
+            from src.debug_utils import log_debug
+            log_debug(f"Error appending events for {session_id}: {e}")
+    if committed:
+        _notify(session_id, version)
 
-def update_patient_data(patient_info):
-    """Update patient demographics."""
-    state = _read_state()
-    if not state:
-        init_shared_state()
-        state = _read_state()
-        
-    state["patient"] = patient_info
-    state["last_updated"] = time.time()
-    _write_state(state)
-
-def update_symptoms(symptoms):
-    """Update symptom scores."""
-    state = _read_state()
-    if not state:
-        init_shared_state()
-        state = _read_state()
-    
-    state["symptoms"] = symptoms
-    state["last_updated"] = time.time()
-    _write_state(state)
-
-def update_external_factors(factors):
-    """Update external factors."""
-    state = _read_state()
-    if not state:
-        init_shared_state()
-        state = _read_state()
-        
-    # Merge with existing
-    current = state.get("external_factors", {})
-    current.update(factors)
-    state["external_factors"] = current
-    state["last_updated"] = time.time()
-    _write_state(state)
-
-def _write_state(state):
-    """Write state to file with lock."""
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-    
-    with open(STATE_FILE, "w") as f:
+
+def _notify(session_id, version):
+    for callback in list(_subscribers):
         try:
-            fcntl.flock(f, fcntl.LOCK_EX)
-            json.dump(state, f)
-            fcntl.flock(f, fcntl.LOCK_UN)
+            callback(session_id, version)
         except Exception as e:
             from src.debug_utils import log_debug
-            #log_debug(f"Error writing state: {e}")
-
-def _read_state():
-    """Read state from file with lock."""
-    if not os.path.exists(STATE_FILE):
-        return None
-    try:
-        with open(STATE_FILE, "r") as f:
-            fcntl.flock(f, fcntl.LOCK_SH)
-            state = json.load(f)
-            fcntl.flock(f, fcntl.LOCK_UN)
-            return state
-    except Exception as e:
-        from src.debug_utils import log_debug
-        #log_debug(f"Error reading state: {e}")
-        return None
-
-def update_emotion(emotion):
+            log_debug(f"State subscriber failed: {e}")
+
+
+def subscribe(callback):
+    """
+    Register `callback(session_id, version)` to run whenever a session changes.
+    Returns a function that unsubscribes. Callbacks run on the writer's thread, so keep them cheap.
+    """
+    _subscribers.append(callback)
+    def unsubscribe():
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+    return unsubscribe
+
+
+def get_version(session_id=None):
+    """
+    Monotonic version of a session's state (defaults to the latest session).
+    Returns 0 if the session has no events.
+    """
+    with _lock:
+        if session_id is None:
+            session_id = get_latest_session_id()
+            if session_id is None:
+                return 0
+        if session_id in _owned and session_id in _sessions:
+            return _sessions[session_id]["seq"]
+        row = _get_conn().execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def _get_overview():
+    """Load the overview aggregates once (one scan at startup); afterwards they are updated per event."""
+    global _overview
+    if _overview is None:
+        conn = _get_conn()
+        session_levels = dict(conn.execute("SELECT session_id, risk_level FROM sessions").fetchall())
+        risk_counts = {level: 0 for level in RISK_LEVELS}
+        for level in session_levels.values():
+            risk_counts[level] = risk_counts.get(level, 0) + 1
+        since = time.time() - ALERT_RECENT_SECONDS
+        recent = conn.execute(
+            "SELECT ts FROM events WHERE kind = ? AND ts > ? ORDER BY ts", (ALERT_RAISED, since)
+        ).fetchall()
+        _overview = {
+            "session_levels": session_levels,
+            "risk_counts": risk_counts,
+            "recent_alerts": deque(ts for (ts,) in recent),
+        }
+    return _overview
+
+
+def _track_overview(overview, session_id, previous_level, level, events, ts):
+    """O(1) update of the overview aggregates after a committed append. Caller must hold _lock."""
+    if previous_level != level:
+        if previous_level is not None:
+            overview["risk_counts"][previous_level] -= 1
+        overview["risk_counts"][level] = overview["risk_counts"].get(level, 0) + 1
+        overview["session_levels"][session_id] = level
+    for kind, _ in events:
+        if kind == ALERT_RAISED:
+            overview["recent_alerts"].append(ts)
+
+
+def get_overview_stats():
+    """Counts per risk level, total sessions and alerts raised in the last hour."""
+    with _lock:
+        overview = _get_overview()
+        recent = overview["recent_alerts"]
+        cutoff = time.time() - ALERT_RECENT_SECONDS
+        while recent and recent[0] < cutoff:
+            recent.popleft()
+        return {
+            "sessions": len(overview["session_levels"]),
+            "risk_counts": dict(overview["risk_counts"]),
+            "alerts_last_hour": len(recent),
+        }
+
+
+def query_sessions(risk_level=None, search=None, active_within=None, page=0, page_size=25):
+    """
+    Triage listing for the clinician overview, filtered and paginated in SQL.
+    Sorted by risk level, then most recent alert, then PHQ-9 total.
+    Returns (rows, total_matching).
+    """
+    where, params = [], []
+    if risk_level:
+        where.append("risk_level = ?")
+        params.append(risk_level)
+    if search:
+        where.append("(patient_name LIKE ? OR patient_id LIKE ? OR session_id LIKE ?)")
+        params += [f"%{search}%"] * 3
+    if active_within:
+        where.append("last_updated >= ?")
+        params.append(time.time() - active_within)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    with _lock:
+        conn = _get_conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM sessions {where_sql}", params).fetchone()[0]
+        cursor = conn.execute(
+            "SELECT session_id, patient_id, patient_name, risk_level, total_score, items_answered, "
+            "alert_count, last_alert_at, last_updated FROM sessions "
+            f"{where_sql} ORDER BY risk_rank DESC, last_alert_at DESC, total_score DESC LIMIT ? OFFSET ?",
+            params + [page_size, max(page, 0) * page_size]
+        )
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return rows, total
+
+
+def init_shared_state(session_id):
+    """Register a session if it doesn't exist yet."""
+    with _lock:
+        overview = _get_overview()
+        _get_session(session_id)
+        _owned.add(session_id)
+        now = time.time()
+        cur = _get_conn().execute(
+            "INSERT OR IGNORE INTO sessions (session_id, created_at, last_updated) VALUES (?, ?, ?)",
+            (session_id, now, now)
+        )
+        if cur.rowcount:
+            _track_overview(overview, session_id, None, RISK_LEVELS[0], [], now)
+
+
+def clear_state(session_id):
+    """Remove one session's state and history; other sessions are untouched."""
+    with _lock:
+        _sessions.pop(session_id, None)
+        _series.pop(session_id, None)
+        _owned.discard(session_id)
+        overview = _get_overview()
+        level = overview["session_levels"].pop(session_id, None)
+        if level is not None:
+            overview["risk_counts"][level] -= 1
+        conn = _get_conn()
+        conn.execute("BEGIN")
+        for table in ("events", "snapshots", "sessions", "alert_outbox"):
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+        conn.execute("COMMIT")
+
+
+def update_patient_data(session_id, patient_info):
+    """Update patient demographics."""
+    _append(session_id, [(PATIENT_SET, patient_info)])
+
+
+def update_symptoms(session_id, symptoms):
+    """Record symptom scores; only items whose score changed become events."""
+    with _lock:
+        current = _get_session(session_id)["symptoms"]
+        changed = [
+            (SYMPTOM_SCORED, {"symptom": name, "score": score})
+            for name, score in symptoms.items()
+            if current.get(name) != score
+        ]
+        _append(session_id, changed)
+
+
+def update_external_factors(session_id, factors):
+    """Update external factors."""
+    _append(session_id, [(FACTOR_SET, {"factor": f, "level": level}) for f, level in factors.items()])
+
+
+def update_emotion(session_id, emotion):
     """Update emotion stats."""
-    state = _read_state()
-    if not state:
-        init_shared_state()
-        state = _read_state()
-    
-    # Update counts
-    emotions = Counter(state.get("top_emotions", {}))
-    emotions[emotion] += 1
-    state["top_emotions"] = dict(emotions)
-    state["last_updated"] = time.time()
-    state["message_count"] += 1
-    
-    _write_state(state)
-
-def update_suicide_risk(alert_data):
+    _append(session_id, [(EMOTION_OBSERVED, {"emotion": emotion})])
+
+
+def update_suicide_risk(session_id, alert_data):
     """Update suicide risk alerts."""
-    state = _read_state()
-    if not state: 
-        init_shared_state()
-        state = _read_state()
-        
-    current_alerts = state.get("suicide_risk", {}).get("alerts", [])
     if alert_data.get("alert"):
-        # Add new alert
-        current_alerts.append({
-            "message": "Suicidal language detected",
-            "timestamp": time.time(),
-            "details": alert_data
-        })
-        
-    state["suicide_risk"]["alerts"] = current_alerts
-    state["last_updated"] = time.time()
-    _write_state(state)
-
-def get_dashboard_state():
-    """Get current state for dashboard."""
-    return _read_state()
+        _append(session_id, [(ALERT_RAISED, alert_data)])
+
+
+def record_turn_analysis(session_id, emotion_scores, cssrs_probabilities, risk_profile=None):
+    """
+    Store one turn's full emotion probability vector and C-SSRS probabilities.
+    Both are dicts label -> probability; they are stored as vectors in label order.
+    `risk_profile` is the conversation-level profile the graph computed this turn; it is stored
+    with the turn and becomes the session's profile as-is.
+    """
+    from config import EMOTION_LABELS, CSSRS_LABELS
+    payload = {
+        "emotions": [round(float(emotion_scores.get(label, 0.0)), 4) for label in EMOTION_LABELS],
+        "cssrs": [round(float(cssrs_probabilities.get(CSSRS_LABELS[i], 0.0)), 4) for i in sorted(CSSRS_LABELS)],
+        "risk_profile": risk_profile or None,
+    }
+    _append(session_id, [(TURN_ANALYZED, payload)])
+
+
+def get_turn_series(session_id):
+    """
+    The session's per-turn series (a TurnSeries backed by numpy arrays).
+    Only turns appended since the last call are read from the log.
+    """
+    from config import EMOTION_LABELS, CSSRS_LABELS
+    from utils.timeseries import TurnSeries
+    with _lock:
+        series = _series.get(session_id)
+        if series is None:
+            series = _series[session_id] = TurnSeries(EMOTION_LABELS, [CSSRS_LABELS[i] for i in sorted(CSSRS_LABELS)])
+        rows = _get_conn().execute(
+            "SELECT seq, ts, payload FROM events WHERE session_id = ? AND seq > ? AND kind = ? ORDER BY seq",
+            (session_id, series.last_seq, TURN_ANALYZED)
+        ).fetchall()
+        for seq, ts, payload in rows:
+            payload = json.loads(payload)
+            series.append(ts, payload["emotions"], payload["cssrs"], seq)
+        return series
+
+
+def get_session_events(session_id, after_seq=0):
+    """Replayable event history for a session: list of {seq, ts, kind, payload}."""
+    with _lock:
+        return [
+            {"seq": seq, "ts": ts, "kind": kind, "payload": json.loads(payload)}
+            for seq, ts, kind, payload in _read_events(session_id, after_seq)
+        ]
+
+
+def replay_session(session_id):
+    """Rebuild a session's aggregate from its full event log, ignoring snapshots."""
+    state = _new_state(session_id)
+    for event in get_session_events(session_id):
+        _apply(state, event["kind"], event["payload"], event["ts"], event["seq"])
+    return state
+
+
+def list_sessions():
+    """Session ids known to the store, most recently updated first."""
+    with _lock:
+        rows = _get_conn().execute(
+            "SELECT session_id FROM sessions ORDER BY last_updated DESC"
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def get_latest_session_id():
+    """The most recently updated session, or None."""
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT session_id FROM sessions ORDER BY last_updated DESC LIMIT 1"
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get_dashboard_state(session_id=None):
+    """
+    Get a snapshot of a session's state for the dashboard.
+    Defaults to the most recently updated session.
+    """
+    if session_id is None:
+        session_id = get_latest_session_id()
+        if session_id is None:
+            return None
+    from utils.tracing import span
+    with span("state.read"), _lock:
+        if session_id not in _owned:
+            # Written by another process (e.g. dashboard_app run standalone): read from disk
+            return _load_session(session_id)
+        state = _get_session(session_id, create=False)
+        return copy.deepcopy(state) if state else None
@@ -15,3 +15,6 @@ class AgentState(TypedDict):
     permission_granted: bool
     permission_asked: bool
     language: str
+    session_id: str
+    risk_profile: dict
+    last_risk: dict
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import sys
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class DeltaSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that stores each channel value once per channel version.
+
+    The stock saver serializes every channel (including the full message list)
+    into each checkpoint row. Here the checkpoint row only carries the channel
+    versions, and a channel value is written to the `blobs` table only when
+    its version changes, so a turn that only appends messages does not
+    rewrite phase, PHQ-9 responses, etc.
+    """
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            """
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            """
+        )
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values = checkpoint["channel_values"]
+
+        # Only channels whose version moved in this step are serialized
+        rows = [
+            (thread_id, checkpoint_ns, channel, str(version), *self.serde.dumps_typed(values[channel]))
+            for channel, version in new_versions.items()
+            if channel in values
+        ]
+        if rows:
+            with self.cursor() as cur:
+                cur.executemany(
+                    "INSERT OR IGNORE INTO blobs (thread_id, checkpoint_ns, channel, version, type, value) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+        stripped = {**checkpoint, "channel_values": {}}
+        return super().put(config, stripped, metadata, new_versions)
+
+    def get_tuple(self, config):
+        checkpoint_tuple = super().get_tuple(config)
+        if checkpoint_tuple is not None:
+            self._load_channel_values(checkpoint_tuple)
+        return checkpoint_tuple
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # The parent generator holds the connection lock while it yields; drain it first
+        for checkpoint_tuple in list(super().list(config, filter=filter, before=before, limit=limit)):
+            self._load_channel_values(checkpoint_tuple)
+            yield checkpoint_tuple
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM blobs WHERE thread_id = ?", (str(thread_id),))
+
+    def _load_channel_values(self, checkpoint_tuple):
+        """Fill checkpoint['channel_values'] in place from the blobs table."""
+        configurable = checkpoint_tuple.config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint = checkpoint_tuple.checkpoint
+        values = checkpoint.setdefault("channel_values", {})
+
+        with self.cursor(transaction=False) as cur:
+            for channel, version in checkpoint["channel_versions"].items():
+                if channel in values:
+                    continue
+                cur.execute(
+                    "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (thread_id, checkpoint_ns, channel, str(version)),
+                )
+                row = cur.fetchone()
+                if row is not None:
+                    values[channel] = self.serde.loads_typed(row)
+
+
+_checkpointer = None
+
+
+def get_checkpointer(db_path: str = None):
+    """
+    Returns the process-wide SQLite checkpointer (WAL mode).
+    Sessions are keyed by `thread_id` in the invoke config, so they survive restarts.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        if db_path is None:
+            from config import CHECKPOINT_DB_PATH
+            db_path = CHECKPOINT_DB_PATH
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # check_same_thread=False is fine: the saver serializes access with its own lock
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        _checkpointer = DeltaSqliteSaver(conn)
+        _checkpointer.setup()
+    return _checkpointer
+
+
+def session_config(thread_id: str) -> dict:
+    """Build the LangGraph invoke config for a chat session."""
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def has_session(thread_id: str, checkpointer=None) -> bool:
+    """True if the checkpointer already holds state for this thread."""
+    checkpointer = checkpointer or get_checkpointer()
+    with checkpointer.cursor(transaction=False) as cur:
+        cur.execute("SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1", (str(thread_id),))
+        return cur.fetchone() is not None
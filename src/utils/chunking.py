@@ -0,0 +1,218 @@
+import re
+import hashlib
+
+# Structure-aware chunking for guideline PDFs: page headers/footers are stripped, the text is
+# split into headings, paragraphs and tables, and blocks are packed into chunks of at most a
+# token budget without crossing a heading. Sentences are only split when a paragraph is over
+# budget; table rows are never split. Paragraphs and tables already seen (in another PDF or
+# earlier in the same one) are dropped by content hash, which removes repeated disclaimers.
+
+PAGE_BREAK = "\f"
+EDGE_LINES = 3 # lines at the top and bottom of each page checked for headers/footers
+MIN_DEDUP_WORDS = 8 # shorter paragraphs (e.g. answer options) are never treated as boilerplate
+BLOCK_HASH_VERSION = 2 # bump when block_hash changes; ingest re-chunks files hashed under another version
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_NUMBERED_HEADING_RE = re.compile(r"^(\d+(\.\d+)*\.?|[A-Z]\.|[IVX]+\.)\s+\S")
+_TABLE_GAP_RE = re.compile(r"\S(\s{2,}|\t)\S")
+_NUMBER_RE = re.compile(r"^\(?[\d.,%–\-≥≤<>+]+\)?$")
+_LEADING_NUMBER_RE = re.compile(r"^[≥≤<>]?\d+(\s*[-–]\s*\d+)?\s+\S")
+
+
+def estimate_tokens(text):
+    """Word pieces and punctuation: close to a WordPiece count for English guideline text."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def _edge_key(line):
+    # Page numbers and dates differ per page; the header/footer around them doesn't
+    return re.sub(r"\d+", "#", _normalize(line))
+
+
+def block_hash(text):
+    """Content hash for dedup. Digits are kept: score bands that differ only in numbers are distinct."""
+    return hashlib.sha1(_normalize(text).encode("utf-8")).hexdigest()[:16]
+
+
+def strip_page_boilerplate(pages):
+    """Drop lines repeated at the top or bottom of most pages (running headers, footers, page numbers)."""
+    pages = [[line for line in page.splitlines()] for page in pages]
+    if len(pages) < 3:
+        return ["\n".join(page) for page in pages]
+    counts = {}
+    for page in pages:
+        content = [line for line in page if line.strip()]
+        for line in set(_edge_key(l) for l in content[:EDGE_LINES] + content[-EDGE_LINES:]):
+            counts[line] = counts.get(line, 0) + 1
+    threshold = max(3, len(pages) // 2)
+    repeated = {line for line, n in counts.items() if n >= threshold}
+
+    cleaned = []
+    for page in pages:
+        content_idx = [i for i, line in enumerate(page) if line.strip()]
+        edges = set(content_idx[:EDGE_LINES] + content_idx[-EDGE_LINES:])
+        cleaned.append("\n".join(line for i, line in enumerate(page) if not (i in edges and _edge_key(line) in repeated)))
+    return cleaned
+
+
+def _is_heading(line):
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80 or stripped[-1] in ".,;:!?" and not stripped.endswith(":"):
+        return False
+    words = stripped.split()
+    if len(words) > 10:
+        return False
+    if _NUMBERED_HEADING_RE.match(stripped) or stripped.isupper():
+        return True
+    capitalized = sum(1 for w in words if w[0].isupper() or not w[0].isalpha())
+    return stripped.endswith(":") or capitalized == len(words)
+
+
+def _is_table_row(line):
+    stripped = line.strip()
+    if _TABLE_GAP_RE.search(stripped):
+        return True
+    cells = stripped.split()
+    if len(cells) > 12 or stripped[-1] in ".!?":
+        return False
+    # Score bands and item grids: a leading number/range or several numeric cells on a short line
+    return bool(_LEADING_NUMBER_RE.match(stripped)) or sum(1 for c in cells if _NUMBER_RE.match(c)) >= 2
+
+
+def _table_lines(lines):
+    """Indices of lines in tables: runs of 2+ row-like lines, plus a short header line right above."""
+    rows = [bool(line.strip()) and _is_table_row(line) for line in lines]
+    in_table = set()
+    i = 0
+    while i < len(lines):
+        if not rows[i]:
+            i += 1
+            continue
+        end = i
+        while end < len(lines) and rows[end]:
+            end += 1
+        if end - i >= 2:
+            in_table.update(range(i, end))
+            header = lines[i - 1].strip() if i else ""
+            if header and len(header.split()) <= 8 and header[-1] not in ".!?:":
+                in_table.add(i - 1)
+        i = end
+    return in_table
+
+
+def split_blocks(text):
+    """Split extracted text into ("heading" | "paragraph" | "table", text) blocks."""
+    blocks = []
+    paragraph, table = [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+        if table:
+            blocks.append(("table", "\n".join(table)))
+            table.clear()
+
+    lines = [line.rstrip() for line in text.replace(PAGE_BREAK, "\n").splitlines()]
+    widths = sorted(len(line) for line in lines if line.strip())
+    full_width = widths[int(len(widths) * 0.8)] if widths else 0
+    tables = _table_lines(lines)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            flush()
+        elif i in tables:
+            if paragraph:
+                flush()
+            table.append(" ".join(stripped.split()))
+        elif _is_heading(stripped) and not (paragraph and paragraph[-1][-1:] not in ".!?:"):
+            flush()
+            blocks.append(("heading", stripped))
+        else:
+            if table:
+                flush()
+            paragraph.append(stripped)
+            # A short line ending a sentence closes the paragraph (PDF text often has no blank lines)
+            if stripped[-1] in ".!?:" and len(stripped) < 0.7 * full_width:
+                flush()
+    flush()
+    return blocks
+
+
+def _split_oversized(kind, text, max_tokens):
+    """Pieces of one over-budget block: tables by rows (header row repeated), paragraphs by sentences."""
+    if kind == "table":
+        header, *rows = text.split("\n")
+        units, joiner = rows, "\n"
+        prefix, prefix_tokens = header + "\n", estimate_tokens(header)
+    else:
+        units, joiner = _SENTENCE_RE.split(text), " "
+        prefix, prefix_tokens = "", 0
+    pieces, current, size = [], [], prefix_tokens
+    for unit in units:
+        tokens = estimate_tokens(unit)
+        if current and size + tokens > max_tokens:
+            pieces.append(prefix + joiner.join(current))
+            current, size = [], prefix_tokens
+        if tokens > max_tokens and kind != "table":
+            # A single run-on sentence: fall back to word windows
+            words = unit.split()
+            step = max(1, int(len(words) * max_tokens / tokens))
+            pieces += [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            continue
+        current.append(unit)
+        size += tokens
+    if current:
+        pieces.append(prefix + joiner.join(current))
+    return pieces
+
+
+def chunk_document(text, max_tokens, seen=None):
+    """
+    Chunk one document's text (pages separated by form feeds).
+    `seen` is a set of block hashes from other documents; repeated paragraphs and tables are
+    skipped and the set is updated. Returns (chunks, kept block hashes, dropped block hashes).
+    """
+    seen = set() if seen is None else seen
+    pages = strip_page_boilerplate(text.split(PAGE_BREAK))
+    chunks, kept, dropped = [], [], []
+    heading = ""
+    current, size = [], 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            body = "\n".join(current)
+            chunks.append(f"{heading}\n{body}" if heading else body)
+        current, size = [], estimate_tokens(heading)
+
+    for kind, block in split_blocks("\n".join(pages)):
+        if kind == "heading":
+            flush()
+            heading = block
+            size = estimate_tokens(heading)
+            continue
+        if kind == "table" or len(block.split()) >= MIN_DEDUP_WORDS:
+            digest = block_hash(block)
+            if digest in seen:
+                dropped.append(digest)
+                continue
+            seen.add(digest)
+            kept.append(digest)
+        tokens = estimate_tokens(block)
+        if size + tokens > max_tokens:
+            flush()
+        if size + tokens <= max_tokens:
+            current.append(block)
+            size += tokens
+        else:
+            for piece in _split_oversized(kind, block, max_tokens - size):
+                current.append(piece)
+                flush()
+    flush()
+    return chunks, kept, dropped
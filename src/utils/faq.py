@@ -0,0 +1,196 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+import numpy as np
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.lexical import BM25Index, tokenize
+from utils.retrieval_cache import normalize_query
+
+# Curated bilingual FAQ (data/faq.json) consulted before the LLM on rapport/advice turns.
+# Three tiers, cheapest first: exact question text, BM25 over questions and keywords,
+# then cosine similarity against precomputed question embeddings (cached in FAQ_EMBEDDINGS_PATH,
+# recomputed with the shared retriever model when faq.json or the model changes).
+# The embedding model is English-only, so Malayalam questions are matched on keywords alone.
+
+MALAYALAM_RE = re.compile(r"[\u0D00-\u0D7F]")
+
+
+def is_malayalam(text):
+    return MALAYALAM_RE.search(text) is not None
+
+
+class FAQIndex:
+    def __init__(self, entries, vectors=None):
+        self.entries = entries
+        self.exact = {}
+        rows, docs = [], []
+        for i, entry in enumerate(entries):
+            for question in entry["questions"]:
+                self.exact[normalize_query(question)] = i
+                rows.append(i)
+                docs.append(question)
+            rows.append(i)
+            docs.append(" ".join(entry.get("keywords", [])))
+        self.doc_entries = rows
+        self.doc_terms = [set(tokenize(doc)) for doc in docs]
+        self.bm25 = BM25Index.build(docs)
+        # One row per embedded (non-Malayalam) question, in entry order
+        self.question_entries = [i for i, entry in enumerate(entries) for q in entry["questions"] if not is_malayalam(q)]
+        self.vectors = vectors
+        self.stats = {"answered": 0, "context": 0, "missed": 0}
+
+    @property
+    def questions(self):
+        """The questions that get an embedding row."""
+        return [q for entry in self.entries for q in entry["questions"] if not is_malayalam(q)]
+
+    def lexical_match(self, text):
+        """
+        (entry index, confidence in [0, 1], distinct query terms matched, exact). Exact question
+        text scores 1.0. Confidence alone can be 1.0 for a one-word message, hence the term count.
+        """
+        exact = self.exact.get(normalize_query(text))
+        if exact is not None:
+            return exact, 1.0, len(set(tokenize(text))), True
+        top, _, confidence = self.bm25.search(text, 1)
+        if not len(top):
+            return None, 0.0, 0, False
+        matched = len(set(tokenize(text)) & self.doc_terms[top[0]])
+        return self.doc_entries[top[0]], confidence, matched, False
+
+    def dense_match(self, vector):
+        """(entry index, cosine similarity) of the closest precomputed question."""
+        if self.vectors is None:
+            return None, 0.0
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self.vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        row = int(np.argmax(scores))
+        return self.question_entries[row], float(scores[row])
+
+
+def _digest(path, model_name):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read() + model_name.encode("utf-8")).hexdigest()
+
+
+def _load_vectors(faq_path, embeddings_path, questions, embed):
+    """Question embeddings from the cache file, recomputed and saved if faq.json or the model changed."""
+    from config import RAG_EMBEDDING_MODEL
+    digest = _digest(faq_path, RAG_EMBEDDING_MODEL)
+    try:
+        with np.load(embeddings_path) as cached:
+            if str(cached["digest"]) == digest and len(cached["vectors"]) == len(questions):
+                return cached["vectors"]
+    except (OSError, KeyError, ValueError):
+        pass
+    if embed is None:
+        return None
+    vectors = np.stack([np.asarray(embed(q), dtype=np.float32) for q in questions])
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    os.makedirs(os.path.dirname(embeddings_path) or ".", exist_ok=True)
+    np.savez(embeddings_path, digest=digest, vectors=vectors)
+    return vectors
+
+
+def _embedder():
+    """The shared retriever's warm model, or None if it can't be loaded (lexical tiers still work)."""
+    try:
+        from utils.retriever import get_retriever
+        retriever = get_retriever()
+        retriever.model
+        return retriever.embed_query
+    except Exception as e:
+        print(f"[FAQ] Embedding model unavailable, using keyword matching only: {e}")
+        return None
+
+
+_index = None
+_embed = None
+_index_lock = threading.Lock()
+
+
+def get_faq_index():
+    global _index, _embed
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from config import FAQ_PATH, FAQ_EMBEDDINGS_PATH
+                with open(FAQ_PATH, encoding="utf-8") as f:
+                    entries = json.load(f)
+                _embed = _embedder()
+                index = FAQIndex(entries)
+                index.vectors = _load_vectors(FAQ_PATH, FAQ_EMBEDDINGS_PATH, index.questions, _embed)
+                _index = index
+    return _index
+
+
+def consult_faq(text, language="English"):
+    """
+    Returns (answer, context). `answer` is a vetted reply to send instead of calling the LLM;
+    otherwise `context` is a close FAQ entry for the prompt (or None).
+    Only short messages are checked; long ones are conversation, not stock questions.
+    """
+    from config import FAQ_MAX_WORDS
+    if not text or len(text.split()) > FAQ_MAX_WORDS:
+        return None, None
+    from utils.tracing import span
+    with span("faq") as s:
+        answer, context = _consult(text, language)
+        s.set(outcome="answered" if answer else "context" if context else "missed")
+    return answer, context
+
+
+def _consult(text, language):
+    from config import (
+        FAQ_ANSWER_LEXICAL, FAQ_ANSWER_MIN_TERMS, FAQ_ANSWER_SIMILARITY, FAQ_CONTEXT_LEXICAL, FAQ_CONTEXT_SIMILARITY
+    )
+    try:
+        index = get_faq_index()
+        # Embedding is only needed when keywords alone aren't conclusive
+        best, confidence, matched, exact = index.lexical_match(text)
+        if exact or (confidence >= FAQ_ANSWER_LEXICAL and matched >= FAQ_ANSWER_MIN_TERMS):
+            return _reply(index, best, language, answer=True)
+        dense = _embed is not None and not is_malayalam(text)
+        dense_best, similarity = index.dense_match(_embed(text)) if dense else (None, 0.0)
+    except Exception as e:
+        print(f"[FAQ] Lookup failed: {e}")
+        return None, None
+    if similarity >= FAQ_ANSWER_SIMILARITY:
+        return _reply(index, dense_best, language, answer=True)
+    # A short message ("severe", "score") can match one entry perfectly on keywords alone;
+    # it is only answered without the LLM if the embedding agrees on the same entry
+    if confidence >= FAQ_ANSWER_LEXICAL and dense_best == best and similarity >= FAQ_CONTEXT_SIMILARITY:
+        return _reply(index, best, language, answer=True)
+    if similarity >= FAQ_CONTEXT_SIMILARITY:
+        return _reply(index, dense_best, language, answer=False)
+    if confidence >= FAQ_CONTEXT_LEXICAL:
+        return _reply(index, best, language, answer=False)
+    index.stats["missed"] += 1
+    return None, None
+
+
+def _reply(index, best, language, answer):
+    entry = index.entries[best]
+    text = entry["answers"].get(language) or entry["answers"]["English"]
+    if answer:
+        index.stats["answered"] += 1
+        return text, None
+    index.stats["context"] += 1
+    return None, f"Vetted FAQ that may be relevant:\nQ: {entry['questions'][0]}\nA: {text}"
+
+
+def warm_up_in_background():
+    threading.Thread(target=get_faq_index, name="faq-warm-up", daemon=True).start()
+
+
+if __name__ == "__main__":
+    # Precompute the question embeddings (also done on first use)
+    index = get_faq_index()
+    print(f"{len(index.entries)} FAQ entries, {len(index.questions)} questions, "
+          f"embeddings {'ready' if index.vectors is not None else 'unavailable'}")
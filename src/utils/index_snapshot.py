@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import threading
+import numpy as np
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Snapshot layout (one directory per version, never modified after it is published):
+#   <RAG_INDEX_DIR>/<version>/vectors.npy   float32 [N, dim], L2-normalized, memory-mapped by readers
+#   <RAG_INDEX_DIR>/<version>/payloads.json ids and chunk texts, in row order
+#   <RAG_INDEX_DIR>/<version>/meta.json     model name, dim, count, source collection
+#   <RAG_INDEX_DIR>/<version>/bm25.npz, bm25_vocab.json  lexical index over the same rows
+#   <RAG_INDEX_DIR>/<version>/vectors_int8.npy + int8_params.npz, or vectors_binary.npy
+#                                           quantized copy scanned first (RAG_QUANTIZATION)
+#   <RAG_INDEX_DIR>/CURRENT                 name of the published version (replaced atomically)
+# Readers mmap the vectors read-only, so every worker on the host shares the same page-cache pages.
+
+CURRENT_FILE = "CURRENT"
+KEEP_VERSIONS = 2 # older versions are deleted on export (a reader may still hold the previous one)
+SCAN_BLOCK_ROWS = 1024 # quantized rows widened to float32 at a time while scanning
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def quantize_int8(vectors):
+    """Per-dimension scalar quantization: v ~= low + scale * (code + 128), clipped at the 0.5/99.5% quantiles."""
+    if not len(vectors):
+        return np.zeros(vectors.shape, dtype=np.int8), np.zeros(vectors.shape[1], np.float32), np.ones(vectors.shape[1], np.float32)
+    low = np.quantile(vectors, 0.005, axis=0)
+    high = np.quantile(vectors, 0.995, axis=0)
+    scale = np.maximum((high - low) / 255, 1e-12)
+    codes = np.clip(np.rint((vectors - low) / scale) - 128, -128, 127).astype(np.int8)
+    return codes, low.astype(np.float32), scale.astype(np.float32)
+
+
+def quantize_binary(vectors):
+    """One sign bit per dimension, packed 8 per byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def write_snapshot(ids, texts, vectors, model_name, index_dir=None, collection_name=None, quantization=None):
+    """
+    Publish a new immutable snapshot from in-memory arrays. Returns its version name.
+    `quantization` is "int8", "binary" or "float32" (default: RAG_QUANTIZATION).
+    """
+    from config import RAG_INDEX_DIR, RAG_QUANTIZATION
+    index_dir = index_dir or RAG_INDEX_DIR
+    quantization = quantization or RAG_QUANTIZATION or "float32"
+    vectors = np.asarray(vectors, dtype=np.float32)
+    # An empty collection has no rows to infer the width from
+    vectors = vectors.reshape(len(ids), -1) if len(ids) else vectors.reshape(0, vectors.shape[-1] if vectors.ndim == 2 else 0)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+
+    # Sortable by publish time (pruning keeps the newest)
+    now_ns = time.time_ns()
+    version = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now_ns / 1e9))}-{now_ns % 10**9:09d}-{os.getpid()}"
+    version_dir = os.path.join(index_dir, version)
+    os.makedirs(version_dir)
+    np.save(os.path.join(version_dir, "vectors.npy"), vectors)
+    with open(os.path.join(version_dir, "payloads.json"), "w", encoding="utf-8") as f:
+        json.dump({"ids": [str(i) for i in ids], "texts": list(texts)}, f, ensure_ascii=False)
+    if quantization == "int8":
+        codes, low, scale = quantize_int8(vectors)
+        np.save(os.path.join(version_dir, "vectors_int8.npy"), codes)
+        np.savez(os.path.join(version_dir, "int8_params.npz"), low=low, scale=scale)
+    elif quantization == "binary":
+        np.save(os.path.join(version_dir, "vectors_binary.npy"), quantize_binary(vectors))
+    from utils.lexical import BM25Index
+    BM25Index.build(texts).save(version_dir)
+    with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "dim": int(vectors.shape[1]) if len(vectors) else 0,
+            "count": len(ids),
+            "collection": collection_name,
+            "quantization": quantization,
+            "created_at": time.time(),
+        }, f)
+
+    # Publishing is a single rename, so readers see either the old or the new snapshot
+    _write_atomic(os.path.join(index_dir, CURRENT_FILE), version)
+    _prune(index_dir, version)
+    return version
+
+
+def _prune(index_dir, current):
+    versions = sorted(d for d in os.listdir(index_dir) if os.path.isdir(os.path.join(index_dir, d)))
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != current:
+            shutil.rmtree(os.path.join(index_dir, old), ignore_errors=True)
+
+
+def export_snapshot(client=None, collection_name=None, index_dir=None, batch_size=256):
+    """Export a Qdrant collection (vectors + chunk texts) into a new snapshot."""
+    from config import RAG_COLLECTION, RAG_EMBEDDING_MODEL
+    if client is None:
+        from utils.vector_db import get_qdrant_client
+        client = get_qdrant_client()
+    collection_name = collection_name or RAG_COLLECTION
+    vector_name = client.get_vector_field_name()
+
+    ids, texts, vectors = [], [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name, limit=batch_size, offset=offset,
+            with_payload=True, with_vectors=[vector_name]
+        )
+        for p in points:
+            ids.append(p.id)
+            texts.append((p.payload or {}).get("document", ""))
+            vectors.append(p.vector[vector_name] if isinstance(p.vector, dict) else p.vector)
+        if offset is None:
+            break
+    return write_snapshot(ids, texts, np.array(vectors, dtype=np.float32), RAG_EMBEDDING_MODEL, index_dir, collection_name)
+
+
+class SnapshotIndex:
+    """
+    Read-only, in-process search over one snapshot version. With a quantized copy the
+    scan reads only the compact codes; full-precision rows are touched just for rescoring,
+    so a worker's resident memory is roughly the size of the codes.
+    """
+
+    def __init__(self, version_dir):
+        self.version = os.path.basename(version_dir)
+        self.vectors = np.load(os.path.join(version_dir, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(version_dir, "payloads.json"), encoding="utf-8") as f:
+            payloads = json.load(f)
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.ids = payloads["ids"]
+        self.texts = payloads["texts"]
+        self.quantization = self.meta.get("quantization", "float32")
+        if self.quantization == "int8":
+            self.codes = np.load(os.path.join(version_dir, "vectors_int8.npy"), mmap_mode="r")
+            with np.load(os.path.join(version_dir, "int8_params.npz")) as params:
+                self.low, self.scale = params["low"], params["scale"]
+        elif self.quantization == "binary":
+            self.codes = np.load(os.path.join(version_dir, "vectors_binary.npy"), mmap_mode="r")
+        from utils.lexical import BM25Index
+        self.bm25 = BM25Index.load(version_dir) if os.path.exists(os.path.join(version_dir, "bm25.npz")) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _result(self, i, score):
+        return {"id": self.ids[i], "score": float(score), "text": self.texts[i]}
+
+    def lexical_search(self, query, limit):
+        """BM25 results and the confidence of the top hit (0 when there is no lexical index)."""
+        if self.bm25 is None:
+            return [], 0.0
+        top, scores, confidence = self.bm25.search(query, limit)
+        return [self._result(i, s) for i, s in zip(top, scores)], confidence
+
+    def _approximate_scores(self, query):
+        """Scores from the quantized codes (higher is better), scanned in blocks."""
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        if self.quantization == "int8":
+            # low . query is the same for every row, so ranking only needs the code term
+            weights = query * self.scale
+            for start in range(0, len(scores), SCAN_BLOCK_ROWS):
+                scores[start:start + SCAN_BLOCK_ROWS] = self.codes[start:start + SCAN_BLOCK_ROWS].astype(np.float32) @ weights
+        else:
+            bits = np.packbits(query > 0)
+            for start in range(0, len(scores), SCAN_BLOCK_ROWS):
+                # Negative Hamming distance
+                scores[start:start + SCAN_BLOCK_ROWS] = -_POPCOUNT[self.codes[start:start + SCAN_BLOCK_ROWS] ^ bits].sum(axis=1, dtype=np.int32)
+        return scores
+
+    def search(self, vector, limit):
+        """Cosine similarity ranking; list of {id, score, text}, best first."""
+        if not len(self.ids):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        if self.quantization in ("int8", "binary"):
+            from config import RAG_QUANTIZATION_OVERSAMPLING
+            approx = self._approximate_scores(query)
+            n_candidates = min(len(approx), max(limit, math.ceil(limit * RAG_QUANTIZATION_OVERSAMPLING)))
+            candidates = np.sort(np.argpartition(-approx, n_candidates - 1)[:n_candidates])
+            # Rescore the candidates at full precision
+            scores = self.vectors[candidates] @ query
+        else:
+            candidates = None
+            scores = self.vectors @ query
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [self._result(i, s) for i, s in zip(rows, scores[top])]
+
+
+_index = None
+_index_lock = threading.Lock()
+_last_check = 0.0
+
+
+def get_snapshot_index(index_dir=None):
+    """
+    The currently published snapshot, or None if none exists.
+    Re-reads CURRENT at most every RAG_SNAPSHOT_CHECK_SECONDS and hot-swaps to a newer version;
+    searches already running keep using the object they started with.
+    """
+    global _index, _last_check
+    from config import RAG_INDEX_DIR, RAG_SNAPSHOT_CHECK_SECONDS
+    index_dir = index_dir or RAG_INDEX_DIR
+    now = time.monotonic()
+    if _index is not None and now - _last_check < RAG_SNAPSHOT_CHECK_SECONDS:
+        return _index
+    with _index_lock:
+        if _index is not None and now - _last_check < RAG_SNAPSHOT_CHECK_SECONDS:
+            return _index
+        _last_check = now
+        try:
+            with open(os.path.join(index_dir, CURRENT_FILE), encoding="utf-8") as f:
+                version = f.read().strip()
+        except OSError:
+            return _index
+        if _index is None or _index.version != version:
+            try:
+                _index = SnapshotIndex(os.path.join(index_dir, version))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[Index] Could not load snapshot {version}: {e}")
+    return _index
+
+
+if __name__ == "__main__":
+    version = export_snapshot()
+    print(f"Published index snapshot {version}")
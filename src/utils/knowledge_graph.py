@@ -1,6 +1,104 @@
-def query_kg(context: str) -> str:
+import os
+import sys
+import json
+import threading
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Nodes: PHQ-9 items, symptoms, severity bands, stressors and interventions (data/knowledge_graph.json).
+# Edges: item -measures-> symptom -addressed_by-> intervention, stressor -addressed_by-> intervention,
+# band -recommends-> intervention. Everything a lookup needs is resolved at load time into
+# per-band / per-item / per-stressor intervention tuples, so a query is a few dict lookups.
+
+ITEM_THRESHOLD = 2 # item score ("more than half the days") at which its symptom is targeted
+SUICIDAL_ITEM = 8 # any positive answer on item 9 always brings in the safety plan
+
+
+class KnowledgeGraph:
+    def __init__(self, nodes, edges):
+        self.nodes = nodes
+        # Adjacency index: node -> relation -> [targets]
+        self.out = {}
+        for relation, pairs in edges.items():
+            for source, target in pairs:
+                self.out.setdefault(source, {}).setdefault(relation, []).append(target)
+
+        self.bands = sorted(
+            (n for n, data in nodes.items() if data["type"] == "band"), key=lambda n: nodes[n]["min"]
+        )
+        # Precomputed subgraphs: interventions reachable from each band / item / stressor
+        self.band_interventions = {band: tuple(self.neighbors(band, "recommends")) for band in self.bands}
+        self.item_interventions = {
+            int(item.split(":")[1]): tuple(
+                i for symptom in self.neighbors(item, "measures") for i in self.neighbors(symptom, "addressed_by")
+            )
+            for item, data in nodes.items() if data["type"] == "item"
+        }
+        self.stressor_interventions = {
+            node.split(":", 1)[1]: tuple(self.neighbors(node, "addressed_by"))
+            for node, data in nodes.items() if data["type"] == "stressor"
+        }
+
+    @staticmethod
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return KnowledgeGraph(data["nodes"], data["edges"])
+
+    def neighbors(self, node, relation):
+        return self.out.get(node, {}).get(relation, ())
+
+    def band_for(self, score):
+        for band in self.bands:
+            if score <= self.nodes[band]["max"]:
+                return band
+        return self.bands[-1]
+
+    def interventions_for(self, responses, stressors=(), limit=5):
+        """
+        Interventions for one patient: their severity band's plan, plus those addressing
+        each item scored >= ITEM_THRESHOLD and each active stressor, most urgent first.
+        `responses` maps item index -> score (0-3); `stressors` are external factor names.
+        """
+        band = self.band_for(sum(responses.values()))
+        candidates = list(self.band_interventions[band])
+        for item, score in responses.items():
+            if score >= ITEM_THRESHOLD or (int(item) == SUICIDAL_ITEM and score >= 1):
+                candidates += self.item_interventions.get(int(item), ())
+        for stressor in stressors:
+            candidates += self.stressor_interventions.get(stressor, ())
+        unique = sorted(dict.fromkeys(candidates), key=lambda n: self.nodes[n]["priority"])
+        return band, unique[:limit]
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_knowledge_graph():
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                from config import KG_PATH
+                _graph = KnowledgeGraph.load(KG_PATH)
+    return _graph
+
+
+def query_kg(responses, stressors=()) -> str:
     """
-    Dummy knowledge graph query.
-    Returns static advice/knowledge for now.
+    Knowledge graph context for the advice prompt: severity band and the
+    interventions relevant to this patient's item scores and stressors.
     """
-    return "Regular exercise and maintaining a sleep schedule can help improve mood."
+    from config import KG_MAX_INTERVENTIONS
+    try:
+        graph = get_knowledge_graph()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[KG] Could not load knowledge graph: {e}")
+        return "Regular exercise and maintaining a sleep schedule can help improve mood."
+    band, interventions = graph.interventions_for(responses, stressors, KG_MAX_INTERVENTIONS)
+    band_data = graph.nodes[band]
+    lines = [f"Severity band: {band_data['label']} ({band_data['min']}-{band_data['max']})"]
+    lines += [f"- {graph.nodes[i]['text']}" for i in interventions]
+    return "\n".join(lines)
@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import numpy as np
+
+# Lowercased word/number tokens. \w matches Malayalam letters but not its vowel signs and
+# virama (combining marks), so those and the zero-width (non-)joiners continue a token
+TOKEN_RE = re.compile(r"[^\W_][\w\u0300-\u036F\u0D00-\u0D7F\u200C\u200D]*", re.UNICODE)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "which", "with", "you", "your"
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunk texts of a snapshot, stored as CSR postings
+    (per term: doc ids and term frequencies), so a query only touches the
+    postings of its own terms.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, vocab, indptr, doc_ids, tfs, doc_lengths):
+        self.vocab = vocab # term -> row in the postings
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        n_docs = len(doc_lengths)
+        df = np.diff(indptr)
+        self.idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        self.avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+
+    @staticmethod
+    def build(texts):
+        postings = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((doc, count))
+
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for term, i in vocab.items():
+            indptr[i + 1] = len(postings[term])
+        indptr = np.cumsum(indptr)
+        doc_ids = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        for term, i in vocab.items():
+            entries = postings[term]
+            doc_ids[indptr[i]:indptr[i + 1]] = [d for d, _ in entries]
+            tfs[indptr[i]:indptr[i + 1]] = [c for _, c in entries]
+        return BM25Index(vocab, indptr, doc_ids, tfs, doc_lengths)
+
+    def save(self, directory):
+        np.savez(
+            os.path.join(directory, "bm25.npz"),
+            indptr=self.indptr, doc_ids=self.doc_ids, tfs=self.tfs, doc_lengths=self.doc_lengths
+        )
+        with open(os.path.join(directory, "bm25_vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+    @staticmethod
+    def load(directory):
+        with np.load(os.path.join(directory, "bm25.npz")) as data:
+            arrays = {k: data[k] for k in ("indptr", "doc_ids", "tfs", "doc_lengths")}
+        with open(os.path.join(directory, "bm25_vocab.json"), encoding="utf-8") as f:
+            vocab = json.load(f)
+        return BM25Index(vocab, **arrays)
+
+    def search(self, query, limit):
+        """
+        Returns (doc indices best first, scores, confidence). Confidence in [0, 1] is the top
+        score relative to a chunk matching every query term once.
+        """
+        terms = [self.vocab[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocab]
+        if not terms:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32), 0.0
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        norm = self.K1 * (1 - self.B + self.B * self.doc_lengths / max(self.avg_length, 1e-6))
+        for t in terms:
+            start, end = self.indptr[t], self.indptr[t + 1]
+            docs, tf = self.doc_ids[start:end], self.tfs[start:end]
+            scores[docs] += self.idf[t] * tf * (self.K1 + 1) / (tf + norm[docs])
+
+        limit = min(limit, int(np.count_nonzero(scores)))
+        if limit == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32), 0.0
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        # Reference: every query term occurring once in an average-length chunk scores its idf.
+        # Unmatched query terms count against confidence at the highest idf.
+        max_idf = float(self.idf.max(initial=1.0))
+        reference = sum(float(self.idf[self.vocab[t]]) if t in self.vocab else max_idf for t in dict.fromkeys(tokenize(query)))
+        return top, scores[top], min(float(scores[top[0]]) / max(reference, 1e-6), 1.0)
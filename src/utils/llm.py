@@ -7,6 +7,23 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 import time
 import random
+from utils.tracing import span
+
+
+def _model_name(llm):
+    llm = getattr(llm, "bound", llm) # bind_tools() wraps the chat model
+    for attr in ("model_name", "deployment_name", "model", "model_id"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str):
+            return value
+    return type(llm).__name__
+
+
+def _usage(response):
+    """Token counts reported by the provider, as span attributes."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return {"input_tokens": usage.get("input_tokens"), "output_tokens": usage.get("output_tokens")} if usage else {}
+
 
 class SafeLLM:
     """
@@ -15,26 +32,39 @@ class SafeLLM:
     """
     def __init__(self, llm):
         self.llm = llm
+        self.model_label = _model_name(llm)
 
     def invoke(self, *args, **kwargs):
+        from utils.scheduler import get_llm_scheduler
         max_retries = 10
         base_delay = 2
         
-        for attempt in range(max_retries):
-            try:
-                return self.llm.invoke(*args, **kwargs)
-            except Exception as e:
-                error_str = str(e).lower()
-                # Catch specific 503/Capacity errors or generic internal server errors
-                if "503" in error_str or "capacity" in error_str or "internal_server_error" in error_str or "rate limit" in error_str:
-                     if attempt < max_retries - 1:
-                        # Full jitter: sleep = random_between(0, base * 2^attempt)
-                        # But simple exponential is fine too: base * 2^attempt
-                        sleep_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                        print(f"[SafeLLM] Error (Attempt {attempt+1}/{max_retries}): {e}. Retrying in {sleep_time:.2f}s...")
-                        time.sleep(sleep_time)
-                        continue
-                raise e
+        with span("llm.invoke", model=self.model_label) as call:
+            for attempt in range(max_retries):
+                try:
+                    # Each attempt takes a slot in session-priority order; backoff sleeps
+                    # happen outside the slot so high-risk sessions can get ahead meanwhile
+                    with span("llm.attempt", attempt=attempt + 1) as attempt_span:
+                        queued = time.perf_counter()
+                        with get_llm_scheduler().slot():
+                            attempt_span.set(queue_ms=round((time.perf_counter() - queued) * 1000, 1))
+                            response = self.llm.invoke(*args, **kwargs)
+                    call.set(retries=attempt, **_usage(response))
+                    return response
+                except Exception as e:
+                    error_str = str(e).lower()
+                    # Catch specific 503/Capacity errors or generic internal server errors
+                    if "503" in error_str or "capacity" in error_str or "internal_server_error" in error_str or "rate limit" in error_str:
+                         if attempt < max_retries - 1:
+                            # Full jitter: sleep = random_between(0, base * 2^attempt)
+                            # But simple exponential is fine too: base * 2^attempt
+                            sleep_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                            print(f"[SafeLLM] Error (Attempt {attempt+1}/{max_retries}): {e}. Retrying in {sleep_time:.2f}s...")
+                            with span("llm.backoff", seconds=round(sleep_time, 2)):
+                                time.sleep(sleep_time)
+                            continue
+                    call.set(retries=attempt)
+                    raise e
 
     def bind_tools(self, *args, **kwargs):
         # Allow binding tools, returning a new SafeLLM wrapping the bound runnable
@@ -5,11 +5,11 @@ import pickle
 import logging
 import asyncio
 import numpy as np
-import torch
-import xgboost as xgb
 from abc import ABC, abstractmethod
 from concurrent.futures import ThreadPoolExecutor
-from transformers import AutoTokenizer, AutoModel
+
+# torch, transformers and xgboost are imported when a pipeline is first built, so
+# importing this module (every graph node does) stays cheap, e.g. with DISABLE_PIPELINES=1
 
 # Try to import tweet-preprocessor
 try:
@@ -47,6 +47,7 @@ class BasePipeline(ABC):
     """Abstract base class for efficient, enterprise-grade ML pipelines."""
     
     def __init__(self, name: str):
+        import torch
         self.name = name
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.initialized = False
@@ -76,6 +77,8 @@ class BasePipeline(ABC):
 
     def _load_muril_base(self, model_path: str):
         """Helper to load slightly different MURIL models efficiently."""
+        import torch
+        from transformers import AutoTokenizer, AutoModel
         logger.info(f"[{self.name}] Loading tokenizer and model from {model_path}...")
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(model_path)
@@ -99,6 +102,7 @@ class BasePipeline(ABC):
         if self.feature_extractor is None:
             return np.zeros((len(texts), 768))
 
+        import torch
         all_features = []
         batch_size = 32
         
@@ -216,6 +220,7 @@ class SuicideRiskPipeline(BasePipeline):
         
         if os.path.exists(SUICIDE_XGBOOST_PATH):
             logger.info(f"[SuicideRiskPipeline] Loading XGBoost model from {SUICIDE_XGBOOST_PATH}...")
+            import xgboost as xgb
             self.xgb_model = xgb.XGBClassifier()
             self.xgb_model.load_model(SUICIDE_XGBOOST_PATH)
         else:
@@ -276,17 +281,39 @@ def detect_emotion(text: str) -> str:
     """Wrapper."""
     if os.environ.get("DISABLE_PIPELINES"):
         return "neutral"
+    from utils.tracing import span
     pipe = get_pipeline()
-    result = pipe.predict(text)
+    with span("inference:emotion", chars=len(text)):
+        result = pipe.predict(text)
     if result['top_emotions']:
         return result['top_emotions'][0]
     return "neutral"
 
+def analyze_emotions(text: str) -> dict:
+    """Full emotion prediction, including the probability of every label ('all_scores')."""
+    if os.environ.get("DISABLE_PIPELINES"):
+        return {'top_emotions': [], 'probabilities': {}, 'all_scores': {}}
+    from utils.tracing import span
+    with span("inference:emotion", chars=len(text)):
+        return get_pipeline().predict(text)
+
+def analyze_suicide_risk(text: str) -> dict:
+    """Full C-SSRS prediction: label, label_id, alert and per-label 'probabilities'."""
+    if os.environ.get("DISABLE_PIPELINES"):
+        return {'label': 'Supportive', 'label_id': 0, 'alert': False, 'probabilities': {}}
+    from utils.tracing import span
+    with span("inference:suicide_risk", chars=len(text)) as s:
+        result = get_suicide_pipeline().predict(text)
+        s.set(label=result.get('label'))
+    return result
+
 def detect_suicidal_language(text: str) -> bool:
     """Wrapper."""
     if os.environ.get("DISABLE_PIPELINES"):
         return False
+    from utils.tracing import span
     pipe = get_suicide_pipeline()
-    result = pipe.predict(text) # Uses predict (alias predict_risk logic)
+    with span("inference:suicide_risk", chars=len(text)):
+        result = pipe.predict(text) # Uses predict (alias predict_risk logic)
     return result.get('alert', False)
 
@@ -0,0 +1,253 @@
+import os
+import sys
+import csv
+import threading
+import numpy as np
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# PHQ-9 items in questionnaire order, named as on the dashboard
+PHQ9_ITEM_KEYS = [
+    "Interest/Pleasure", "Feeling Down", "Sleep Issues", "Fatigue",
+    "Appetite", "Self-Worth", "Concentration", "Psychomotor", "Suicidal Ideation"
+]
+EXTERNAL_FACTOR_KEYS = ["Sleep Quality", "Study Pressure", "Financial Pressure"]
+MEASURES = PHQ9_ITEM_KEYS + ["Total"] + EXTERNAL_FACTOR_KEYS
+
+# (label, min age, max age) - inclusive; the dataset covers ages 17-26
+AGE_BANDS = [("<=19", 0, 19), ("20-22", 20, 22), ("23-25", 23, 25), ("26+", 26, 200)]
+GENDERS = ["Female", "Male"]
+ALL = "All"
+
+ANSWER_SCORES = {"not at all": 0, "several days": 1, "more than half the days": 2, "nearly every day": 3}
+FACTOR_LEVELS = {"good": 0, "average": 1, "bad": 2, "worst": 3}
+
+# Values are small integers: items/factors 0-3, total 0-27
+N_BINS = 28
+
+# Below this many respondents a cohort falls back to the wider group
+MIN_COHORT_SIZE = 20
+
+
+class PopulationCube:
+    """
+    Aggregate cube over the PHQ-9 dataset: (age band + All) x (gender + All) x measure -> histogram.
+    Count/mean/quartiles are precomputed per cell, so lookups are O(1) and new
+    observations are folded in by bumping histogram bins.
+    """
+
+    def __init__(self, hist, version=0):
+        self.hist = hist # int32 [age band, gender, measure, value]
+        self.version = version
+        self._age_index = {label: i for i, (label, _, _) in enumerate(AGE_BANDS)}
+        self._age_index[ALL] = len(AGE_BANDS)
+        self._gender_index = {g: i for i, g in enumerate(GENDERS)}
+        self._gender_index[ALL] = len(GENDERS)
+        self._measure_index = {m: i for i, m in enumerate(MEASURES)}
+        self._lock = threading.Lock()
+        self._summarize()
+
+    @staticmethod
+    def empty():
+        return PopulationCube(np.zeros((len(AGE_BANDS) + 1, len(GENDERS) + 1, len(MEASURES), N_BINS), dtype=np.int32))
+
+    def _summarize(self):
+        """Precompute count, mean and quartiles for every cell."""
+        values = np.arange(N_BINS)
+        counts = self.hist.sum(axis=-1)
+        cum = np.cumsum(self.hist, axis=-1)
+        # Mid-rank percentile of every possible value, so ranking is a table lookup:
+        # (respondents below v + half of those at v) / total
+        below = cum - self.hist
+        self.percentiles = np.where(
+            counts[..., None] > 0,
+            100.0 * (below + 0.5 * self.hist) / np.maximum(counts, 1)[..., None],
+            np.nan
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.counts = counts
+            self.means = np.where(counts > 0, (self.hist * values).sum(axis=-1) / np.maximum(counts, 1), np.nan)
+        # Smallest value whose cumulative count reaches q * count
+        self.quantiles = {
+            q: np.argmax(cum >= np.maximum(np.ceil(q * counts), 1)[..., None], axis=-1)
+            for q in (0.25, 0.5, 0.75)
+        }
+
+    @staticmethod
+    def age_band(age):
+        if age is None:
+            return ALL
+        for label, low, high in AGE_BANDS:
+            if low <= int(age) <= high:
+                return label
+        return ALL
+
+    def _cell(self, age_band, gender):
+        a = self._age_index.get(age_band, self._age_index[ALL])
+        g = self._gender_index.get(gender, self._gender_index[ALL])
+        return a, g
+
+    def cohort(self, age=None, gender=None, measure="Total"):
+        """
+        Resolve (age band, gender) for a patient, widening to All when the cohort is too small.
+        Returns the (age_band, gender) labels actually used.
+        """
+        age_band = self.age_band(age)
+        gender = gender if gender in self._gender_index else ALL
+        m = self._measure_index[measure]
+        for band, g in ((age_band, gender), (age_band, ALL), (ALL, gender), (ALL, ALL)):
+            a_i, g_i = self._cell(band, g)
+            if self.counts[a_i, g_i, m] >= MIN_COHORT_SIZE:
+                return band, g
+        return ALL, ALL
+
+    def stats(self, measure, age_band=ALL, gender=ALL):
+        """Summary for one cell: {count, mean, q1, median, q3}."""
+        a, g = self._cell(age_band, gender)
+        m = self._measure_index[measure]
+        return {
+            "count": int(self.counts[a, g, m]),
+            "mean": float(self.means[a, g, m]),
+            "q1": int(self.quantiles[0.25][a, g, m]),
+            "median": int(self.quantiles[0.5][a, g, m]),
+            "q3": int(self.quantiles[0.75][a, g, m]),
+        }
+
+    def percentile_rank(self, measure, value, age_band=ALL, gender=ALL):
+        """Percentile (0-100) of `value` within one cell, or None if the cell is empty."""
+        a, g = self._cell(age_band, gender)
+        v = min(max(int(value), 0), N_BINS - 1)
+        rank = self.percentiles[a, g, self._measure_index[measure], v]
+        return None if np.isnan(rank) else float(rank)
+
+    def patient_percentiles(self, values, age=None, gender=None):
+        """
+        Rank each of a patient's measures within their age/gender cohort.
+        Returns {measure: {"percentile", "age_band", "gender"}} for the measures present in `values`.
+        """
+        ranks = {}
+        for measure, value in values.items():
+            if measure not in self._measure_index or value is None:
+                continue
+            age_band, cohort_gender = self.cohort(age, gender, measure)
+            ranks[measure] = {
+                "percentile": self.percentile_rank(measure, value, age_band, cohort_gender),
+                "age_band": age_band,
+                "gender": cohort_gender,
+            }
+        return ranks
+
+    def histogram(self, measure, age_band=ALL, gender=ALL):
+        a, g = self._cell(age_band, gender)
+        return self.hist[a, g, self._measure_index[measure]]
+
+    def add_observation(self, age, gender, values):
+        """
+        Fold one respondent into the cube without rescanning the dataset.
+        `values` maps measure name -> integer value; missing measures are skipped.
+        """
+        band = self.age_band(age)
+        cells = {self._cell(band, gender), self._cell(band, ALL), self._cell(ALL, gender), self._cell(ALL, ALL)}
+        with self._lock:
+            for measure, value in values.items():
+                if measure not in self._measure_index or value is None:
+                    continue
+                m = self._measure_index[measure]
+                v = min(max(int(value), 0), N_BINS - 1)
+                for a, g in cells:
+                    self.hist[a, g, m, v] += 1
+            self.version += 1
+            self._summarize()
+
+    def save(self, path):
+        """Write atomically so readers never see a partial file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, hist=self.hist, version=np.int64(self.version), measures=np.array(MEASURES))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            if list(data["measures"]) != MEASURES or data["hist"].shape[-1] != N_BINS:
+                raise ValueError(f"Population cube at {path} has an outdated layout.")
+            return PopulationCube(data["hist"].copy(), int(data["version"]))
+
+    @staticmethod
+    def build_from_csv(csv_path):
+        """Parse the PHQ-9 dataset once into a cube."""
+        cube = PopulationCube.empty()
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = [h.strip() for h in next(reader)]
+            # Columns: Age, Gender, 9 items, PHQ_Total, PHQ_Severity, then the external factors
+            age_col, gender_col = header.index("Age"), header.index("Gender")
+            item_cols = list(range(2, 2 + len(PHQ9_ITEM_KEYS)))
+            total_col = header.index("PHQ_Total")
+            factor_cols = [header.index(name) for name in EXTERNAL_FACTOR_KEYS]
+
+            for row in reader:
+                if not row:
+                    continue
+                try:
+                    values = {key: ANSWER_SCORES[row[col].strip().lower()] for key, col in zip(PHQ9_ITEM_KEYS, item_cols)}
+                    values["Total"] = int(row[total_col])
+                    for key, col in zip(EXTERNAL_FACTOR_KEYS, factor_cols):
+                        values[key] = FACTOR_LEVELS.get(row[col].strip().lower())
+                    age = int(float(row[age_col]))
+                except (KeyError, ValueError, IndexError):
+                    continue
+                band = cube.age_band(age)
+                for a, g in {cube._cell(band, row[gender_col].strip()), cube._cell(band, ALL),
+                             cube._cell(ALL, row[gender_col].strip()), cube._cell(ALL, ALL)}:
+                    for measure, value in values.items():
+                        if value is not None:
+                            cube.hist[a, g, cube._measure_index[measure], value] += 1
+        cube._summarize()
+        return cube
+
+
+_cube = None
+_cube_lock = threading.Lock()
+
+
+def build_population_cube(csv_path=None, cube_path=None):
+    """Precompute the cube from the bundled dataset and save it."""
+    from config import POPULATION_DATASET_PATH, POPULATION_CUBE_PATH
+    csv_path = csv_path or POPULATION_DATASET_PATH
+    cube_path = cube_path or POPULATION_CUBE_PATH
+    cube = PopulationCube.build_from_csv(csv_path)
+    cube.save(cube_path)
+    return cube
+
+
+def get_population_cube():
+    """Process-wide cube, loaded from disk (or built once if missing/outdated)."""
+    global _cube
+    if _cube is None:
+        with _cube_lock:
+            if _cube is None:
+                from config import POPULATION_CUBE_PATH
+                try:
+                    _cube = PopulationCube.load(POPULATION_CUBE_PATH)
+                except (OSError, ValueError, KeyError):
+                    _cube = build_population_cube()
+    return _cube
+
+
+def add_completed_session(age, gender, values):
+    """Fold a completed assessment into the population cube and persist it."""
+    from config import POPULATION_CUBE_PATH
+    cube = get_population_cube()
+    cube.add_observation(age, gender, values)
+    with _cube_lock:
+        cube.save(POPULATION_CUBE_PATH)
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    cube = build_population_cube()
+    print(f"Built population cube in {time.perf_counter() - start:.3f}s: {cube.stats('Total')}")
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.index_snapshot import SnapshotIndex, get_snapshot_index, write_snapshot
+
+# Compares recall@k and latency of the quantized snapshot search against the full-precision
+# baseline, on the published snapshot or on a synthetic corpus. Queries are stored chunk
+# vectors plus noise (questions land near the chunks that answer them), so no model is needed.
+
+
+def _load_corpus(synthetic, dim):
+    if synthetic:
+        # Clustered like chunk embeddings: ~50 chunks around each document direction
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(max(synthetic // 50, 1), dim))
+        vectors = (centers[rng.integers(0, len(centers), size=synthetic)] + 0.7 * rng.normal(size=(synthetic, dim))).astype(np.float32)
+        return [str(i) for i in range(synthetic)], [""] * synthetic, vectors
+    index = get_snapshot_index()
+    if index is None:
+        raise SystemExit("No published snapshot; run src/utils/ingest.py or pass --synthetic N.")
+    return index.ids, index.texts, np.asarray(index.vectors)
+
+
+def _scan_bytes(index):
+    """Bytes a full scan reads: the quantized codes, or every full-precision vector."""
+    return index.codes.nbytes if index.quantization in ("int8", "binary") else index.vectors.nbytes
+
+
+def run_benchmark(k=5, n_queries=200, noise=0.3, synthetic=0, dim=384):
+    ids, texts, vectors = _load_corpus(synthetic, dim)
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, len(ids), size=n_queries)
+    queries = vectors[rows] + noise * rng.normal(size=(n_queries, vectors.shape[1])).astype(np.float32) / np.sqrt(vectors.shape[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indexes = {}
+        for mode in ("float32", "int8", "binary"):
+            index_dir = os.path.join(tmp, mode)
+            version = write_snapshot(ids, texts, vectors, "bench", index_dir, quantization=mode)
+            indexes[mode] = SnapshotIndex(os.path.join(index_dir, version))
+
+        truth = [{r["id"] for r in indexes["float32"].search(q, k)} for q in queries]
+        print(f"{len(ids)} vectors x {vectors.shape[1]} dims, {n_queries} queries, recall@{k} vs exact float32 search")
+        print(f"{'mode':<8} {'recall':>7} {'mean ms':>8} {'p95 ms':>8} {'scan MB':>8}")
+        for mode, index in indexes.items():
+            latencies, hits = [], 0
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                results = index.search(q, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected & {r["id"] for r in results})
+            latencies.sort()
+            print(f"{mode:<8} {hits / (k * n_queries):>7.3f} {np.mean(latencies):>8.2f} "
+                  f"{latencies[int(len(latencies) * 0.95)]:>8.2f} {_scan_bytes(index) / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/latency of quantized guideline search")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.3)
+    parser.add_argument("--synthetic", type=int, default=0, help="benchmark N random vectors instead of the snapshot")
+    args = parser.parse_args()
+    run_benchmark(args.k, args.queries, args.noise, args.synthetic)
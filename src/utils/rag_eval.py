@@ -0,0 +1,154 @@
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import tempfile
+from contextlib import contextmanager
+
+# Everything is local: the scratch Qdrant store and the cached FastEmbed model
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import config
+
+# Guideline retrieval evaluation. Each configuration gets its own scratch Qdrant store and
+# snapshot built from the same PDFs, then answers the same query set the way search_guidelines
+# does (GuidelineRetriever.search). Query set: JSON lines
+#   {"query": "...", "relevant": ["phrase from the chunk that answers it", ...]}
+# A result is relevant if its text contains one of the phrases (case/whitespace-insensitive),
+# so the query set stays valid when chunking changes.
+
+EVAL_COLLECTION = "eval_docs"
+
+
+def parse_overrides(pairs):
+    """["RAG_QUANTIZATION=int8", "RAG_CHUNK_SIZE=500"] -> {name: value}; values are Python literals or strings."""
+    overrides = {}
+    for pair in pairs or []:
+        name, _, raw = pair.partition("=")
+        if not hasattr(config, name):
+            raise SystemExit(f"Unknown config setting: {name}")
+        try:
+            overrides[name] = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            overrides[name] = raw
+    return overrides
+
+
+@contextmanager
+def config_overrides(values):
+    """Temporarily replace config settings (all modules read them at call time)."""
+    saved = {name: getattr(config, name) for name in values}
+    for name, value in values.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def evaluate(pdf_dir, queries, overrides, k):
+    """Build an index for one configuration and score the query set against it."""
+    from qdrant_client import QdrantClient
+    import utils.index_snapshot as index_snapshot
+    from utils.ingest import ingest_pdfs
+    from utils.retriever import GuidelineRetriever
+
+    with tempfile.TemporaryDirectory(prefix="rag-eval-") as work_dir:
+        index_dir = os.path.join(work_dir, "index")
+        settings = {
+            **overrides,
+            "RAG_INDEX_DIR": index_dir,
+            "RAG_MANIFEST_PATH": os.path.join(work_dir, "manifest.json"),
+            "RAG_CACHE_SIZE": 0, # measure retrieval, not the cache
+        }
+        with config_overrides(settings):
+            client = QdrantClient(path=os.path.join(work_dir, "qdrant"))
+            start = time.perf_counter()
+            ingest_pdfs(os.path.abspath(pdf_dir), EVAL_COLLECTION, force=True, client=client)
+            build_seconds = time.perf_counter() - start
+
+            index_snapshot._index = None # pick up this configuration's snapshot
+            retriever = GuidelineRetriever(EVAL_COLLECTION, client=client)
+            retriever.embed_query("warm up") # model load is not query latency
+
+            latencies, recalls, reciprocal_ranks = [], [], []
+            for item in queries:
+                start = time.perf_counter()
+                results = retriever.search(item["query"], k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                phrases = [_normalize(p) for p in item["relevant"]]
+                texts = [_normalize(r["text"]) for r in results]
+                found = {p for p in phrases for t in texts if p in t}
+                recalls.append(len(found) / len(phrases) if phrases else 0.0)
+                rank = next((i + 1 for i, t in enumerate(texts) if any(p in t for p in phrases)), None)
+                reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+            index = index_snapshot.get_snapshot_index()
+            chunks = len(index) if index is not None else 0
+            paths = dict(retriever.search_paths)
+            client.close()
+            index_snapshot._index = None
+            size = _dir_size(work_dir)
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        f"recall@{k}": sum(recalls) / n if n else 0.0,
+        "MRR": sum(reciprocal_ranks) / n if n else 0.0,
+        "p50 ms": latencies[n // 2] if n else 0.0,
+        "p95 ms": latencies[min(int(n * 0.95), n - 1)] if n else 0.0,
+        "build s": build_seconds,
+        "index MB": size / 2**20,
+        "chunks": chunks,
+        "paths": ", ".join(f"{p}={c}" for p, c in sorted(paths.items())),
+    }
+
+
+def compare(pdf_dir, queries_path, config_a, config_b, k):
+    queries = load_queries(queries_path)
+    results = {
+        "A": evaluate(pdf_dir, queries, config_a, k),
+        "B": evaluate(pdf_dir, queries, config_b, k),
+    }
+    print(f"\n{len(queries)} queries, k={k}")
+    print(f"  A: {config_a or 'current config'}")
+    print(f"  B: {config_b or 'current config'}")
+    print(f"{'metric':<12} {'A':>14} {'B':>14}")
+    for metric in results["A"]:
+        a, b = results["A"][metric], results["B"][metric]
+        if isinstance(a, float):
+            print(f"{metric:<12} {a:>14.3f} {b:>14.3f}")
+        else:
+            print(f"{metric:<12} {str(a):>14} {str(b):>14}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two guideline retrieval configurations offline")
+    parser.add_argument("--pdfs", required=True, help="directory of guideline PDFs")
+    parser.add_argument("--queries", default="data/eval_queries.jsonl")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--a", nargs="*", default=[], metavar="SETTING=VALUE", help="config overrides for A")
+    parser.add_argument("--b", nargs="*", default=[], metavar="SETTING=VALUE", help="config overrides for B")
+    args = parser.parse_args()
+    compare(args.pdfs, args.queries, parse_overrides(args.a), parse_overrides(args.b), args.k)
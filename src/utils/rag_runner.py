@@ -1,68 +1,87 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
-from src.tools.rag import search_guidelines
+from tools.rag import search_guidelines
+from utils.retrieval_cache import normalize_query
 
 TRIGGER_KEYWORDS = [
-    "protocol", "guideline", "rule", "score", "severe", "mild", 
+    "protocol", "guideline", "rule", "score", "severe", "mild",
     "moderate", "cutoff", "interpretation", "policy", "faq"
 ]
 
+# Retrieval runs beside the LLM call instead of after it
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag")
+
+
+def _submit(fn, *args):
+    # Carry the session context (scheduler priority) into the worker thread
+    return _retrieval_pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _run_tool_call(tool_call, prefetch, prefetch_query):
+    if prefetch is not None and normalize_query(tool_call["args"].get("query", "")) == normalize_query(prefetch_query):
+        # The model asked for what was already fetched speculatively
+        content = prefetch.result()
+    else:
+        content = search_guidelines.invoke(tool_call["args"])
+    return ToolMessage(content=content, tool_call_id=tool_call["id"])
+
+
 def run_llm_with_rag(llm, messages):
     """
     Runs the LLM with the search_guidelines tool bound.
     Implements a strict fallback: if no tool call is made but keywords are present,
     it forces the tool execution.
+    When the user message contains trigger keywords, retrieval starts speculatively
+    while the first LLM call is in flight, so the fallback never waits on a search.
     """
     # Bind tool
     llm_with_tools = llm.bind_tools([search_guidelines])
-    
+
+    last_user_msg = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+    content = ""
+    prefetch = None
+    if last_user_msg:
+        from utils.message_utils import get_message_text
+        content = get_message_text(last_user_msg)
+        if any(keyword in content.lower() for keyword in TRIGGER_KEYWORDS):
+            prefetch = _submit(search_guidelines.invoke, content)
+
     # 1. Initial LLM Call
     response = llm_with_tools.invoke(messages)
-    
+
     # 2. Check for Tool Call
     if response.tool_calls:
-        # Execute tool calls
-        tool_outputs = []
-        for tool_call in response.tool_calls:
+        # Execute tool calls in parallel, keeping their order
+        futures = [
+            _submit(_run_tool_call, tool_call, prefetch, content)
+            for tool_call in response.tool_calls
             # We only have one tool for now
-            if tool_call["name"] == "search_guidelines":
-                tool_output = search_guidelines.invoke(tool_call)
-                tool_outputs.append(
-                    ToolMessage(
-                        content=tool_output,
-                        tool_call_id=tool_call["id"]
-                    )
-                )
-        
+            if tool_call["name"] == "search_guidelines"
+        ]
+        tool_outputs = [future.result() for future in futures]
+
         # Append tool outputs and get final response
         messages_with_tools = messages + [response] + tool_outputs
         final_response = llm_with_tools.invoke(messages_with_tools)
         return final_response
-        
+
     # 3. Strict Fallback: No tool call, but maybe missed keywords?
-    else:
-        last_user_msg = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
-        if last_user_msg:
-            from src.utils.message_utils import get_message_text
-            content = get_message_text(last_user_msg).lower()
-            
-            if any(keyword in content for keyword in TRIGGER_KEYWORDS):
-                print(f"FALLBACK TRIGGERED: Keywords found in '{content}' but no tool call.")
-                
-                # Force search
-                # We construct a fake tool call or just inject context.
-                # Injecting context is safer/easier than forging a tool call chain if the model didn't start it.
-                
-                search_result = search_guidelines.invoke(last_user_msg.content)
-                
-                # Create a specialized system message with the context
-                context_msg = SystemMessage(
-                    content=f"IMPORTANT CONTEXT RETRIEVED (The user asked about guidelines and you missed it, so here it is):\n{search_result}\n\nUse this context to answer the user's previous question."
-                )
-                
-                # Send back to LLM (without tools is fine, or with tools)
-                messages_with_context = messages + [context_msg]
-                fallback_response = llm.invoke(messages_with_context)
-                return fallback_response
+    elif prefetch is not None:
+        print(f"FALLBACK TRIGGERED: Keywords found in '{content.lower()}' but no tool call.")
+
+        # Context was retrieved while the model was answering
+        search_result = prefetch.result()
+
+        # Create a specialized system message with the context
+        context_msg = SystemMessage(
+            content=f"IMPORTANT CONTEXT RETRIEVED (The user asked about guidelines and you missed it, so here it is):\n{search_result}\n\nUse this context to answer the user's previous question."
+        )
+
+        # Send back to LLM (without tools is fine, or with tools)
+        messages_with_context = messages + [context_msg]
+        fallback_response = llm.invoke(messages_with_context)
+        return fallback_response
 
     # Normal response
     return response
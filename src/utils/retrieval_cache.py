@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_query(query):
+    """Case, punctuation and whitespace differences don't make a new question."""
+    return " ".join(_PUNCT_RE.sub(" ", query.lower()).split())
+
+
+class RetrievalCache:
+    """
+    LRU + TTL cache of guideline search results with two tiers:
+    exact (normalized query text) and semantic (a cached query whose embedding is
+    within `similarity` cosine of the new one). Entries belong to one index version;
+    when a new snapshot is published the whole cache is dropped.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, similarity):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.version = None
+        self._entries = OrderedDict() # normalized query -> (created, limit, results, unit vector or None)
+        self._matrix = None # stacked vectors of the entries that have one, rebuilt lazily
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._matrix = None
+            self.version = version
+
+    def _alive(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            self._matrix = None
+            return None
+        return entry
+
+    def get(self, query, limit, version):
+        """Exact tier: cached results for the same normalized query, or None."""
+        key = normalize_query(query)
+        with self._lock:
+            self._check_version(version)
+            entry = self._alive(key, time.monotonic())
+            if entry is None or entry[1] < limit:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry[2][:limit]
+
+    def get_similar(self, vector, limit, version):
+        """Semantic tier: results of the most similar cached query above the threshold, or None."""
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None:
+                self._matrix_keys = [k for k, e in self._entries.items() if e[3] is not None]
+                self._matrix = np.stack([self._entries[k][3] for k in self._matrix_keys]) if self._matrix_keys else None
+            if self._matrix is not None:
+                now = time.monotonic()
+                scores = self._matrix @ query
+                for i in np.argsort(-scores):
+                    if scores[i] < self.similarity:
+                        break
+                    key = self._matrix_keys[i]
+                    entry = self._alive(key, now)
+                    if entry is not None and entry[1] >= limit:
+                        self._entries.move_to_end(key)
+                        self.stats["semantic_hits"] += 1
+                        return entry[2][:limit]
+                    if self._matrix is None: # an expired entry was dropped
+                        break
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, query, limit, version, results, vector=None):
+        key = normalize_query(query)
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), limit, results, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def record_miss(self):
+        with self._lock:
+            self.stats["misses"] += 1
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else None
+        return stats
@@ -0,0 +1,180 @@
+import os
+import sys
+import threading
+import numpy as np
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class GuidelineRetriever:
+    """
+    Process-wide guideline search.
+    Holds one warm FastEmbed model; queries are embedded here and searched by vector,
+    so concurrent sessions share it instead of re-initializing it per call.
+    Searches the published index snapshot when there is one (no store lock, shared
+    between workers), else the local Qdrant collection, opened once on first use.
+    """
+
+    def __init__(self, collection_name, client=None):
+        self._client = client
+        self.collection_name = collection_name
+        self._model = None
+        self._model_lock = threading.Lock()
+        # Local-mode Qdrant is not safe for concurrent access
+        self._search_lock = threading.Lock()
+        self.search_paths = {} # "lexical" / "hybrid" / "dense" -> number of searches
+        from config import RAG_CACHE_SIZE, RAG_CACHE_TTL_SECONDS, RAG_CACHE_SIMILARITY
+        from utils.retrieval_cache import RetrievalCache
+        self.cache = RetrievalCache(RAG_CACHE_SIZE, RAG_CACHE_TTL_SECONDS, RAG_CACHE_SIMILARITY)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from utils.vector_db import get_qdrant_client
+            self._client = get_qdrant_client()
+        return self._client
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from fastembed import TextEmbedding
+                    from config import RAG_EMBEDDING_MODEL
+                    # Same model the collection was built with by client.add()
+                    self._model = TextEmbedding(model_name=RAG_EMBEDDING_MODEL)
+        return self._model
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return np.asarray(next(iter(self.model.query_embed(query))), dtype=np.float32)
+
+    def search_vector(self, vector, limit=None):
+        """Nearest chunks to an already-embedded query: list of {id, score, text}."""
+        from config import RAG_TOP_K
+        from utils.index_snapshot import get_snapshot_index
+        index = get_snapshot_index()
+        if index is not None:
+            return index.search(vector, limit or RAG_TOP_K)
+        from utils.vector_db import get_search_params
+        with self._search_lock:
+            points = self.client.query_points(
+                collection_name=self.collection_name,
+                query=vector.tolist() if isinstance(vector, np.ndarray) else vector,
+                using=self.client.get_vector_field_name(),
+                limit=limit or RAG_TOP_K,
+                search_params=get_search_params(),
+                with_payload=True
+            ).points
+        return [
+            {"id": str(p.id), "score": float(p.score), "text": (p.payload or {}).get("document", "")}
+            for p in points
+        ]
+
+    def search(self, query: str, limit=None):
+        """
+        Hybrid lexical + dense search. When the snapshot's BM25 index matches the query
+        confidently (guideline terms like "cutoff", "severe"), its hits are returned without
+        running the embedding model; otherwise both rankings are fused with reciprocal rank fusion.
+        Results are cached per index version (see RetrievalCache): a repeated or
+        near-identical question skips the search.
+        """
+        from config import RAG_TOP_K
+        from utils.tracing import span
+        limit = limit or RAG_TOP_K
+        with span("retrieval.search", limit=limit) as s:
+            results, path = self._search(query, limit)
+            s.set(path=path, results=len(results))
+        return results
+
+    def _search(self, query, limit):
+        """(results, path); path is "cache", "cache_similar", "lexical", "hybrid" or "dense"."""
+        from config import RAG_LEXICAL_CONFIDENCE, RAG_HYBRID_CANDIDATES
+        from utils.index_snapshot import get_snapshot_index
+        index = get_snapshot_index()
+        version = index.version if index is not None else self._store_version()
+        cached = self.cache.get(query, limit, version)
+        if cached is not None:
+            return cached, "cache"
+
+        if index is None or index.bm25 is None:
+            vector = self.embed_query(query)
+            cached = self.cache.get_similar(vector, limit, version)
+            if cached is not None:
+                return cached, "cache_similar"
+            self._count("dense")
+            results = self.search_vector(vector, limit)
+            self.cache.put(query, limit, version, results, vector)
+            return results, "dense"
+
+        candidates = max(limit, RAG_HYBRID_CANDIDATES)
+        lexical, confidence = index.lexical_search(query, candidates)
+        if lexical and confidence >= RAG_LEXICAL_CONFIDENCE:
+            self.cache.record_miss()
+            self._count("lexical")
+            self.cache.put(query, limit, version, lexical[:limit])
+            return lexical[:limit], "lexical"
+        vector = self.embed_query(query)
+        cached = self.cache.get_similar(vector, limit, version)
+        if cached is not None:
+            return cached, "cache_similar"
+        self._count("hybrid")
+        results = reciprocal_rank_fusion([lexical, index.search(vector, candidates)], limit)
+        self.cache.put(query, limit, version, results, vector)
+        return results, "hybrid"
+
+    def _store_version(self):
+        """Cache version when searching the store directly: ingest rewrites its manifest on every change."""
+        from config import RAG_MANIFEST_PATH
+        try:
+            return f"manifest-{os.stat(RAG_MANIFEST_PATH).st_mtime_ns}"
+        except OSError:
+            return None
+
+    def metrics(self):
+        """Searches per path (cache misses only) and cache hit rates."""
+        with self._model_lock:
+            paths = dict(self.search_paths)
+        return {"paths": paths, "cache": self.cache.metrics()}
+
+    def _count(self, path):
+        with self._model_lock:
+            self.search_paths[path] = self.search_paths.get(path, 0) + 1
+
+    def warm_up(self):
+        """Load the embedding model and the index ahead of the first lookup."""
+        try:
+            self.search("PHQ-9 scoring", limit=1)
+        except Exception as e:
+            print(f"[Retriever] Warm-up failed: {e}")
+
+
+def reciprocal_rank_fusion(rankings, limit, k=60):
+    """
+    Merge ranked result lists by summing 1 / (k + rank) per id. Rank-based, so BM25 and
+    cosine scores need no calibration against each other.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking):
+            entry = fused.setdefault(result["id"], {**result, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank + 1)
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:limit]
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                from config import RAG_COLLECTION
+                _retriever = GuidelineRetriever(RAG_COLLECTION)
+    return _retriever
+
+
+def warm_up_in_background():
+    threading.Thread(target=lambda: get_retriever().warm_up(), name="retriever-warm-up", daemon=True).start()
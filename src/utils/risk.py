@@ -0,0 +1,75 @@
+# Risk levels from lowest to highest; the index is the sort rank used by the clinician overview.
+RISK_LEVELS = ["Mild", "Moderate", "Moderate-High", "High"]
+RISK_COLORS = {"Mild": "#22c55e", "Moderate": "#eab308", "Moderate-High": "#f59e0b", "High": "#ef4444"}
+
+
+def get_risk_level(score, suicidal_score):
+    if suicidal_score >= 2 or score >= 20:
+        return {"level": "High", "color": RISK_COLORS["High"], "action": "Immediate clinical attention required"}
+    if score >= 15:
+        return {"level": "Moderate-High", "color": RISK_COLORS["Moderate-High"], "action": "Clinical follow-up recommended within 1 week"}
+    if score >= 10:
+        return {"level": "Moderate", "color": RISK_COLORS["Moderate"], "action": "Monitor and schedule follow-up"}
+    return {"level": "Mild", "color": RISK_COLORS["Mild"], "action": "Supportive intervention"}
+
+
+def get_risk_rank(level):
+    return RISK_LEVELS.index(level) if level in RISK_LEVELS else 0
+
+
+# --- Conversation-level risk ---
+# A session's C-SSRS probabilities are folded into an exponentially weighted profile,
+# one message at a time, so the current risk never requires rescoring the history.
+
+def new_risk_profile(n_levels=5):
+    return {
+        # weighted probability of each C-SSRS level; starts from a Supportive prior so
+        # one message alone can't saturate it and escalation needs a sustained run
+        "ewma": [1.0] + [0.0] * (n_levels - 1),
+        "peak_level": 0, # highest level any single message was classified as
+        "turns": 0,
+        "score": 0.0, # expected C-SSRS level under the weighted profile
+        "sustained": 0.0, # weighted probability of Ideation or worse
+        "acute": 0.0, # weighted probability of Behavior or worse
+        "notified_level": 0, # highest peak level already handled by the crisis path
+    }
+
+
+def update_risk_profile(profile, probabilities, alpha=None):
+    """
+    Fold one message's C-SSRS probability vector (in label order) into the profile. O(1).
+    Returns a new profile; an empty vector (pipelines disabled) leaves it unchanged.
+    """
+    if not probabilities:
+        return profile
+    from config import RISK_EWMA_ALPHA
+    alpha = RISK_EWMA_ALPHA if alpha is None else alpha
+    profile = dict(profile or new_risk_profile(len(probabilities)))
+
+    ewma = [(1 - alpha) * old + alpha * float(p) for old, p in zip(profile["ewma"], probabilities)]
+    level = max(range(len(probabilities)), key=lambda i: probabilities[i])
+
+    profile["ewma"] = ewma
+    profile["peak_level"] = max(profile["peak_level"], level)
+    profile["turns"] += 1
+    profile["score"] = sum(i * p for i, p in enumerate(ewma))
+    profile["sustained"] = sum(ewma[2:])
+    profile["acute"] = sum(ewma[3:])
+    return profile
+
+
+def is_crisis(profile):
+    """True when the conversation as a whole (not just the last message) calls for the crisis path."""
+    if not profile or not profile.get("turns"):
+        return False
+    from config import CRISIS_SUSTAINED_THRESHOLD, CRISIS_ACUTE_THRESHOLD, CRISIS_PEAK_LEVEL
+    return (
+        profile["acute"] >= CRISIS_ACUTE_THRESHOLD
+        or profile["sustained"] >= CRISIS_SUSTAINED_THRESHOLD
+        or profile["peak_level"] >= CRISIS_PEAK_LEVEL
+    )
+
+
+def needs_crisis_response(profile):
+    """Crisis detected and not yet handled at the current peak level."""
+    return is_crisis(profile) and profile.get("notified_level", 0) < max(profile["peak_level"], 1)
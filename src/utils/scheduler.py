@@ -0,0 +1,250 @@
+import os
+import sys
+import heapq
+import itertools
+import queue
+import threading
+import time
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Priority classes, lowest value served first. Only NORMAL work is ever shed under load.
+CRISIS = 0
+ELEVATED = 1
+NORMAL = 2
+PRIORITY_NAMES = {CRISIS: "crisis", ELEVATED: "elevated", NORMAL: "normal"}
+
+WAIT_SAMPLES = 500 # recent wait times kept per class for the metrics
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when NORMAL-priority work is shed because the queue is full."""
+
+
+# --- Session priority ---
+# The graph runs nodes in worker threads with a copy of the caller's context, so the
+# session id set around graph.invoke() is visible to every LLM call made during the turn.
+
+_current_session = contextvars.ContextVar("current_session", default=None)
+_session_priorities = {} # session id -> (priority, time.monotonic() of the last update)
+_priorities_lock = threading.Lock()
+_last_prune = 0.0
+
+
+@contextmanager
+def session_context(session_id):
+    """Attribute all scheduled work inside the block to `session_id`."""
+    token = _current_session.set(session_id)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+def priority_for_state(state):
+    """
+    Priority class from a session's graph state: active risk alerts or a high
+    PHQ-9 item 9 (thoughts of self-harm) answer put a session ahead of everyone else.
+    """
+    from utils.risk import is_crisis
+    responses = state.get("phq9_responses") or {}
+    item9 = responses.get(8, responses.get("8", 0)) or 0
+    profile = state.get("risk_profile") or {}
+    last_risk = state.get("last_risk") or {}
+    if last_risk.get("alert") or last_risk.get("escalated") or is_crisis(profile) or item9 >= 2:
+        return CRISIS
+    if item9 >= 1 or profile.get("sustained", 0) >= 0.3:
+        return ELEVATED
+    return NORMAL
+
+
+def set_session_priority(session_id, priority):
+    """
+    Set from the session's current risk every turn, so a session whose risk profile
+    has decayed goes back to NORMAL. Sessions idle for SESSION_PRIORITY_IDLE_SECONDS are forgotten.
+    """
+    global _last_prune
+    if not session_id:
+        return
+    from config import SESSION_PRIORITY_IDLE_SECONDS
+    now = time.monotonic()
+    with _priorities_lock:
+        if priority == NORMAL:
+            _session_priorities.pop(session_id, None) # NORMAL is the default; nothing to keep
+        else:
+            _session_priorities[session_id] = (priority, now)
+        if now - _last_prune > min(SESSION_PRIORITY_IDLE_SECONDS, 60):
+            _last_prune = now
+            cutoff = now - SESSION_PRIORITY_IDLE_SECONDS
+            for sid in [sid for sid, (_, seen) in _session_priorities.items() if seen < cutoff]:
+                del _session_priorities[sid]
+
+
+def clear_session_priority(session_id):
+    """Forget a session's priority (its conversation ended)."""
+    with _priorities_lock:
+        _session_priorities.pop(session_id, None)
+
+
+def get_session_priority(session_id=None):
+    """Priority of `session_id` (default: the session of the current context)."""
+    session_id = session_id or _current_session.get()
+    with _priorities_lock:
+        entry = _session_priorities.get(session_id)
+    return entry[0] if entry else NORMAL
+
+
+class _WaitStats:
+    """Queue wait times and shed counts per priority class."""
+
+    def __init__(self):
+        self.waits = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self.served = {p: 0 for p in PRIORITY_NAMES}
+        self.shed = {p: 0 for p in PRIORITY_NAMES}
+
+    def record(self, priority, wait):
+        self.waits[priority].append(wait)
+        self.served[priority] += 1
+
+    def summary(self, queued):
+        result = {}
+        for p, name in PRIORITY_NAMES.items():
+            waits = sorted(self.waits[p])
+            result[name] = {
+                "served": self.served[p],
+                "shed": self.shed[p],
+                "queued": queued.get(p, 0),
+                "mean_wait": sum(waits) / len(waits) if waits else None,
+                "p95_wait": waits[min(int(len(waits) * 0.95), len(waits) - 1)] if waits else None,
+            }
+        return result
+
+
+class PriorityScheduler:
+    """
+    Fixed number of concurrent slots (e.g. in-flight LLM requests). Waiters are
+    granted slots strictly by priority class, FIFO within a class.
+    """
+
+    def __init__(self, slots, max_queue):
+        self.slots = slots
+        self.max_queue = max_queue
+        self._in_use = 0
+        self._waiters = [] # heap of (priority, seq)
+        self._queued = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = _WaitStats()
+
+    @contextmanager
+    def slot(self, priority=None):
+        priority = get_session_priority() if priority is None else priority
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority):
+        start = time.perf_counter()
+        with self._cond:
+            if priority == NORMAL and self._queued.get(NORMAL, 0) >= self.max_queue:
+                self._stats.shed[priority] += 1
+                raise SchedulerOverloaded("Too many requests are waiting; please retry shortly.")
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            self._queued[priority] = self._queued.get(priority, 0) + 1
+            while self._in_use >= self.slots or self._waiters[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._queued[priority] -= 1
+            self._in_use += 1
+            self._stats.record(priority, time.perf_counter() - start)
+            # The next waiter may also fit in a free slot
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            return self._stats.summary(dict(self._queued))
+
+
+class PriorityWorkQueue:
+    """Background jobs run by a small worker pool, highest priority first."""
+
+    def __init__(self, workers, max_queue, name="worker"):
+        self.max_queue = max_queue
+        self._queue = queue.PriorityQueue()
+        self._queued = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = _WaitStats()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, fn, *args, priority=None):
+        """Queue fn(*args). Returns False if the job was shed (NORMAL priority, queue full)."""
+        priority = get_session_priority() if priority is None else priority
+        with self._lock:
+            if priority == NORMAL and self._queued.get(NORMAL, 0) >= self.max_queue:
+                self._stats.shed[priority] += 1
+                return False
+            self._queued[priority] = self._queued.get(priority, 0) + 1
+        self._queue.put((priority, next(self._seq), time.perf_counter(), fn, args))
+        return True
+
+    def _work(self):
+        while True:
+            priority, _, enqueued, fn, args = self._queue.get()
+            with self._lock:
+                self._queued[priority] -= 1
+                self._stats.record(priority, time.perf_counter() - enqueued)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Background job failed: {e}")
+
+    def metrics(self):
+        with self._lock:
+            return self._stats.summary(dict(self._queued))
+
+
+_llm_scheduler = None
+_analysis_queue = None
+_init_lock = threading.Lock()
+
+
+def get_llm_scheduler():
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        with _init_lock:
+            if _llm_scheduler is None:
+                from config import LLM_MAX_CONCURRENT, LLM_MAX_QUEUE
+                _llm_scheduler = PriorityScheduler(LLM_MAX_CONCURRENT, LLM_MAX_QUEUE)
+    return _llm_scheduler
+
+
+def get_analysis_queue():
+    global _analysis_queue
+    if _analysis_queue is None:
+        with _init_lock:
+            if _analysis_queue is None:
+                from config import ANALYSIS_WORKERS, ANALYSIS_MAX_QUEUE
+                _analysis_queue = PriorityWorkQueue(ANALYSIS_WORKERS, ANALYSIS_MAX_QUEUE, name="analysis")
+    return _analysis_queue
+
+
+def get_scheduler_metrics():
+    """Queue wait time, served and shed counts per priority class, for LLM calls and analysis jobs."""
+    return {
+        "llm": get_llm_scheduler().metrics(),
+        "analysis": get_analysis_queue().metrics(),
+    }
@@ -0,0 +1,131 @@
+import os
+import re
+import sys
+import json
+import time
+import subprocess
+from contextlib import contextmanager
+
+# `python src/gradio_app.py --profile-startup` re-runs the app in a child process under
+# `-X importtime`, builds the UI without serving it, and prints where boot time goes:
+# import time per subsystem (self time of every module, attributed by top-level package)
+# and the app's own initialization phases. Each run is compared with the previous one
+# (STARTUP_PROFILE_PATH) so boot-time regressions show up as deltas.
+
+PROFILE_ENV = "STARTUP_PROFILE"
+PHASES_MARKER = "STARTUP_PHASES "
+
+# First match wins; anything else is stdlib or "other"
+SUBSYSTEMS = [
+    ("app", ("src", "graph", "nodes", "state", "utils", "tools", "config", "shared_state",
+             "dashboard_app", "alert_bus", "debug_utils")),
+    ("ML pipelines", ("torch", "transformers", "xgboost", "sklearn", "scipy", "tokenizers",
+                      "safetensors", "preprocessor")),
+    ("LLM / LangGraph", ("langchain", "langchain_core", "langchain_openai", "langgraph", "langsmith",
+                         "openai", "tiktoken", "groq")),
+    ("retrieval", ("qdrant_client", "fastembed", "onnxruntime", "grpc", "pypdf")),
+    ("UI / web", ("gradio", "gradio_client", "fastapi", "starlette", "uvicorn", "httpx", "httpcore",
+                  "anyio", "pydantic", "pydantic_core", "huggingface_hub", "websockets", "jinja2",
+                  "orjson", "safehttpx", "multipart", "python_multipart", "h11", "markupsafe")),
+    ("plotting / data", ("plotly", "numpy", "pandas", "PIL", "matplotlib")),
+]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+_phases = []
+
+
+def enabled():
+    return bool(os.environ.get(PROFILE_ENV))
+
+
+@contextmanager
+def phase(name):
+    """Time an initialization step (recorded only while profiling)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if enabled():
+            _phases.append((name, time.perf_counter() - start))
+
+
+def report_phases():
+    """Child side: hand the recorded phases to the parent on stdout."""
+    print(PHASES_MARKER + json.dumps(_phases), flush=True)
+
+
+def subsystem_of(module):
+    top = module.split(".")[0]
+    for label, prefixes in SUBSYSTEMS:
+        if top in prefixes:
+            return label
+    return "stdlib" if top.lstrip("_") in sys.stdlib_module_names or top in sys.stdlib_module_names else "other"
+
+
+def parse_importtime(stderr):
+    """Self time per subsystem and cumulative time of the app's direct imports (seconds)."""
+    by_subsystem, top_level = {}, []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        label = subsystem_of(module)
+        by_subsystem[label] = by_subsystem.get(label, 0.0) + self_us / 1e6
+        if len(indent) <= 1: # imported directly by the entry script
+            top_level.append((module, cumulative_us / 1e6))
+    return by_subsystem, top_level
+
+
+def _delta(current, previous):
+    if previous is None:
+        return ""
+    diff = current - previous
+    return f"  ({'+' if diff >= 0 else ''}{diff * 1000:.0f} ms)"
+
+
+def profile_startup(script, extra_env=None):
+    """Parent side: profile one boot of `script` and print the breakdown. Returns an exit code."""
+    from config import STARTUP_PROFILE_PATH
+    env = {**os.environ, PROFILE_ENV: "1", **(extra_env or {})}
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", script], env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if child.returncode != 0:
+        print(child.stderr[-4000:])
+        print(f"Startup failed (exit code {child.returncode}).")
+        return child.returncode
+
+    by_subsystem, top_level = parse_importtime(child.stderr)
+    phases = []
+    for line in child.stdout.splitlines():
+        if line.startswith(PHASES_MARKER):
+            phases = json.loads(line[len(PHASES_MARKER):])
+
+    try:
+        with open(STARTUP_PROFILE_PATH, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    prev_imports = previous.get("imports", {})
+    prev_phases = previous.get("phases", {})
+
+    mode = "light (DISABLE_PIPELINES=1)" if env.get("DISABLE_PIPELINES") else "full"
+    print(f"\nStartup profile, {mode}: {wall:.2f} s until the UI is built"
+          f"{_delta(wall, previous.get('wall'))}")
+    print(f"\nImport time by subsystem ({sum(by_subsystem.values()):.2f} s):")
+    for label, seconds in sorted(by_subsystem.items(), key=lambda kv: -kv[1]):
+        print(f"  {label:<18} {seconds * 1000:>8.0f} ms{_delta(seconds, prev_imports.get(label))}")
+    print("\nSlowest direct imports (cumulative):")
+    for module, seconds in sorted(top_level, key=lambda kv: -kv[1])[:8]:
+        print(f"  {module:<40} {seconds * 1000:>8.0f} ms")
+    print("\nInitialization:")
+    for name, seconds in phases:
+        print(f"  {name:<30} {seconds * 1000:>8.0f} ms{_delta(seconds, prev_phases.get(name))}")
+
+    os.makedirs(os.path.dirname(STARTUP_PROFILE_PATH) or ".", exist_ok=True)
+    with open(STARTUP_PROFILE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"wall": wall, "imports": by_subsystem, "phases": dict(phases)}, f, indent=2)
+    return 0
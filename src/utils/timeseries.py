@@ -0,0 +1,94 @@
+import threading
+import numpy as np
+
+
+class TurnSeries:
+    """
+    Append-only per-turn series for one session, backed by preallocated numpy arrays.
+    Row i holds turn i's timestamp, emotion probability vector and C-SSRS probability vector.
+    Capacity doubles when full, so appends are amortized O(1).
+    """
+
+    def __init__(self, emotion_labels, cssrs_labels, capacity=64):
+        self.emotion_labels = list(emotion_labels)
+        self.cssrs_labels = list(cssrs_labels)
+        self.size = 0
+        self.last_seq = 0 # last event folded in, for incremental catch-up from the log
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._emotions = np.zeros((capacity, len(self.emotion_labels)), dtype=np.float32)
+        self._cssrs = np.zeros((capacity, len(self.cssrs_labels)), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _grow(self):
+        capacity = self._ts.shape[0] * 2
+        self._ts = np.resize(self._ts, capacity)
+        self._emotions = np.resize(self._emotions, (capacity, self._emotions.shape[1]))
+        self._cssrs = np.resize(self._cssrs, (capacity, self._cssrs.shape[1]))
+
+    def append(self, ts, emotions, cssrs, seq=0):
+        """`emotions` / `cssrs` are vectors in label order (missing scores as 0)."""
+        with self._lock:
+            if self.size == self._ts.shape[0]:
+                self._grow()
+            self._ts[self.size] = ts
+            self._emotions[self.size] = emotions
+            self._cssrs[self.size] = cssrs
+            self.size += 1
+            self.last_seq = max(self.last_seq, seq)
+
+    @property
+    def timestamps(self):
+        return self._ts[:self.size]
+
+    @property
+    def emotions(self):
+        return self._emotions[:self.size]
+
+    @property
+    def cssrs(self):
+        return self._cssrs[:self.size]
+
+    def risk_index(self):
+        """Expected C-SSRS level per turn (0 = Supportive .. 4 = Attempt)."""
+        return self.cssrs @ np.arange(len(self.cssrs_labels), dtype=np.float32)
+
+    def top_emotions(self, k=4):
+        """Labels of the k emotions with the highest mean probability over the session."""
+        if self.size == 0:
+            return []
+        means = self.emotions.mean(axis=0)
+        return [self.emotion_labels[i] for i in np.argsort(means)[::-1][:k]]
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of at most `threshold` points that preserve the visual shape of (x, y);
+    the first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # Interior points are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Add parent directory to path to allow importing config
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Per-turn tracing: a sampled turn opens a root span around graph.invoke(), and every
+# span() inside it (nodes, route_entry, LLM attempts and backoff, inference, retrieval,
+# shared_state I/O) nests under the span active in the current context. The graph and
+# the retrieval pool run work with a copy of the caller's context, so worker threads
+# attach to the right parent. When the turn ends its spans are written to a rotating
+# JSONL file (TRACE_LOG_PATH) and folded into in-memory latency windows for the dashboard.
+# Import this module as `utils.tracing` everywhere so there is a single context variable.
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+_turns = {} # session id -> turns traced in this process
+# {"durations": span name -> recent durations (seconds), "counts": span name -> spans observed,
+#  "recent": slowest-step summary of the latest traced turns}
+_stats = None
+_stats_lock = threading.Lock()
+_process_start = time.time()
+_seeded = False
+_seed_lock = threading.Lock()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class _NoopSpan:
+    """Returned when the current turn isn't sampled: entering and annotating cost nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP = _NoopSpan()
+
+
+class _Trace:
+    """Spans of one sampled turn; flushed together when the root span ends."""
+
+    def __init__(self, session_id):
+        self.id = uuid.uuid4().hex[:16]
+        self.session_id = session_id
+        with _stats_lock:
+            self.turn = _turns[session_id] = _turns.get(session_id, 0) + 1
+        self.finished = []
+        self.closed = False
+        self.lock = threading.Lock()
+        self._ids = 0
+
+    def next_id(self):
+        with self.lock:
+            self._ids += 1
+            return self._ids
+
+    def finish(self, span):
+        record = span.record()
+        with self.lock:
+            if not self.closed:
+                self.finished.append(record)
+                if span.parent_id is not None:
+                    return
+                self.closed = True
+                records = self.finished
+            else:
+                # Outlived the turn (e.g. an unused speculative prefetch): written on its own
+                records = [record]
+        _emit(records)
+
+
+class Span:
+    __slots__ = ("trace", "id", "parent_id", "name", "attrs", "ts", "start", "duration", "_token")
+
+    def __init__(self, trace, parent_id, name, attrs):
+        self.trace = trace
+        self.id = trace.next_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.duration = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.ts = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _current.reset(self._token)
+        self.trace.finish(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record(self):
+        return {
+            "trace": self.trace.id,
+            "session": self.trace.session_id,
+            "turn": self.trace.turn,
+            "span": self.id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "ts": round(self.ts, 3),
+            "ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+def turn(session_id):
+    """
+    Root span for one conversation turn, sampled at TRACE_SAMPLE_RATE.
+    Unsampled turns (and rate 0) set nothing, so every span() inside is a no-op.
+    """
+    from config import TRACE_SAMPLE_RATE
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return NOOP
+    trace = _Trace(session_id)
+    return Span(trace, None, "turn", {})
+
+
+def span(name, **attrs):
+    """Child span of the active one; a no-op outside a sampled turn."""
+    parent = _current.get()
+    if parent is None:
+        return NOOP
+    return Span(parent.trace, parent.id, name, attrs)
+
+
+def current_span():
+    """The active span (to annotate it with attributes), or the no-op span."""
+    return _current.get() or NOOP
+
+
+def traced(name, fn):
+    """Wrap a graph node or router taking `state` in a span named `name`."""
+    @functools.wraps(fn)
+    def run(state):
+        with span(name, phase=state.get("phase")) as s:
+            result = fn(state)
+            if isinstance(result, str):
+                s.set(route=result)
+            return result
+    return run
+
+
+# --- Output ---
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from config import TRACE_LOG_PATH, TRACE_MAX_BYTES, TRACE_BACKUPS
+                os.makedirs(os.path.dirname(TRACE_LOG_PATH) or ".", exist_ok=True)
+                handler = RotatingFileHandler(
+                    TRACE_LOG_PATH, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8", delay=True
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                writer = logging.getLogger("phq9.traces")
+                writer.propagate = False
+                writer.setLevel(logging.INFO)
+                writer.addHandler(handler)
+                _writer = writer
+    return _writer
+
+
+def _emit(records):
+    try:
+        # One write per turn, so rotation never splits a turn across files
+        _get_writer().info("\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in records))
+    except Exception as e:
+        from debug_utils import log_debug
+        log_debug(f"Trace write failed: {e}")
+    _observe(records)
+
+
+def _new_stats():
+    from config import TRACE_WINDOW, TRACE_RECENT_TURNS
+    return {"durations": {}, "counts": {}, "recent": deque(maxlen=TRACE_RECENT_TURNS), "window": TRACE_WINDOW}
+
+
+def _fold(stats, records):
+    """Fold finished spans into the latency windows. Records of one trace, root last if present."""
+    for record in records:
+        name = record["name"]
+        window = stats["durations"].get(name)
+        if window is None:
+            window = stats["durations"][name] = deque(maxlen=stats["window"])
+        window.append(record["ms"] / 1000)
+        stats["counts"][name] = stats["counts"].get(name, 0) + 1
+        if record["parent"] is None:
+            nodes = [r for r in records if r["name"].startswith("node:")]
+            slowest = max(nodes, key=lambda r: r["ms"]) if nodes else None
+            stats["recent"].append({
+                "ts": record["ts"],
+                "session": record["session"],
+                "turn": record["turn"],
+                "ms": record["ms"],
+                "slowest": f"{slowest['name']} ({slowest['ms']:.0f} ms)" if slowest else "-",
+            })
+
+
+def _observe(records):
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = _new_stats()
+        _fold(_stats, records)
+
+
+def _seed_from_log():
+    """
+    Put the spans already on disk (earlier runs, or the app when run separately) in front
+    of this process's own. Only the dashboard calls this, never a turn, so reading up to
+    TRACE_BACKUPS x TRACE_MAX_BYTES of log never delays a reply.
+    """
+    global _seeded, _stats
+    with _seed_lock:
+        if _seeded:
+            return
+        _seeded = True
+        seed = _new_stats()
+        for batch in _read_log():
+            # Spans this process wrote are already in the live windows
+            if batch[0]["ts"] < _process_start:
+                _fold(seed, batch)
+        with _stats_lock:
+            if _stats is not None:
+                for name, window in _stats["durations"].items():
+                    seed["durations"][name] = deque(
+                        list(seed["durations"].get(name, ())) + list(window), maxlen=seed["window"]
+                    )
+                for name, count in _stats["counts"].items():
+                    seed["counts"][name] = seed["counts"].get(name, 0) + count
+                seed["recent"].extend(_stats["recent"])
+            _stats = seed
+
+
+def _read_log():
+    """Yield the logged spans one trace at a time, oldest file first."""
+    from config import TRACE_LOG_PATH, TRACE_BACKUPS
+    paths = [f"{TRACE_LOG_PATH}.{i}" for i in range(TRACE_BACKUPS, 0, -1)] + [TRACE_LOG_PATH]
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                batch = []
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if batch and record["trace"] != batch[-1]["trace"]:
+                        yield batch
+                        batch = []
+                    batch.append(record)
+                if batch:
+                    yield batch
+        except OSError:
+            continue
+
+
+def _percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def get_trace_stats():
+    """
+    Latency per span name over the last TRACE_WINDOW spans (seconds), plus the most
+    recent traced turns with their slowest node. Seeded once from the trace log.
+    """
+    from config import TRACE_SAMPLE_RATE
+    _seed_from_log()
+    with _stats_lock:
+        stats = _stats or _new_stats()
+        samples = {name: sorted(window) for name, window in stats["durations"].items()}
+        counts = dict(stats["counts"])
+        recent = list(stats["recent"])
+    spans = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        spans[name] = {
+            "count": counts.get(name, len(values)),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "p99": _percentile(values, 0.99),
+            "max": values[-1],
+        }
+    return {"sample_rate": TRACE_SAMPLE_RATE, "spans": spans, "recent_turns": recent[::-1]}
@@ -1,10 +1,64 @@
 import os
+import threading
 from pathlib import Path
 from qdrant_client import QdrantClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
+_client = None
+_client_lock = threading.Lock()
+
 def get_qdrant_client():
-    """Returns an instance of QdrantClient configured for in-memory usage."""
-    return QdrantClient(path=str(Path.home() / "phq9"))
+    """
+    Returns the process-wide QdrantClient for the local store.
+    Opening a local-path client loads the whole collection from disk, so it is done once.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = QdrantClient(path=str(Path.home() / "phq9"))
+    return _client
+
+def get_quantization_config(kind=None):
+    """Qdrant quantization for RAG_QUANTIZATION: "int8" (scalar), "binary", or None for full precision."""
+    from qdrant_client import models
+    if kind == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+def get_search_params():
+    """Search with the quantized vectors, then rescore the oversampled candidates at full precision."""
+    from qdrant_client import models
+    from config import RAG_QUANTIZATION, RAG_QUANTIZATION_OVERSAMPLING
+    if not RAG_QUANTIZATION:
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(rescore=True, oversampling=RAG_QUANTIZATION_OVERSAMPLING)
+    )
+
+def ensure_collection(client, collection_name, recreate=False):
+    """
+    Create the guideline collection with explicit index settings (quantization, HNSW,
+    on-disk vectors) before client.add() would create it with defaults.
+    Settings of an existing collection can't be changed in place; recreate to apply new ones.
+    """
+    from qdrant_client import models
+    from config import RAG_QUANTIZATION, RAG_HNSW_M, RAG_HNSW_EF_CONSTRUCT, RAG_VECTORS_ON_DISK
+    if client.collection_exists(collection_name):
+        if not recreate:
+            return
+        client.delete_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=client.get_fastembed_vector_params(
+            on_disk=RAG_VECTORS_ON_DISK,
+            quantization_config=get_quantization_config(RAG_QUANTIZATION),
+            hnsw_config=models.HnswConfigDiff(m=RAG_HNSW_M, ef_construct=RAG_HNSW_EF_CONSTRUCT),
+        ),
+    )
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The app imports config and utils.* from src/, and its top-level modules as src.*
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def state_db(tmp_path, monkeypatch):
+    """Point shared_state and alert_bus at an empty database, and the debug log at tmp_path, for one test."""
+    import src.shared_state as shared_state
+    import src.alert_bus as alert_bus
+    import src.debug_utils
+    import debug_utils
+
+    # utils.tracing imports the log as debug_utils, the rest as src.debug_utils
+    for log_module in (src.debug_utils, debug_utils):
+        monkeypatch.setattr(log_module, "LOG_FILE", str(tmp_path / "debug.log"))
+    monkeypatch.setattr(shared_state, "STATE_DB", str(tmp_path / "state.sqlite"))
+    monkeypatch.setattr(shared_state, "_conn", None)
+    monkeypatch.setattr(shared_state, "_sessions", {})
+    monkeypatch.setattr(shared_state, "_owned", set())
+    monkeypatch.setattr(shared_state, "_overview", None)
+    monkeypatch.setattr(shared_state, "_series", {})
+    monkeypatch.setattr(shared_state, "_subscribers", [])
+    monkeypatch.setattr(alert_bus, "_conn", None)
+    monkeypatch.setattr(alert_bus, "_subscribers", {})
+    monkeypatch.setattr(alert_bus, "_latencies", {})
+    yield shared_state
+    for module in (alert_bus, shared_state):
+        if module._conn is not None:
+            module._conn.close()
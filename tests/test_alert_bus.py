@@ -0,0 +1,102 @@
+import time
+from collections import deque
+
+import src.alert_bus as alert_bus
+
+
+def _subscribe(name, handler, batch_size=20):
+    # Registered by hand so no dispatcher thread is started
+    alert_bus._subscribers[name] = (handler, batch_size)
+    alert_bus._latencies[name] = deque(maxlen=alert_bus.LATENCY_WINDOW)
+
+
+def _raise_alert(shared_state, session_id):
+    shared_state.update_suicide_risk(session_id, {"alert": True, "label": "Ideation", "score": 0.9})
+
+
+def test_alert_is_written_with_its_event(state_db):
+    _raise_alert(state_db, "s1")
+    conn = state_db._get_conn()
+    (event_seq, payload), = conn.execute("SELECT event_seq, payload FROM alert_outbox").fetchall()
+    assert conn.execute("SELECT kind FROM events WHERE seq = ?", (event_seq,)).fetchone()[0] == state_db.ALERT_RAISED
+    assert '"label": "Ideation"' in payload
+
+
+def test_failed_batch_is_retried(state_db):
+    calls = []
+
+    def flaky(alerts):
+        calls.append([a["id"] for a in alerts])
+        if len(calls) == 1:
+            raise RuntimeError("webhook down")
+
+    _subscribe("flaky", flaky)
+    _raise_alert(state_db, "s1")
+    _raise_alert(state_db, "s2")
+
+    assert alert_bus.dispatch_pending() == 0
+    assert alert_bus.get_alert_metrics()["flaky"]["pending"] == 2
+    # Still backing off
+    assert alert_bus.dispatch_pending() == 0
+    assert len(calls) == 1
+
+    alert_bus._get_conn().execute("UPDATE alert_deliveries SET next_attempt_at = 0")
+    assert alert_bus.dispatch_pending() == 2
+    assert calls == [[1, 2], [1, 2]]
+    metrics = alert_bus.get_alert_metrics()["flaky"]
+    assert (metrics["delivered"], metrics["pending"], metrics["expired"]) == (2, 0, 0)
+    assert alert_bus.dispatch_pending() == 0
+
+
+def test_expired_alerts_are_not_pending(state_db):
+    from config import ALERT_MAX_AGE_SECONDS
+    delivered = []
+    _subscribe("sink", delivered.extend)
+    _raise_alert(state_db, "s1")
+    _raise_alert(state_db, "s2")
+    state_db._get_conn().execute(
+        "UPDATE alert_outbox SET created_at = ? WHERE id = 1", (time.time() - ALERT_MAX_AGE_SECONDS - 60,)
+    )
+
+    metrics = alert_bus.get_alert_metrics()["sink"]
+    assert (metrics["pending"], metrics["expired"]) == (1, 1)
+    assert alert_bus.dispatch_pending() == 1
+    assert [a["id"] for a in delivered] == [2]
+    metrics = alert_bus.get_alert_metrics()["sink"]
+    assert (metrics["delivered"], metrics["pending"], metrics["expired"]) == (1, 0, 1)
+
+
+def test_unavailable_subscriber_is_resumed_without_backoff(state_db):
+    delivered = []
+    tabs = []
+
+    def dashboard(alerts):
+        if not tabs:
+            raise alert_bus.SubscriberUnavailable("No dashboard open")
+        delivered.extend(alerts)
+
+    _subscribe("dashboard", dashboard)
+    _raise_alert(state_db, "s1")
+    assert alert_bus.dispatch_pending() == 0
+    # Not a failed attempt: nothing recorded, so the alert stays due
+    assert alert_bus._get_conn().execute("SELECT COUNT(*) FROM alert_deliveries").fetchone()[0] == 0
+
+    tabs.append("tab")
+    assert alert_bus.dispatch_pending() == 1
+    assert [a["id"] for a in delivered] == [1]
+
+
+def test_resume_skips_backoff(state_db):
+    calls = []
+
+    def flaky(alerts):
+        calls.append(alerts)
+        if len(calls) == 1:
+            raise RuntimeError("down")
+
+    _subscribe("flaky", flaky)
+    _raise_alert(state_db, "s1")
+    assert alert_bus.dispatch_pending() == 0
+    assert alert_bus.dispatch_pending() == 0
+    alert_bus.resume_subscriber("flaky")
+    assert alert_bus.dispatch_pending() == 1
@@ -0,0 +1,74 @@
+import operator
+import sqlite3
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from utils.checkpoint import DeltaSqliteSaver, has_session, session_config
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+    phase: str
+
+
+def _respond(state):
+    return {"messages": [f"reply {len(state['messages'])}"]}
+
+
+def _build(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("respond", _respond)
+    builder.add_edge(START, "respond")
+    builder.add_edge("respond", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _saver(path):
+    saver = DeltaSqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    saver.setup()
+    return saver
+
+
+def test_state_survives_reopen(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = session_config("session-1")
+    graph = _build(_saver(path))
+    graph.invoke({"messages": ["hello"], "phase": "screening"}, config)
+    graph.invoke({"messages": ["again"]}, config)
+
+    reopened = _saver(path)
+    assert has_session("session-1", reopened)
+    assert not has_session("session-2", reopened)
+    values = _build(reopened).get_state(config).values
+    assert values["messages"] == ["hello", "reply 1", "again", "reply 3"]
+    assert values["phase"] == "screening"
+
+
+def test_unchanged_channels_are_stored_once(tmp_path):
+    saver = _saver(str(tmp_path / "checkpoints.sqlite"))
+    graph = _build(saver)
+    config = session_config("session-1")
+    graph.invoke({"messages": ["hello"], "phase": "screening"}, config)
+    graph.invoke({"messages": ["again"]}, config)
+
+    with saver.cursor(transaction=False) as cur:
+        cur.execute("SELECT channel, COUNT(*) FROM blobs GROUP BY channel")
+        counts = dict(cur.fetchall())
+    assert counts["phase"] == 1
+    assert counts["messages"] > 1
+    # Listed checkpoints get their values back from the blobs table
+    history = list(saver.list(config))
+    assert history[0].checkpoint["channel_values"]["messages"] == ["hello", "reply 1", "again", "reply 3"]
+    assert history[-1].checkpoint["channel_values"] == {"__start__": {"messages": ["hello"], "phase": "screening"}}
+
+
+def test_delete_thread_drops_blobs(tmp_path):
+    saver = _saver(str(tmp_path / "checkpoints.sqlite"))
+    _build(saver).invoke({"messages": ["hello"], "phase": "screening"}, session_config("session-1"))
+    saver.delete_thread("session-1")
+
+    assert not has_session("session-1", saver)
+    with saver.cursor(transaction=False) as cur:
+        cur.execute("SELECT COUNT(*) FROM blobs")
+        assert cur.fetchone()[0] == 0
@@ -0,0 +1,63 @@
+from utils.chunking import PAGE_BREAK, chunk_document, estimate_tokens, split_blocks, strip_page_boilerplate
+
+DISCLAIMER = "This guideline does not replace clinical judgement and must be applied to each patient individually."
+
+
+def _page(number, body):
+    return f"National Mental Health Guideline\n{body}\nPage {number} of 4"
+
+
+def test_running_headers_and_footers_are_stripped():
+    bodies = ["Screening comes first.", "Then scoring.", "Then the severity band.", "Then follow-up."]
+    pages = [_page(i, body) for i, body in enumerate(bodies, 1)]
+    assert strip_page_boilerplate(pages) == bodies
+    # Too few pages to tell boilerplate from content
+    assert strip_page_boilerplate(pages[:2]) == pages[:2]
+
+
+def test_blocks():
+    text = (
+        "1. Scoring\n"
+        "Add the item scores to get the total score.\n\n"
+        "Score     Severity\n"
+        "0-4       Minimal\n"
+        "5-9       Mild\n"
+        "10-14     Moderate\n"
+    )
+    assert split_blocks(text) == [
+        ("heading", "1. Scoring"),
+        ("paragraph", "Add the item scores to get the total score."),
+        ("table", "Score Severity\n0-4 Minimal\n5-9 Mild\n10-14 Moderate"),
+    ]
+
+
+def test_chunks_respect_headings_and_budget():
+    sentences = " ".join(f"Sentence number {i} describes a follow-up step for the clinician." for i in range(40))
+    text = f"Assessment\n{sentences}\n\nReferral\nRefer urgently when item 9 is positive."
+    chunks, _, _ = chunk_document(text, max_tokens=60)
+    assert len(chunks) > 2
+    assert all(estimate_tokens(chunk) <= 60 for chunk in chunks)
+    # Every chunk is prefixed with the heading of its section, and none spans two sections
+    assert all(chunk.startswith("Assessment\n") for chunk in chunks[:-1])
+    assert chunks[-1] == "Referral\nRefer urgently when item 9 is positive."
+
+
+def test_repeated_paragraphs_are_dropped_across_documents():
+    seen = set()
+    first = PAGE_BREAK.join(["Overview\nPHQ-9 screens for depression.", DISCLAIMER])
+    chunks, kept, dropped = chunk_document(first, max_tokens=200, seen=seen)
+    assert DISCLAIMER in "\n".join(chunks)
+    assert dropped == [] and len(kept) == 1
+
+    second = f"Dosing\nStart low and go slow.\n\n{DISCLAIMER}"
+    chunks, kept, dropped = chunk_document(second, max_tokens=200, seen=seen)
+    assert chunks == ["Dosing\nStart low and go slow."]
+    assert dropped and not kept
+
+
+def test_blocks_differing_only_in_numbers_are_kept():
+    first = "A total score of 5 to 9 falls in severity band 2 of 5; repeat the PHQ-9 within 4 weeks."
+    second = "A total score of 10 to 14 falls in severity band 3 of 5; repeat the PHQ-9 within 2 weeks."
+    chunks, kept, dropped = chunk_document(f"{first}\n\n{second}", max_tokens=200)
+    assert first in chunks[0] and second in chunks[0]
+    assert len(kept) == 2 and dropped == []
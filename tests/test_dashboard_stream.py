@@ -0,0 +1,19 @@
+import asyncio
+
+import src.dashboard_app as dashboard_app
+
+
+def test_overview_stream_wakes_on_a_write(state_db, monkeypatch):
+    # Far longer than the test may take: only the in-process notification can wake it
+    monkeypatch.setattr(dashboard_app, "CROSS_PROCESS_CHECK_SECONDS", 60.0)
+
+    async def run():
+        stream = dashboard_app.stream_overview()
+        first = await stream.__anext__()
+        state_db.update_emotion("s1", "joy")
+        second = await asyncio.wait_for(stream.__anext__(), timeout=5)
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == 0 and second > first
@@ -0,0 +1,47 @@
+import os
+import json
+
+import pytest
+
+import utils.faq as faq
+
+FAQ_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "faq.json")
+
+
+@pytest.fixture
+def index(monkeypatch):
+    with open(FAQ_JSON, encoding="utf-8") as f:
+        index = faq.FAQIndex(json.load(f))
+    monkeypatch.setattr(faq, "_index", index)
+    monkeypatch.setattr(faq, "_embed", None)
+    return index
+
+
+def _entry(index, best):
+    return index.entries[best]["id"] if best is not None else None
+
+
+def test_malayalam_question_matches_its_entry(index):
+    best, _, matched, _ = index.lexical_match("എന്റെ ഡാറ്റ")
+    assert (_entry(index, best), matched) == ("privacy", 1)
+    answer, _ = faq._consult("എന്റെ ഡാറ്റ", "Malayalam")
+    assert answer != index.entries[0]["answers"]["Malayalam"]
+
+
+def test_malayalam_terms_are_counted_once_whole(index):
+    # A single word is not enough to answer without the LLM, however well it matches
+    best, confidence, matched, _ = index.lexical_match("സ്കോർ സ്കോർ")
+    assert (_entry(index, best), matched) == ("scoring", 1)
+    assert confidence >= 0.85
+    assert faq._consult("സ്കോർ സ്കോർ", "Malayalam")[0] is None
+    assert faq._consult("എന്റെ സ്കോർ", "Malayalam")[0] == index.entries[1]["answers"]["Malayalam"]
+
+
+def test_malayalam_skips_the_english_embedding(index, monkeypatch):
+    embedded = []
+    monkeypatch.setattr(faq, "_embed", lambda text: embedded.append(text) or [1.0])
+    assert faq._consult("ഇത് എത്ര നേരം?", "Malayalam") == (None, None)
+    assert embedded == []
+    # Only English questions get an embedding row
+    assert all(not faq.is_malayalam(q) for q in index.questions)
+    assert len(index.questions) == len(index.question_entries)
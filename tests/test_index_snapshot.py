@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+import config
+import utils.index_snapshot as index_snapshot
+from utils.index_snapshot import CURRENT_FILE, SnapshotIndex, get_snapshot_index, write_snapshot
+
+
+def _corpus(n=300, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(n)]
+    texts = [f"guideline chunk {i}" for i in range(n)]
+    return ids, texts, vectors
+
+
+def _open(index_dir, version):
+    return SnapshotIndex(os.path.join(index_dir, version))
+
+
+def test_float32_search_is_exact(tmp_path):
+    ids, texts, vectors = _corpus()
+    version = write_snapshot(ids, texts, vectors, "test-model", index_dir=str(tmp_path), quantization="float32")
+    index = _open(str(tmp_path), version)
+    assert len(index) == len(ids)
+    assert (tmp_path / CURRENT_FILE).read_text() == version
+
+    query = vectors[7] + 0.1 * vectors[8]
+    results = index.search(query, 5)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    assert [r["id"] for r in results] == [ids[i] for i in expected]
+    assert results[0] == {"id": "chunk-7", "score": results[0]["score"], "text": "guideline chunk 7"}
+    assert results[0]["score"] >= results[-1]["score"]
+
+
+def test_search_on_empty_snapshot(tmp_path):
+    version = write_snapshot([], [], np.zeros((0, 8), np.float32), "test-model", index_dir=str(tmp_path), quantization="float32")
+    assert _open(str(tmp_path), version).search(np.ones(8), 5) == []
+
+
+def test_publish_swaps_and_prunes(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RAG_SNAPSHOT_CHECK_SECONDS", 0)
+    monkeypatch.setattr(index_snapshot, "_index", None)
+    index_dir = str(tmp_path)
+    assert get_snapshot_index(index_dir) is None
+
+    ids, texts, vectors = _corpus(n=20)
+    versions = [write_snapshot(ids, texts, vectors, "test-model", index_dir=index_dir, quantization="float32") for _ in range(3)]
+    assert sorted(versions) == versions
+    assert sorted(d for d in os.listdir(index_dir) if d != CURRENT_FILE) == versions[-index_snapshot.KEEP_VERSIONS:]
+    assert get_snapshot_index(index_dir).version == versions[-1]
+
+
+def _clustered(n=1000, dim=384, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(30, dim))
+    vectors = (centers[rng.integers(0, len(centers), n)] + 0.5 * rng.normal(size=(n, dim))).astype(np.float32)
+    queries = vectors[:50] + 0.3 * rng.normal(size=(50, dim)).astype(np.float32)
+    return [str(i) for i in range(n)], vectors, queries
+
+
+def _recall(index, vectors, queries, k=5):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    hits = 0
+    for query in queries:
+        expected = {str(i) for i in np.argsort(-(normalized @ query))[:k]}
+        hits += len(expected & {r["id"] for r in index.search(query, k)})
+    return hits / (k * len(queries))
+
+
+def test_int8_codes_round_trip():
+    _, vectors, _ = _clustered(n=200)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    codes, low, scale = index_snapshot.quantize_int8(vectors)
+    assert codes.dtype == np.int8
+    restored = low + scale * (codes.astype(np.float32) + 128)
+    inside = (vectors >= np.quantile(vectors, 0.005, axis=0)) & (vectors <= np.quantile(vectors, 0.995, axis=0))
+    assert np.abs(restored - vectors)[inside].max() <= scale.max() / 2 + 1e-6
+
+
+def test_quantized_recall(tmp_path, monkeypatch):
+    ids, vectors, queries = _clustered()
+    monkeypatch.setattr(config, "RAG_QUANTIZATION_OVERSAMPLING", 4.0)
+    int8 = _open(str(tmp_path), write_snapshot(ids, ids, vectors, "test-model", index_dir=str(tmp_path), quantization="int8"))
+    assert int8.codes.nbytes * 4 == int8.vectors.nbytes
+    assert _recall(int8, vectors, queries) >= 0.95
+
+    # Sign bits alone rank coarsely; a wider rescoring pool makes up for it
+    monkeypatch.setattr(config, "RAG_QUANTIZATION_OVERSAMPLING", 10.0)
+    binary = _open(str(tmp_path), write_snapshot(ids, ids, vectors, "test-model", index_dir=str(tmp_path), quantization="binary"))
+    assert binary.codes.nbytes * 32 == binary.vectors.nbytes
+    assert _recall(binary, vectors, queries) >= 0.95
+
+    # Returned scores are the full-precision cosine, not the approximation
+    query = queries[0] / np.linalg.norm(queries[0])
+    for result in binary.search(queries[0], 5):
+        row = np.asarray(binary.vectors[int(result["id"])])
+        assert np.isclose(result["score"], row @ query, atol=1e-5)
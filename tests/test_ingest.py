@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from utils.ingest import _extract_in_parallel, files_to_rechunk
+
+FILES = [Path(f"{name}.pdf") for name in ("a", "b", "c", "d")]
+
+
+def test_rechunks_files_that_dropped_a_block_of_a_changed_file():
+    previous = {
+        "a.pdf": {"blocks": ["x"], "dropped": []},
+        "b.pdf": {"blocks": ["y"], "dropped": ["x"]}, # lost if a.pdf no longer has x
+        "c.pdf": {"blocks": [], "dropped": ["y"]}, # then lost if b.pdf no longer has y
+        "d.pdf": {"blocks": ["z"], "dropped": []},
+    }
+    assert files_to_rechunk(FILES, [FILES[0]], [], previous) == FILES[:3]
+    assert files_to_rechunk(FILES, [FILES[3]], [], previous) == [FILES[3]]
+
+
+def test_rechunks_files_that_dropped_a_block_of_a_removed_file():
+    previous = {
+        "gone.pdf": {"blocks": ["x"]},
+        "c.pdf": {"blocks": [], "dropped": ["x"]},
+    }
+    assert files_to_rechunk(FILES, [], ["gone.pdf"], previous) == [FILES[2]]
+
+
+def test_extraction_results_keep_path_order(tmp_path):
+    paths = [tmp_path / f"missing{i}.pdf" for i in range(7)]
+    results = list(_extract_in_parallel(paths, workers=2))
+    assert [path for path, _ in results] == paths
+    assert all(isinstance(error, Exception) for _, error in results)
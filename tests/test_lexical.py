@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+
+import config
+import utils.index_snapshot as index_snapshot
+from utils.index_snapshot import write_snapshot
+from utils.lexical import BM25Index, tokenize
+from utils.retriever import GuidelineRetriever, reciprocal_rank_fusion
+
+DOCS = [
+    "A PHQ-9 total score of 20 to 27 indicates severe depression.",
+    "Scores of 10 to 14 suggest moderate depression; consider a treatment plan.",
+    "Item 9 asks about thoughts that you would be better off dead.",
+    "Refer to a specialist when the cutoff for severe symptoms is exceeded.",
+]
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("What is the PHQ-9 cutoff for Severe?") == ["phq", "9", "cutoff", "severe"]
+
+
+def test_tokenize_keeps_malayalam_words_whole():
+    # Vowel signs and virama are combining marks, not \w
+    assert tokenize("ഈ ചോദ്യാവലി എന്താണ്?") == ["ഈ", "ചോദ്യാവലി", "എന്താണ്"]
+    assert tokenize("എന്റെ ഡാറ്റ") == ["എന്റെ", "ഡാറ്റ"]
+
+
+def test_bm25_ranks_by_term_weight(tmp_path):
+    index = BM25Index.build(DOCS)
+    top, scores, confidence = index.search("severe cutoff", 10)
+    # The only chunk with both terms first, the other "severe" chunk next
+    assert list(top) == [3, 0]
+    assert scores[0] > scores[1] > 0
+    assert 0 < confidence <= 1
+
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert list(loaded.search("severe cutoff", 10)[0]) == [3, 0]
+    assert np.allclose(loaded.search("severe cutoff", 10)[1], scores)
+
+
+def test_bm25_confidence_counts_unmatched_terms():
+    index = BM25Index.build(DOCS)
+    _, _, full = index.search("moderate treatment", 5)
+    _, _, partial = index.search("moderate insomnia", 5)
+    assert partial < full
+    assert index.search("insomnia", 5)[2] == 0.0
+    assert len(index.search("the of", 5)[0]) == 0
+
+
+def test_reciprocal_rank_fusion():
+    lexical = [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}]
+    dense = [{"id": "b", "text": "B"}, {"id": "c", "text": "C"}]
+    fused = reciprocal_rank_fusion([lexical, dense], limit=3, k=60)
+    assert [r["id"] for r in fused] == ["b", "a", "c"]
+    assert np.isclose(fused[0]["score"], 1 / 62 + 1 / 61)
+    assert [r["id"] for r in reciprocal_rank_fusion([lexical, dense], limit=1)] == ["b"]
+
+
+def test_search_paths(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(len(DOCS), 16)).astype(np.float32)
+    write_snapshot([str(i) for i in range(len(DOCS))], DOCS, vectors, "test-model", index_dir=str(tmp_path), quantization="float32")
+    monkeypatch.setattr(config, "RAG_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(index_snapshot, "_index", None)
+
+    retriever = GuidelineRetriever("test", client=object())
+    embedded = []
+
+    def embed_query(query):
+        embedded.append(query)
+        return vectors[2] if "dead" in query else rng.normal(size=16).astype(np.float32)
+
+    retriever.embed_query = embed_query
+    # Every query term matched: answered from BM25 without embedding
+    results = retriever.search("moderate treatment plan", 2)
+    assert (results[0]["id"], embedded) == ("1", [])
+    assert retriever.search_paths == {"lexical": 1}
+    # Weak lexical match: embedded and fused
+    results = retriever.search("dead insomnia appetite fatigue", 2)
+    assert (results[0]["id"], embedded) == ("2", ["dead insomnia appetite fatigue"])
+    assert retriever.search_paths == {"lexical": 1, "hybrid": 1}
+
+
+def test_store_results_are_cached_until_reingest(tmp_path, monkeypatch):
+    # No snapshot: searched in the store, cached against the ingest manifest
+    monkeypatch.setattr(config, "RAG_INDEX_DIR", str(tmp_path / "missing"))
+    monkeypatch.setattr(index_snapshot, "_index", None)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text("{}")
+    monkeypatch.setattr(config, "RAG_MANIFEST_PATH", str(manifest))
+
+    retriever = GuidelineRetriever("test", client=object())
+    searched = []
+    retriever.embed_query = lambda query: np.ones(4, dtype=np.float32)
+    retriever.search_vector = lambda vector, limit: searched.append(limit) or [{"id": "1", "score": 1.0, "text": "a"}]
+    retriever.search("severe cutoff", 2)
+    retriever.search("severe cutoff", 2)
+    assert searched == [2]
+
+    os.utime(manifest, ns=(0, manifest.stat().st_mtime_ns + 10 ** 9))
+    retriever.search("severe cutoff", 2)
+    assert searched == [2, 2]
@@ -0,0 +1,47 @@
+import numpy as np
+
+from utils.population_stats import ALL, MIN_COHORT_SIZE, PopulationCube
+
+
+def _cube(totals, age=21, gender="Female"):
+    cube = PopulationCube.empty()
+    for total in totals:
+        cube.add_observation(age, gender, {"Total": total})
+    return cube
+
+
+def test_percentile_rank_is_mid_rank():
+    cube = _cube([5, 10, 10, 15])
+    # One respondent below 10 and two at 10: (1 + 0.5 * 2) / 4
+    assert cube.percentile_rank("Total", 10) == 50.0
+    assert cube.percentile_rank("Total", 0) == 0.0
+    assert cube.percentile_rank("Total", 27) == 100.0
+    assert cube.percentile_rank("Fatigue", 1) is None
+
+
+def test_stats_match_numpy():
+    totals = [3, 7, 7, 9, 12, 14, 20, 21, 26]
+    stats = _cube(totals).stats("Total")
+    assert stats["count"] == len(totals)
+    assert np.isclose(stats["mean"], np.mean(totals))
+    assert (stats["q1"], stats["median"], stats["q3"]) == (7, 12, 20)
+
+
+def test_small_cohort_widens_to_all():
+    cube = _cube([10] * MIN_COHORT_SIZE, age=21, gender="Female")
+    cube.add_observation(24, "Male", {"Total": 3})
+    assert cube.cohort(21, "Female") == ("20-22", "Female")
+    assert cube.cohort(24, "Male") == (ALL, ALL)
+    assert cube.stats("Total", "20-22", "Female")["count"] == MIN_COHORT_SIZE
+    assert cube.stats("Total")["count"] == MIN_COHORT_SIZE + 1
+    ranks = cube.patient_percentiles({"Total": 10, "Fatigue": None, "Unknown": 1}, age=24, gender="Male")
+    assert ranks == {"Total": {"percentile": 100 * (1 + 0.5 * MIN_COHORT_SIZE) / (MIN_COHORT_SIZE + 1), "age_band": ALL, "gender": ALL}}
+
+
+def test_save_and_load(tmp_path):
+    cube = _cube([4, 8])
+    path = str(tmp_path / "cube.npz")
+    cube.save(path)
+    loaded = PopulationCube.load(path)
+    assert loaded.version == cube.version == 2
+    assert np.array_equal(loaded.hist, cube.hist)
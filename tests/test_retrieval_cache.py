@@ -0,0 +1,48 @@
+import numpy as np
+
+from utils.retrieval_cache import RetrievalCache, normalize_query
+
+RESULTS = [{"id": str(i), "score": 1.0 - i / 10, "text": f"chunk {i}"} for i in range(5)]
+
+
+def test_normalize_query():
+    assert normalize_query("  What's the PHQ-9   cutoff?? ") == normalize_query("what s the phq 9 cutoff")
+
+
+def test_exact_hits_need_enough_results():
+    cache = RetrievalCache(max_entries=4, ttl_seconds=60, similarity=0.95)
+    cache.put("PHQ-9 cutoff?", 5, "v1", RESULTS)
+    assert cache.get("phq-9 CUTOFF", 3, "v1") == RESULTS[:3]
+    # More results than were cached is a miss
+    assert cache.get("phq-9 cutoff", 10, "v1") is None
+
+
+def test_semantic_tier():
+    cache = RetrievalCache(max_entries=4, ttl_seconds=60, similarity=0.95)
+    vector = np.array([1.0, 0.0, 0.0])
+    cache.put("phq-9 cutoff", 5, "v1", RESULTS, vector * 3)
+    assert cache.get_similar([0.99, 0.05, 0.0], 5, "v1") == RESULTS
+    assert cache.get_similar([0.5, 0.5, 0.5], 5, "v1") is None
+    stats = cache.metrics()
+    assert (stats["semantic_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_lru_ttl_and_version(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.retrieval_cache.time.monotonic", lambda: now[0])
+    cache = RetrievalCache(max_entries=2, ttl_seconds=60, similarity=0.95)
+    cache.put("a", 5, "v1", RESULTS)
+    cache.put("b", 5, "v1", RESULTS)
+    cache.get("a", 5, "v1")
+    cache.put("c", 5, "v1", RESULTS)
+    # "b" was least recently used
+    assert cache.get("b", 5, "v1") is None
+    assert cache.get("a", 5, "v1") is not None
+
+    now[0] += 61
+    assert cache.get("c", 5, "v1") is None
+
+    cache.put("d", 5, "v1", RESULTS)
+    assert cache.get("d", 5, "v2") is None
+    assert cache.metrics()["invalidations"] == 1
+    assert cache.metrics()["entries"] == 0
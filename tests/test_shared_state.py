@@ -0,0 +1,97 @@
+import json
+
+
+PATIENT = {"name": "Asha", "age": 30, "gender": "Female", "id": "p1"}
+
+
+def _without_counter(state):
+    return {k: v for k, v in state.items() if k not in ("events_since_snapshot", "last_updated")}
+
+
+def test_sessions_are_independent(state_db):
+    shared_state = state_db
+    shared_state.update_patient_data("s1", PATIENT)
+    shared_state.update_emotion("s2", "joy")
+
+    assert shared_state.get_dashboard_state("s1")["patient"] == PATIENT
+    assert shared_state.get_dashboard_state("s1")["top_emotions"] == {}
+    assert shared_state.get_dashboard_state("s2")["patient"] is None
+    assert sorted(shared_state.list_sessions()) == ["s1", "s2"]
+    shared_state.clear_state("s2")
+    assert shared_state.list_sessions() == ["s1"]
+
+
+def test_other_process_reads_from_disk(state_db):
+    shared_state = state_db
+    shared_state.update_emotion("s1", "joy")
+    # A process that never wrote the session rebuilds it from the database
+    shared_state._sessions.clear()
+    shared_state._owned.clear()
+    assert shared_state.get_dashboard_state("s1")["top_emotions"] == {"joy": 1}
+
+
+def test_replay_matches_live_state(state_db):
+    shared_state = state_db
+    shared_state.update_patient_data("s1", PATIENT)
+    shared_state.update_symptoms("s1", {"Little interest": 2, "Feeling down": 1})
+    shared_state.update_symptoms("s1", {"Little interest": 2, "Feeling down": 3})
+    shared_state.update_emotion("s1", "sadness")
+
+    live = shared_state.get_dashboard_state("s1")
+    assert live["symptoms"] == {"Little interest": 2, "Feeling down": 3}
+    assert live["top_emotions"] == {"sadness": 1}
+    # The unchanged score was not logged again
+    assert len(shared_state.get_session_events("s1")) == 5
+    assert _without_counter(shared_state.replay_session("s1")) == _without_counter(live)
+
+
+def test_snapshot_plus_tail_matches_replay(state_db, monkeypatch):
+    shared_state = state_db
+    monkeypatch.setattr(shared_state, "SNAPSHOT_EVERY", 3)
+    for emotion in ("joy", "fear", "joy", "anger"):
+        shared_state.update_emotion("s1", emotion)
+
+    seq, stored = shared_state._get_conn().execute("SELECT seq, state FROM snapshots WHERE session_id = 's1'").fetchone()
+    stored = json.loads(stored)
+    assert seq == 3
+    assert stored["top_emotions"] == {"joy": 2, "fear": 1}
+    # The count that triggered the snapshot isn't stored with it
+    assert stored["events_since_snapshot"] == 0
+    # Snapshot plus the one event after it rebuilds the same aggregate as a full replay
+    loaded = shared_state._load_session("s1")
+    assert loaded["events_since_snapshot"] == 1
+    assert _without_counter(loaded) == _without_counter(shared_state.replay_session("s1"))
+    assert loaded["top_emotions"] == {"joy": 2, "fear": 1, "anger": 1}
+
+
+def test_failure_after_commit_keeps_the_events(state_db, monkeypatch):
+    shared_state = state_db
+    shared_state.update_patient_data("s1", PATIENT)
+    track_overview = shared_state._track_overview
+
+    def broken(*args):
+        track_overview(*args)
+        raise RuntimeError("overview bug")
+
+    monkeypatch.setattr(shared_state, "_track_overview", broken)
+    shared_state.update_emotion("s1", "joy")
+    # Committed: not rolled back, and the overview is rebuilt from the committed rows
+    assert shared_state.get_dashboard_state("s1")["top_emotions"] == {"joy": 1}
+    assert shared_state._overview is None
+    assert shared_state.get_overview_stats()["sessions"] == 1
+
+
+def test_turn_stores_the_graph_risk_profile(state_db, monkeypatch):
+    import config
+    from utils.risk import update_risk_profile
+    shared_state = state_db
+    labels = [config.CSSRS_LABELS[i] for i in sorted(config.CSSRS_LABELS)]
+    probabilities = dict(zip(labels, [0.1, 0.1, 0.2, 0.6] + [0.0] * (len(labels) - 4)))
+    # Includes what the crisis node adds on top of the EWMA
+    profile = {**update_risk_profile(None, list(probabilities.values())), "notified_level": 1}
+    shared_state.record_turn_analysis("s1", {}, probabilities, profile)
+
+    # Applied as-is, not recomputed, even if the smoothing setting differs here
+    monkeypatch.setattr(config, "RISK_EWMA_ALPHA", 0.9)
+    assert shared_state.get_dashboard_state("s1")["risk_profile"] == profile
+    assert shared_state.replay_session("s1")["risk_profile"] == profile
@@ -0,0 +1,20 @@
+import numpy as np
+
+from utils.timeseries import lttb
+
+
+def test_short_series_are_kept_whole():
+    assert list(lttb([0, 1, 2], [5, 6, 7], 10)) == [0, 1, 2]
+    assert list(lttb(range(10), range(10), 2)) == list(range(10))
+
+
+def test_keeps_endpoints_and_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[[137, 512, 880]] = [5.0, -4.0, 3.0]
+    indices = lttb(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    # Isolated spikes dominate their bucket's triangle area
+    assert {137, 512, 880} <= set(indices.tolist())
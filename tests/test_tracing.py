@@ -0,0 +1,91 @@
+import json
+import time
+
+import pytest
+
+import config
+import utils.tracing as tracing
+
+
+@pytest.fixture
+def trace_log(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(config, "TRACE_LOG_PATH", str(path))
+    monkeypatch.setattr(config, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "_stats", None)
+    monkeypatch.setattr(tracing, "_seeded", False)
+    monkeypatch.setattr(tracing, "_turns", {})
+    monkeypatch.setattr(tracing, "_writer", None)
+    yield path
+    if tracing._writer is not None:
+        for handler in list(tracing._writer.handlers):
+            tracing._writer.removeHandler(handler)
+            handler.close()
+
+
+def _record(trace, name, ms, parent=1, ts=0.0):
+    return {"trace": trace, "session": "s1", "turn": 1, "span": 2, "parent": parent, "name": name, "ts": ts, "ms": ms, "attrs": {}}
+
+
+def test_percentiles(trace_log):
+    for i in range(1, 101):
+        tracing._observe([_record(f"t{i}", "node:respond", float(i))])
+    stats = tracing.get_trace_stats()["spans"]["node:respond"]
+    assert stats["count"] == 100
+    assert stats["p50"] == pytest.approx(0.051)
+    assert stats["p95"] == pytest.approx(0.096)
+    assert stats["p99"] == stats["max"] == pytest.approx(0.1)
+
+
+def test_root_span_records_slowest_node(trace_log):
+    tracing._observe([
+        _record("t", "node:detect", 30.0),
+        _record("t", "node:respond", 120.0),
+        _record("t", "turn", 160.0, parent=None),
+    ])
+    recent, = tracing.get_trace_stats()["recent_turns"]
+    assert (recent["ms"], recent["slowest"]) == (160.0, "node:respond (120 ms)")
+
+
+def test_spans_nest_and_reach_the_log(trace_log):
+    with tracing.turn("s1"):
+        with tracing.span("node:respond") as node:
+            with tracing.span("llm.attempt"):
+                pass
+            node.set(route="end")
+    assert tracing.span("outside") is tracing.NOOP
+
+    records = [json.loads(line) for line in trace_log.read_text().splitlines()]
+    by_name = {r["name"]: r for r in records}
+    assert [r["name"] for r in records] == ["llm.attempt", "node:respond", "turn"]
+    assert by_name["llm.attempt"]["parent"] == by_name["node:respond"]["span"]
+    assert by_name["node:respond"]["parent"] == by_name["turn"]["span"]
+    assert by_name["node:respond"]["attrs"] == {"route": "end"}
+
+
+def test_log_seeds_stats_once(trace_log):
+    # Written by an earlier run: counted on the first dashboard read
+    earlier = time.time() - 60
+    trace_log.write_text("\n".join(json.dumps(r) for r in [
+        _record("old", "node:respond", 40.0, ts=earlier),
+        _record("old", "turn", 50.0, parent=None, ts=earlier),
+    ]) + "\n")
+    with tracing.turn("s1"):
+        with tracing.span("node:respond"):
+            pass
+    # The turn itself never read the log
+    assert not tracing._seeded
+
+    spans = tracing.get_trace_stats()["spans"]
+    assert spans["node:respond"]["count"] == 2
+    assert spans["turn"]["count"] == 2
+    # This process's own spans were not read back from the log
+    assert tracing.get_trace_stats()["spans"]["turn"]["count"] == 2
+    assert len(tracing.get_trace_stats()["recent_turns"]) == 2
+
+
+def test_unsampled_turn_is_noop(monkeypatch):
+    monkeypatch.setattr(config, "TRACE_SAMPLE_RATE", 0.0)
+    with tracing.turn("s1") as root:
+        assert root is tracing.NOOP
+        assert tracing.span("node:respond") is tracing.NOOP